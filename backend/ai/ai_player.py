@@ -1,38 +1,263 @@
 import math
-from game.engine import GameEngine, GameState
+import time
+from typing import List, NamedTuple, Optional
+from game.engine import GameState
+from game.bitboard import (
+    BitState, BIT, MAX_GOATS, move_to_dict,
+)
+from game.symmetry import canonical_key, mirror_move
+from ai.transposition import TranspositionTable, EXACT, LOWER, UPPER
+from ai.ordering import MoveOrderer, capture_gain
+from ai.evaluation import evaluate, max_capture_swing, PHASE_WEIGHTS
+from ai.parallel import parallel_search_root, PARALLEL_MIN_DEPTH
+from ai.tablebase import Tablebase
+from ai.opening_book import OpeningBook
+
+WIN_SCORE = 10000
+# Upper limit for iterative deepening when only a time budget is given
+MAX_DEPTH = 32
+# How many nodes to search between clock checks
+TIME_CHECK_INTERVAL = 1024
+# Quiescence search: plies of captures (and goat replies) past the horizon
+QUIESCENCE_MAX_PLY = 6
+
+
+class SearchResult(NamedTuple):
+    move: Optional[dict]  # Best move in engine/API format, None if no moves
+    score: float          # Minimax value from the last completed depth
+    depth: int            # Last fully completed depth
+    nodes: int            # Nodes visited across all iterations
+    pv: List[dict]        # Principal variation, starting with 'move'
+
+
+class _SearchTimeout(Exception):
+    """Raised inside the search when the time budget runs out or it is stopped."""
+
+
+class SearchContext:
+    """
+    Mutable state of a single search: node and search statistics counts,
+    deadline, stop flag and move-ordering tables. Every search gets its own context, so one MinimaxAI can run any
+    number of searches at once. The transposition table is the only shared
+    structure; its entries are immutable tuples replaced in one assignment.
+    """
+    __slots__ = ('nodes', 'tt_probes', 'tt_hits', 'expanded', 'cutoffs',
+                 'deadline', 'stop', 'orderer', 'seen', 'quiet_left', 'progress', 'drawn')
+
+    def __init__(self, ordering: bool = True, deadline: Optional[float] = None, stop=None):
+        self.nodes = 0
+        # Transposition table lookups and hits, interior nodes whose moves were
+        # searched and how many of those ended in a beta cutoff (see SearchMetrics)
+        self.tt_probes = 0
+        self.tt_hits = 0
+        self.expanded = 0
+        self.cutoffs = 0
+        self.deadline = deadline
+        # Any object with is_set(), e.g. threading.Event
+        self.stop = stop
+        self.orderer = MoveOrderer() if ordering else None
+        # Draw rules (see game/engine.py DrawRules): keys of the positions
+        # already on the board in this game or on the current search path
+        # (None: repetitions are not draws), and the plies the search may go
+        # without a placement or capture from 'progress' (goats placed,
+        # goats captured at the root) before the game is drawn.
+        self.seen = None
+        self.quiet_left = math.inf
+        self.progress = None
+        # Set when a draw rule decided a value below the current node: such
+        # values depend on the game's history and the search path, so they
+        # stay out of the shared transposition table.
+        self.drawn = False
+
+    def counts(self) -> tuple:
+        return (self.nodes, self.tt_probes, self.tt_hits, self.expanded, self.cutoffs)
+
+    def add_counts(self, counts: tuple):
+        """Add the counts() of a search done elsewhere, e.g. in a worker process."""
+        nodes, tt_probes, tt_hits, expanded, cutoffs = counts
+        self.nodes += nodes
+        self.tt_probes += tt_probes
+        self.tt_hits += tt_hits
+        self.expanded += expanded
+        self.cutoffs += cutoffs
+
+    def track_draws(self, state: GameState, board: BitState):
+        """Set up the draw rules of the game 'state' for a search from 'board'."""
+        rules = state.draw_rules
+        if rules.repetitions:
+            self.seen = set(state.positions)
+            self.seen.add(board.key)
+        if rules.no_progress_plies:
+            self.quiet_left = rules.no_progress_plies - state.quiet_plies
+        self.progress = (board.goats_on_board, board.goats_captured)
+
+    def draw_state(self) -> tuple:
+        """Picklable draw-rule state, for searches in worker processes."""
+        return (tuple(self.seen) if self.seen is not None else None,
+                self.quiet_left, self.progress)
+
+    def set_draw_state(self, draws: tuple):
+        seen, self.quiet_left, self.progress = draws
+        self.seen = set(seen) if seen is not None else None
+
+    def is_draw(self, state: BitState, ply: int) -> bool:
+        """True if reaching 'state' at 'ply' plies from the root draws the game."""
+        if self.seen is not None and state.key in self.seen:
+            return True  # Repeats an earlier position: scored as a draw right away
+        return (ply >= self.quiet_left
+                and (state.goats_on_board, state.goats_captured) == self.progress)
+
+    def quiet_plies_left(self, state: BitState, ply: int) -> float:
+        """
+        Plies 'state', at 'ply' plies from the root, has before the no-progress
+        draw. Unlimited once the search has placed or captured (the rule's count
+        restarted there, and is not tracked).
+        """
+        if (state.goats_on_board, state.goats_captured) != self.progress:
+            return math.inf
+        return self.quiet_left - ply
+
+    def should_stop(self) -> bool:
+        if self.stop is not None and self.stop.is_set():
+            return True
+        return self.deadline is not None and time.perf_counter() > self.deadline
+
 
 class MinimaxAI:
-    def __init__(self, depth=3):
+    def __init__(self, depth=3, tt_size_bits=16, ordering=True, parallel=0, tablebase=None,
+                 opening_book=None, quiescence=True, weights=None, metrics=None):
         self.depth = depth
-        self.engine = GameEngine() # Used for logic helpers
+        # Transposition table lives as long as the AI, so results carry over
+        # between moves of the same game. tt_size_bits=0 disables it.
+        self.tt = TranspositionTable(tt_size_bits) if tt_size_bits else None
+        # Move ordering (hash move, captures, killers, history).
+        # ordering=False searches moves in generation order, for comparison.
+        self.ordering = ordering
+        # parallel=N splits root moves across a pool of N worker processes.
+        # With the transposition table disabled, the chosen move is identical
+        # to the serial search at the same depth.
+        self.parallel = parallel
+        # Resolve pending captures past the horizon instead of evaluating
+        # mid-exchange (see quiesce).
+        self.quiescence = quiescence
+        # Endgame tablebase (a Tablebase or its directory). Covered positions
+        # are decided from the tables instead of searched.
+        if isinstance(tablebase, str):
+            tablebase = Tablebase(tablebase)
+        self.tablebase = tablebase
+        # Placement-phase opening book (an OpeningBook or its path), consulted
+        # at the root before searching. Loaded on first use.
+        if isinstance(opening_book, str):
+            opening_book = OpeningBook(opening_book)
+        self.opening_book = opening_book
+        # Evaluation weights per phase (see ai/evaluation.py), default PHASE_WEIGHTS
+        self.weights = tuple(weights) if weights is not None else PHASE_WEIGHTS
+        self.capture_swing = max_capture_swing(self.weights)
+        # Records every completed search (a metrics.SearchMetrics), or None
+        self.metrics = metrics
+        self._config = (('depth', depth), ('ordering', ordering), ('tt_size_bits', tt_size_bits),
+                        ('tablebase', tablebase.directory if tablebase is not None else None),
+                        ('quiescence', quiescence), ('weights', self.weights))
+
+    def worker_config(self) -> tuple:
+        """Hashable constructor arguments used to build matching worker AIs."""
+        return self._config
+
+    def new_game(self):
+        """Forget everything learned from the previous game."""
+        if self.tt is not None:
+            self.tt.clear()
 
     def get_best_move(self, state: GameState, player: str):
+        return self.search(state, player).move
+
+    def search(self, state: GameState, player: str, depth: Optional[int] = None,
+               time_ms: Optional[float] = None, stop=None) -> SearchResult:
+        """
+        Iterative deepening search.
+        Searches depth 1, 2, ... up to 'depth' (default self.depth, or MAX_DEPTH
+        when only a time budget is given). With 'time_ms', an iteration that
+        runs out of time is abandoned and the result of the last completed
+        depth is returned. Depth 1 always completes unless 'stop' (e.g. a
+        threading.Event) is set, which abandons the search at any point.
+        """
         # Determine if maximizing or minimizing
         # We assume heuristic: Positive = Good for Tiger, Negative = Good for Goat
         is_maximizing = (player == 'T')
-        
+
+        # Search works on a private bitboard copy, mutated in place with make/unmake
+        board = BitState.from_game_state(state)
+        moves = board.generate_moves()
+        ctx = SearchContext(self.ordering, stop=stop)
+        ctx.track_draws(state, board)
+
+        if not moves:
+            return SearchResult(None, 0, 0, 0, [])
+
+        if depth is None:
+            depth = self.depth if time_ms is None else MAX_DEPTH
+
+        if self.opening_book is not None and board.is_phase_one():
+            entry = self.opening_book.probe(board)
+            # Fixed-depth requests only take book moves searched at least as deep
+            if entry is not None and (time_ms is not None or entry.depth >= depth):
+                move = move_to_dict(entry.move)
+                return SearchResult(move, entry.score, entry.depth, 0, [move])
+
+        if self.tablebase is not None:
+            result = self._probe_root(board, ctx.quiet_plies_left(board, 0))
+            if result is not None:
+                return result
+
+        hash_move = None
+        if self.tt is not None:
+            self.tt.new_search()
+            hash_move = self._tt_move(board)
+
+        start = time.perf_counter()
+        best_move, best_val, completed = moves[0], 0, 0
+        for current in range(1, depth + 1):
+            if current == 2 and time_ms is not None:
+                ctx.deadline = start + time_ms / 1000.0
+            if ctx.orderer is not None:
+                # Root order ignores killers/history so it does not depend on
+                # which process searched what.
+                moves = ctx.orderer.order(board, moves, 0, hash_move, quiet_heuristics=False)
+            try:
+                val, move = self._search_root(ctx, board, moves, current, is_maximizing)
+            except _SearchTimeout:
+                break
+            best_move, best_val, completed = move, val, current
+            # Next iteration starts from this iteration's best move
+            hash_move = move
+            if abs(val) >= WIN_SCORE:
+                break  # Forced result found, deeper search cannot change it
+
+        if self.metrics is not None:
+            self.metrics.record_search(ctx, completed, time.perf_counter() - start)
+        board = BitState.from_game_state(state)
+        pv = [move_to_dict(m) for m in self._principal_variation(board, best_move, completed)]
+        return SearchResult(move_to_dict(best_move), best_val, completed, ctx.nodes, pv)
+
+    def _search_root(self, ctx: SearchContext, board: BitState, moves, depth, is_maximizing):
+        ctx.drawn = False
+        if self.parallel and depth >= PARALLEL_MIN_DEPTH and len(moves) > 1:
+            best_val, best_move = parallel_search_root(self, ctx, board, moves, depth, is_maximizing)
+            if not ctx.drawn:
+                self._tt_store(board, depth, EXACT, best_val, best_move)
+            return best_val, best_move
+
         best_val = -math.inf if is_maximizing else math.inf
         best_move = None
-        
-        # Get valid moves
-        # We need to temporarily set engine state to get moves
-        self.engine.state = state
-        moves = self.engine.get_valid_moves()
-        
-        if not moves:
-            return None
 
         alpha = -math.inf
         beta = math.inf
-        
+
         for move in moves:
-            # Simulate
-            sim_state = state.clone()
-            self.engine.state = sim_state
-            self.engine.apply_move(move)
-            
-            val = self.minimax(sim_state, self.depth - 1, alpha, beta, not is_maximizing)
-            
+            board.make_move(move)
+            val = self.minimax(board, depth - 1, alpha, beta, not is_maximizing, 1, ctx)
+            board.unmake_move(move)
+
             if is_maximizing:
                 if val > best_val:
                     best_val = val
@@ -43,106 +268,291 @@ class MinimaxAI:
                     best_val = val
                     best_move = move
                 beta = min(beta, best_val)
-                
+
             if beta <= alpha:
                 break
-                
-        return best_move
 
-    def minimax(self, state: GameState, depth, alpha, beta, is_maximizing):
-        winner = self.check_winner_sim(state)
+        if not ctx.drawn:
+            self._tt_store(board, depth, EXACT, best_val, best_move)
+
+        return best_val, best_move
+
+    def _tt_move(self, board: BitState):
+        """Best move stored for 'board', oriented to 'board'."""
+        key, mirrored = canonical_key(board)
+        entry = self.tt.probe(key)
+        if entry is None or entry[4] is None:
+            return None
+        return mirror_move(entry[4]) if mirrored else entry[4]
+
+    def _tt_store(self, board: BitState, depth, flag, value, move):
+        if self.tt is None:
+            return
+        key, mirrored = canonical_key(board)
+        if mirrored and move is not None:
+            move = mirror_move(move)
+        self.tt.store(key, depth, flag, value, move)
+
+    def _probe_root(self, board: BitState, quiet_left: float) -> Optional[SearchResult]:
+        """
+        Play straight from the tablebase when it knows the result, and the
+        result comes within the 'quiet_left' plies before a no-progress draw.
+        """
+        found = self.tablebase.best_move(board)
+        if found is None or found[1] is None or found[2] > quiet_left:
+            return None  # Not covered, no forced result, or too far: search as usual
+        move, winner, plies = found
+        score = WIN_SCORE if winner == 'T' else -WIN_SCORE
+        pv = []
+        while found is not None and found[1] is not None and len(pv) < plies:
+            pv.append(move_to_dict(found[0]))
+            board.make_move(found[0])
+            if board.winner() is not None:
+                break
+            found = self.tablebase.best_move(board)
+        return SearchResult(move_to_dict(move), score, plies, 0, pv)
+
+    def _principal_variation(self, board: BitState, first_move, depth):
+        """Follow stored best moves from the root to rebuild the expected line."""
+        pv = [first_move]
+        board.make_move(first_move)
+        seen = {board.key}
+        while self.tt is not None and len(pv) < depth:
+            move = self._tt_move(board)
+            if move is None or move not in board.generate_moves():
+                break
+            board.make_move(move)
+            if board.key in seen:
+                break
+            seen.add(board.key)
+            pv.append(move)
+        return pv
+
+    def minimax(self, state: BitState, depth, alpha, beta, is_maximizing, ply=0,
+                ctx: Optional[SearchContext] = None):
+        if ctx is None:
+            ctx = SearchContext(self.ordering)
+        ctx.nodes += 1
+        if not ctx.nodes % TIME_CHECK_INTERVAL and ctx.should_stop():
+            raise _SearchTimeout()
+
+        winner = state.winner()
         if winner == 'T':
-            return 10000 # Tiger wins
+            return WIN_SCORE # Tiger wins
         elif winner == 'G':
-            return -10000 # Goat wins
-            
+            return -WIN_SCORE # Goat wins
+        if ply and ctx.is_draw(state, ply):
+            ctx.drawn = True
+            return 0
+
+        if self.tablebase is not None:
+            known = self.tablebase.probe(state)
+            if known is not None:
+                # The tables ignore the no-progress rule: a result that comes
+                # too late is searched instead
+                if known[0] is None:
+                    return 0
+                if known[1] <= ctx.quiet_plies_left(state, ply):
+                    return WIN_SCORE if known[0] == 'T' else -WIN_SCORE
+                ctx.drawn = True
+
         if depth == 0:
+            if self.quiescence:
+                return self.quiesce(state, alpha, beta, is_maximizing, 0, ctx)
             return self.evaluate(state)
-            
-        # Get moves
-        self.engine.state = state
-        moves = self.engine.get_valid_moves()
-        
+
+        # Transposition table: reuse a stored result if it was searched deep enough.
+        # Entries are keyed by the canonical orientation (see game/symmetry.py).
+        tt = self.tt
+        hash_move = None
+        alpha_orig, beta_orig = alpha, beta
+        if tt is not None:
+            key = state.key
+            mirrored = state.mirror_key < key
+            if mirrored:
+                key = state.mirror_key
+            entry = tt.probe(key)
+            ctx.tt_probes += 1
+            if entry is not None:
+                ctx.tt_hits += 1
+                _, entry_depth, flag, value, hash_move, _ = entry
+                if mirrored and hash_move is not None:
+                    hash_move = mirror_move(hash_move)
+                if entry_depth >= depth:
+                    if flag == EXACT:
+                        return value
+                    if flag == LOWER:
+                        alpha = max(alpha, value)
+                    else:
+                        beta = min(beta, value)
+                    if beta <= alpha:
+                        return value
+
+        moves = state.generate_moves()
+
         if not moves:
             # If no moves and it's Tiger's turn, Tiger loses (Goat wins)
-            if state.turn == 'T': return -10000
+            if state.turn == 'T': return -WIN_SCORE
             # If no moves and Goat's turn? (Stalemate or Goat Blocked? Rules say Goats win if Tigers blocked. Goats blocked?)
             # Usually only Tigers can be blocked. Goats placed/moved.
-            return 0 
+            return 0
+
+        orderer = ctx.orderer
+        if orderer is not None:
+            moves = orderer.order(state, moves, ply, hash_move)
+
+        ctx.expanded += 1
+        best_move = None
+        # Positions can only repeat once all goats are placed. (At the root the
+        # position may already be in the game's history; leave that entry be.)
+        seen = ctx.seen
+        if seen is not None and (state.goats_on_board < MAX_GOATS or state.key in seen):
+            seen = None
+        if seen is not None:
+            seen.add(state.key)
+        drawn, ctx.drawn = ctx.drawn, False
 
         if is_maximizing: # Tiger
-            max_eval = -math.inf
+            best_eval = -math.inf
             for move in moves:
-                sim_state = state.clone()
-                self.engine.state = sim_state
-                self.engine.apply_move(move)
-                eval = self.minimax(sim_state, depth - 1, alpha, beta, False)
-                max_eval = max(max_eval, eval)
+                state.make_move(move)
+                eval = self.minimax(state, depth - 1, alpha, beta, False, ply + 1, ctx)
+                state.unmake_move(move)
+                if eval > best_eval:
+                    best_eval = eval
+                    best_move = move
                 alpha = max(alpha, eval)
                 if beta <= alpha:
+                    ctx.cutoffs += 1
+                    if orderer is not None:
+                        orderer.record_cutoff(move, ply, depth)
                     break
-            return max_eval
         else: # Goat
-            min_eval = math.inf
+            best_eval = math.inf
             for move in moves:
-                sim_state = state.clone()
-                self.engine.state = sim_state
-                self.engine.apply_move(move)
-                eval = self.minimax(sim_state, depth - 1, alpha, beta, True)
-                min_eval = min(min_eval, eval)
+                state.make_move(move)
+                eval = self.minimax(state, depth - 1, alpha, beta, True, ply + 1, ctx)
+                state.unmake_move(move)
+                if eval < best_eval:
+                    best_eval = eval
+                    best_move = move
                 beta = min(beta, eval)
                 if beta <= alpha:
+                    ctx.cutoffs += 1
+                    if orderer is not None:
+                        orderer.record_cutoff(move, ply, depth)
                     break
-            return min_eval
 
-    def check_winner_sim(self, state: GameState):
-        # We can recycle GameEngine check_winner but need to be careful about state injection
-        # Actually check_winner uses self.state.
-        self.engine.state = state
-        return self.engine.check_winner()
+        if seen is not None:
+            seen.discard(state.key)
 
-    def evaluate(self, state: GameState):
+        if tt is not None and not ctx.drawn:
+            if best_eval <= alpha_orig:
+                flag = UPPER
+            elif best_eval >= beta_orig:
+                flag = LOWER
+            else:
+                flag = EXACT
+            if mirrored and best_move is not None:
+                best_move = mirror_move(best_move)
+            tt.store(key, depth, flag, best_eval, best_move)
+        ctx.drawn = ctx.drawn or drawn
+
+        return best_eval
+
+    def quiesce(self, state: BitState, alpha, beta, is_maximizing, qply, ctx: SearchContext):
+        """
+        Capture search below the horizon.
+        Tigers may stand pat on the static evaluation or try a capture;
+        captures that cannot lift the score above alpha are pruned (delta
+        pruning). Goats facing a capture threat try the moves that evade or
+        block it, or leave it standing (a null move, approximating a quiet
+        move elsewhere); otherwise the evaluation stands. Stops after
+        QUIESCENCE_MAX_PLY plies.
+        """
+        ctx.nodes += 1
+        if not ctx.nodes % TIME_CHECK_INTERVAL and ctx.should_stop():
+            raise _SearchTimeout()
+
+        winner = state.winner()
+        if winner == 'T':
+            return WIN_SCORE
+        elif winner == 'G':
+            return -WIN_SCORE
+
+        stand_pat = self.evaluate(state)
+        if qply >= QUIESCENCE_MAX_PLY:
+            return stand_pat
+
+        captures = state.tiger_captures()
+        if is_maximizing: # Tiger
+            if stand_pat >= beta:
+                return stand_pat
+            best_eval = stand_pat
+            alpha = max(alpha, stand_pat)
+            if state.goats_captured + 1 < 5 and stand_pat + self.capture_swing <= alpha:
+                return best_eval  # No capture can raise alpha
+            captures.sort(key=lambda move: capture_gain(state, move), reverse=True)
+            for move in captures:
+                state.make_move(move)
+                eval = self.quiesce(state, alpha, beta, False, qply + 1, ctx)
+                state.unmake_move(move)
+                if eval > best_eval:
+                    best_eval = eval
+                alpha = max(alpha, eval)
+                if beta <= alpha:
+                    break
+            return best_eval
+
+        # Goat
+        if not captures:
+            return stand_pat
+        # Evasions: move a threatened goat away, or block a landing node
+        threatened = 0
+        landings = 0
+        for (_, _, land, mid) in captures:
+            threatened |= BIT[mid]
+            landings |= BIT[land]
+        evasions = [move for move in state.generate_moves()
+                    if BIT[move[2]] & landings or (move[1] >= 0 and BIT[move[1]] & threatened)]
+        # Or leave the threat standing and let the tigers take
+        state.make_null_move()
+        best_eval = self.quiesce(state, alpha, beta, True, qply + 1, ctx)
+        state.unmake_null_move()
+        beta = min(beta, best_eval)
+        for move in evasions:
+            if beta <= alpha:
+                break
+            state.make_move(move)
+            eval = self.quiesce(state, alpha, beta, True, qply + 1, ctx)
+            state.unmake_move(move)
+            if eval < best_eval:
+                best_eval = eval
+            beta = min(beta, eval)
+        return best_eval
+
+    def check_winner_sim(self, state: BitState):
+        return state.winner()
+
+    def evaluate(self, state: BitState):
         """
         Heuristic:
         + Positive for Tiger advantage
         - Negative for Goat advantage
+        See ai/evaluation.py for the features and their weights.
         """
-        score = 0
-        
-        # 1. Captures (Tiger wants more, Goat wants less)
-        score += state.goats_captured * 100
-        
-        # 2. Tiger Mobility (Tiger wants more options)
-        # We need to compute how many moves Tigers have
-        # This is expensive? No, max 3 tigers.
-        self.engine.state = state
-        # But get_valid_moves returns ALL moves. If turn is G, we can't see T moves.
-        # We should calculate Tiger mobility regardless of turn?
-        # Yes.
-        
-        # Count Tiger moves
-        tiger_moves = 0
-        tigers = [n for n, v in state.board_map.items() if v == 'T']
-        for t in tigers:
-            # Move
-            for n in self.engine.board.get_neighbors(t):
-                if state.board_map[n] is None:
-                    tiger_moves += 1
-            # Capture
-            for _, dest in self.engine.board.get_valid_jumps(t):
-                 # Can't easily check full capture logic here without duplicating code
-                 # but we can try simple check
-                 # We'll skip complex capture check in heuristic for speed, 
-                 # or just rely on neighbors for mobility.
-                 # Actually capture availability is HUGE.
-                 pass
-        
-        score += tiger_moves * 10 
-        
-        # 3. Goat Position (Phase 1 vs 2)
-        # Goats want to surround Tigers.
-        # Maybe distance from Tigers?
-        # For now, simplistic:
-        pass
-        
-        return score
+        return evaluate(state, self.weights)
+
+
+def compare_ordering(state: GameState, player: str, depth: int) -> dict:
+    """
+    Search the same position with move ordering on and off and report the
+    nodes each needed. Both runs start from an empty transposition table.
+    """
+    counts = {}
+    for label, ordering in (('on', True), ('off', False)):
+        ai = MinimaxAI(depth=depth, ordering=ordering)
+        result = ai.search(state, player)
+        counts[label] = result.nodes
+    counts['reduction'] = 1 - counts['on'] / counts['off'] if counts['off'] else 0.0
+    return counts
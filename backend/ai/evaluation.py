@@ -0,0 +1,81 @@
+"""
+Static evaluation for the search.
+Positive scores favour the Tigers, negative scores favour the Goats.
+"""
+from typing import Dict, NamedTuple, Sequence
+from game.bitboard import (
+    BitState, FULL_MASK, MAX_GOATS, NEIGHBOR_MASKS, JUMP_BITS, iter_bits,
+)
+
+
+class Weights(NamedTuple):
+    captured: int   # Per goat captured
+    mobility: int   # Per empty node next to a tiger
+    threats: int    # Per goat a tiger can capture right now
+    trapped: int    # Per tiger with no step and no capture
+    links: int      # Per pair of adjacent goats (goats defend in a block)
+
+
+# Placement: goats are still arriving, so keeping the tigers boxed in and
+# the goats in a block matters most. Movement: goats can no longer fill the
+# holes behind a threatened goat, so threats weigh more.
+PLACEMENT, MOVEMENT = 0, 1
+PHASE_WEIGHTS = (
+    Weights(captured=100, mobility=10, threats=30, trapped=-40, links=-3),
+    Weights(captured=100, mobility=8, threats=45, trapped=-60, links=-4),
+)
+
+
+def max_capture_swing(phase_weights: Sequence[Weights]) -> int:
+    """
+    Largest change one capture can make to the score, for delta pruning:
+    the goat, the landing tiger's new moves, and every other goat turning
+    into a threat.
+    """
+    return max(w.captured + 6 * w.mobility + 3 * w.threats - w.trapped for w in phase_weights)
+
+
+MAX_CAPTURE_SWING = max_capture_swing(PHASE_WEIGHTS)
+
+
+def features(state: BitState) -> Dict[str, int]:
+    """Raw feature values of a position, for inspection and tests."""
+    mobility, threatened, trapped = _tiger_features(state)
+    return {
+        'captured': state.goats_captured,
+        'mobility': mobility,
+        'threats': bin(threatened).count('1'),
+        'trapped': trapped,
+        'links': state.goat_links,
+    }
+
+
+def _tiger_features(state: BitState):
+    empty = FULL_MASK & ~(state.tigers | state.goats)
+    goats = state.goats
+    mobility = 0
+    threatened = 0
+    trapped = 0
+    for t in iter_bits(state.tigers):
+        steps = NEIGHBOR_MASKS[t] & empty
+        mobility += bin(steps).count('1')
+        jumps = 0
+        for (_, _, mid_bit, land_bit) in JUMP_BITS[t]:
+            if goats & mid_bit and empty & land_bit:
+                threatened |= mid_bit
+                jumps = 1
+        if not steps and not jumps:
+            trapped += 1
+    return mobility, threatened, trapped
+
+
+def evaluate(state: BitState, phase_weights: Sequence[Weights] = PHASE_WEIGHTS) -> int:
+    # Goat features come precomputed from make/unmake (BitState.goat_links);
+    # tiger features need only the three tigers' neighbourhoods.
+    w = phase_weights[PLACEMENT if state.goats_on_board < MAX_GOATS else MOVEMENT]
+    mobility, threatened, trapped = _tiger_features(state)
+    return (w.captured * state.goats_captured
+            + w.mobility * mobility
+            + w.threats * bin(threatened).count('1')
+            + w.trapped * trapped
+            + w.links * state.goat_links)
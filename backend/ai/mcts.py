@@ -0,0 +1,233 @@
+import math
+import random
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional
+from game.engine import GameState
+from game.bitboard import BitState, Move, move_to_dict
+from game.playout import choose_playout_move
+from ai.ai_player import SearchContext, SearchResult
+from ai.evaluation import evaluate
+
+# Evaluation difference that makes a cut-off rollout count as ~73% won
+ROLLOUT_EVAL_SCALE = 200.0
+# How many iterations to run between clock checks
+TIME_CHECK_ITERATIONS = 16
+
+
+class Node:
+    """
+    One position in the search tree.
+    'wins' is counted for the player who made 'move' ('tiger_moved'), i.e.
+    the one choosing between this node and its siblings.
+    """
+    __slots__ = ('move', 'parent', 'children', 'untried', 'visits', 'wins', 'key', 'tiger_moved')
+
+    def __init__(self, move: Optional[Move], parent: Optional['Node'], board: BitState):
+        self.move = move
+        self.tiger_moved = board.turn == 'G'
+        self.parent = parent
+        self.children: List['Node'] = []
+        self.untried: Optional[List[Move]] = None  # Filled on first visit
+        self.visits = 0
+        self.wins = 0.0
+        self.key = board.key
+
+
+class MCTSAI:
+    """
+    Monte Carlo Tree Search with UCT selection.
+
+    Each iteration walks down the tree by UCT, adds one node, and plays the
+    game out with the playout policy (game/playout.py). Rollouts stop after
+    'rollout_plies' and are then scored from the static evaluation: fully
+    random playouts are won by the tigers almost every time, which would
+    tell the goats nothing. The game's draw rules end selection and rollouts
+    the way they end minimax lines (see SearchContext.is_draw).
+
+    The subtrees below the move it plays are kept, keyed by the positions the
+    opponent can reply with, so the next search in the same game starts from
+    the statistics already gathered. Searches never share nodes, so one
+    MCTSAI can serve many games at once.
+    """
+
+    def __init__(self, iterations: int = 3000, exploration: float = 1.4,
+                 rollout_plies: int = 30, max_trees: int = 256, seed: Optional[int] = None):
+        self.iterations = iterations
+        self.exploration = exploration
+        self.rollout_plies = rollout_plies
+        self.max_trees = max_trees
+        self.seed = seed
+        # Reusable subtrees by position key, least recently stored first
+        self._trees: "OrderedDict[int, Node]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def new_game(self):
+        with self._lock:
+            self._trees.clear()
+
+    def get_best_move(self, state: GameState, player: str):
+        return self.search(state, player).move
+
+    def search(self, state: GameState, player: str, depth: Optional[int] = None,
+               time_ms: Optional[float] = None, stop=None,
+               iterations: Optional[int] = None) -> SearchResult:
+        """
+        Run 'iterations' iterations (default self.iterations), or as many as
+        fit in 'time_ms' if given. 'stop' (e.g. threading.Event) ends the
+        search early; at least one iteration always runs. 'depth' is accepted for interface compatibility with
+        MinimaxAI and ignored. Score is the Tigers' expected result, -1 to 1.
+        """
+        board = BitState.from_game_state(state)
+        if board.turn != player or board.winner() or not board.generate_moves():
+            return SearchResult(None, 0, 0, 0, [])
+
+        # Statistics cannot beat a move that wins on the spot
+        for move in board.generate_moves():
+            board.make_move(move)
+            won = board.winner() == player
+            board.unmake_move(move)
+            if won:
+                return SearchResult(move_to_dict(move), 1 if player == 'T' else -1, 1, 0,
+                                    [move_to_dict(move)])
+
+        rng = random.Random(self.seed)
+        ctx = SearchContext(ordering=False)
+        ctx.track_draws(state, board)
+        root = self._take_tree(board)
+        if time_ms is not None:
+            deadline = time.perf_counter() + time_ms / 1000.0
+            budget = None
+        else:
+            deadline = None
+            budget = iterations or self.iterations
+
+        done = 0
+        max_depth = 0
+        while budget is None or done < budget:
+            # The first iteration always runs, so there is a move to return
+            if done and not done % TIME_CHECK_ITERATIONS:
+                if stop is not None and stop.is_set():
+                    break
+                if deadline is not None and time.perf_counter() > deadline:
+                    break
+            max_depth = max(max_depth, self._iterate(root, board, rng, ctx))
+            done += 1
+
+        best = max(root.children, key=lambda child: child.visits)
+        value = best.wins / best.visits
+        tiger_value = value if player == 'T' else 1.0 - value
+        pv = self._principal_variation(best)
+        self._keep_trees(best)
+        return SearchResult(move_to_dict(best.move), round(2 * tiger_value - 1, 4),
+                            max_depth, done, [move_to_dict(m) for m in pv])
+
+    # === Tree ===
+
+    def _iterate(self, root: Node, board: BitState, rng: random.Random, ctx: SearchContext) -> int:
+        """One selection/expansion/rollout/backup pass. Returns the depth reached."""
+        node = root
+        path = []
+        # Positions this pass added to ctx.seen
+        added = []
+        # Tigers' result of this playout, 0 to 1
+        result = None
+        while True:
+            if node.untried is None:
+                node.untried = board.generate_moves()
+                rng.shuffle(node.untried)
+            if node.untried or not node.children:
+                break
+            node = self._select(node)
+            board.make_move(node.move)
+            path.append(node.move)
+            result = self._result(board, len(path), ctx, added)
+            if result is not None:
+                break
+
+        if result is None and node.untried:
+            move = node.untried.pop()
+            board.make_move(move)
+            path.append(move)
+            child = Node(move, node, board)
+            node.children.append(child)
+            node = child
+            result = self._result(board, len(path), ctx, added)
+
+        if result is None:
+            result = self._rollout(board.copy(), rng, ctx, len(path), added)
+
+        for move in reversed(path):
+            board.unmake_move(move)
+        if added:
+            ctx.seen.difference_update(added)
+
+        depth = len(path)
+        while node is not None:
+            node.visits += 1
+            node.wins += result if node.tiger_moved else 1.0 - result
+            node = node.parent
+        return depth
+
+    def _select(self, node: Node) -> Node:
+        log_visits = math.log(node.visits)
+        c = self.exploration
+        return max(node.children,
+                   key=lambda ch: ch.wins / ch.visits + c * math.sqrt(log_visits / ch.visits))
+
+    def _result(self, board: BitState, ply: int, ctx: SearchContext, added: list) -> Optional[float]:
+        """
+        The Tigers' result if the game ended on reaching 'board', 'ply' plies
+        from the root, else None (and the position joins the ones seen).
+        """
+        winner = board.winner()
+        if winner:
+            return 1.0 if winner == 'T' else 0.0
+        if ctx.is_draw(board, ply):
+            return 0.5
+        if ctx.seen is not None:
+            ctx.seen.add(board.key)
+            added.append(board.key)
+        return None
+
+    def _rollout(self, board: BitState, rng: random.Random, ctx: SearchContext,
+                 ply: int, added: list) -> float:
+        for _ in range(self.rollout_plies):
+            moves = board.generate_moves()
+            if not moves:
+                return 0.5
+            board.make_move(choose_playout_move(moves, board.turn, rng))
+            ply += 1
+            result = self._result(board, ply, ctx, added)
+            if result is not None:
+                return result
+        return 1.0 / (1.0 + math.exp(-evaluate(board) / ROLLOUT_EVAL_SCALE))
+
+    def _principal_variation(self, node: Node) -> List[Move]:
+        pv = [node.move]
+        while node.children:
+            node = max(node.children, key=lambda child: child.visits)
+            pv.append(node.move)
+        return pv
+
+    # === Tree reuse ===
+
+    def _take_tree(self, board: BitState) -> Node:
+        with self._lock:
+            root = self._trees.pop(board.key, None)
+        if root is None:
+            return Node(None, None, board)
+        return root
+
+    def _keep_trees(self, played: Node):
+        """Keep the subtrees after each reply to the move we are about to play."""
+        with self._lock:
+            for reply in played.children:
+                # Detached, so the rest of this search's tree can be freed
+                reply.parent = None
+                reply.move = None
+                self._trees[reply.key] = reply
+                self._trees.move_to_end(reply.key)
+            while len(self._trees) > self.max_trees:
+                self._trees.popitem(last=False)
@@ -0,0 +1,162 @@
+"""
+Opening book for the goat placement phase.
+
+Every game starts from the same tiger setup, so the early placement tree can
+be searched once, offline, and the best move of each position stored:
+
+    python -m ai.opening_book -o opening_book.bin --plies 3 --depth 5
+
+The file is a header followed by fixed-size records sorted by canonical
+Zobrist key (see game/symmetry.py), so a lookup is a binary search:
+
+    key: u64, move: u32, score: i16, depth: u8, pad: u8
+
+Moves are stored in the canonical orientation and mirrored back on lookup.
+"""
+import argparse
+import os
+import struct
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional
+from game.engine import GameEngine
+from game.bitboard import BitState, Move, move_from_dict
+from game.symmetry import canonical_key, mirror_move
+
+MAGIC = b"BGOB"
+VERSION = 1
+_HEADER = struct.Struct("<4sBxxxI")    # magic, version, record count
+_RECORD = struct.Struct("<QIhBx")
+
+
+class BookEntry(NamedTuple):
+    move: Move   # Oriented to the position that was probed
+    score: int
+    depth: int
+
+
+def pack_move(move: Move) -> int:
+    kind, src, dest, mid = move
+    return kind | (src + 1) << 2 | dest << 7 | (mid + 1) << 12
+
+
+def unpack_move(packed: int) -> Move:
+    return (packed & 3, (packed >> 2 & 31) - 1, packed >> 7 & 31, (packed >> 12 & 31) - 1)
+
+
+class OpeningBook:
+    """
+    Read-only book, loaded from 'path' the first time it is probed.
+    A missing file is an empty book. Safe to share between threads.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._data: Optional[bytes] = None
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def _load(self):
+        with self._lock:
+            if self._data is not None:
+                return
+            try:
+                with open(self.path, "rb") as f:
+                    data = f.read()
+                magic, version, count = _HEADER.unpack_from(data)
+            except (OSError, struct.error):
+                data, magic, version, count = b"", None, None, 0
+            if (magic != MAGIC or version != VERSION
+                    or len(data) != _HEADER.size + count * _RECORD.size):
+                data, count = b"", 0  # Missing or not a book: treat as empty
+            self._count = count
+            self._data = data
+
+    def __len__(self) -> int:
+        if self._data is None:
+            self._load()
+        return self._count
+
+    def probe(self, board: BitState) -> Optional[BookEntry]:
+        """Book entry for 'board', or None if the position is not in the book."""
+        if self._data is None:
+            self._load()
+        key, mirrored = canonical_key(board)
+        data = self._data
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            (found,) = struct.unpack_from("<Q", data, _HEADER.size + mid * _RECORD.size)
+            if found < key:
+                lo = mid + 1
+            elif found > key:
+                hi = mid
+            else:
+                _, packed, score, depth = _RECORD.unpack_from(data, _HEADER.size + mid * _RECORD.size)
+                move = unpack_move(packed)
+                if mirrored:
+                    move = mirror_move(move)
+                if move not in board.generate_moves():
+                    return None  # Key collision
+                return BookEntry(move, score, depth)
+        return None
+
+
+def write_book(path: str, entries: Dict[int, tuple]):
+    """Write {canonical key: (canonical move, score, depth)} to 'path'."""
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, len(entries)))
+        for key in sorted(entries):
+            move, score, depth = entries[key]
+            f.write(_RECORD.pack(key, pack_move(move), int(score), depth))
+    os.replace(tmp, path)
+
+
+def build(plies: int, depth: int, time_ms: Optional[float] = None, log=None) -> Dict[int, tuple]:
+    """
+    Search every position reachable from the start within 'plies' moves,
+    once per mirror pair, and return the book entries for write_book.
+    """
+    from ai.ai_player import MinimaxAI
+    ai = MinimaxAI(depth=depth)
+    entries: Dict[int, tuple] = {}
+    frontier: List[BitState] = [BitState.from_game_state(GameEngine().state)]
+    for ply in range(plies + 1):
+        next_frontier = []
+        for board in frontier:
+            key, mirrored = canonical_key(board)
+            if key in entries or not board.is_phase_one() or board.winner():
+                continue
+            result = ai.search(board.to_game_state(), board.turn, depth=depth, time_ms=time_ms)
+            if result.move is None:
+                continue
+            move = move_from_dict(result.move)
+            entries[key] = (mirror_move(move) if mirrored else move, result.score, result.depth)
+            if ply < plies:
+                for child_move in board.generate_moves():
+                    child = board.copy()
+                    child.make_move(child_move)
+                    next_frontier.append(child)
+        if log is not None:
+            log(f"ply {ply}: {len(entries)} positions")
+        frontier = next_frontier
+    return entries
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the placement-phase opening book.")
+    parser.add_argument("-o", "--output", default="opening_book.bin")
+    parser.add_argument("--plies", type=int, default=3, help="book moves from the start position")
+    parser.add_argument("--depth", type=int, default=5, help="search depth per position")
+    parser.add_argument("--time-ms", type=float, help="time budget per position instead of a fixed depth")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    entries = build(args.plies, args.depth, args.time_ms, log=print)
+    write_book(args.output, entries)
+    print(f"wrote {len(entries)} positions to {args.output} in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+from typing import List, Optional
+from game.bitboard import (
+    BitState, Move, CAPTURE, FULL_MASK, BIT, JUMP_BITS,
+)
+
+# Sort keys, highest searched first
+HASH_MOVE_SCORE = 1 << 30
+CAPTURE_SCORE = 1 << 28
+KILLER_SCORES = (1 << 27, (1 << 27) - 1)
+
+# Killer slots kept per ply
+KILLERS_PER_PLY = 2
+MAX_PLY = 128
+
+# 'from' is -1 for PLACE, so history is indexed by (from + 1, to)
+_HISTORY_SIZE = 24 * 23
+
+
+def _history_index(move: Move) -> int:
+    return (move[1] + 1) * 23 + move[2]
+
+
+def capture_gain(state: BitState, move: Move) -> int:
+    """
+    What a capture is worth to the Tigers: the goat itself, a win outright
+    if it is the fifth capture, plus the follow-up captures it sets up from
+    the landing node.
+    """
+    if state.goats_captured + 1 >= 5:
+        return 10000
+    _, src, dest, mid = move
+    goats = state.goats & ~BIT[mid]
+    empty = FULL_MASK & ~(state.tigers | state.goats) | BIT[src] | BIT[mid]
+    follow_ups = 0
+    for (_, _, mid_bit, land_bit) in JUMP_BITS[dest]:
+        if goats & mid_bit and empty & land_bit:
+            follow_ups += 1
+    return 100 + 10 * follow_ups
+
+
+class MoveOrderer:
+    """
+    Orders moves for alpha-beta: hash move first, then captures by gain,
+    then the killer moves of the current ply, then everything else by
+    history score.
+    """
+
+    def __init__(self):
+        self.killers: List[List[Optional[Move]]] = [
+            [None] * KILLERS_PER_PLY for _ in range(MAX_PLY)
+        ]
+        self.history: List[int] = [0] * _HISTORY_SIZE
+
+    def new_search(self):
+        """Reset killers and age the history table between searches."""
+        for slots in self.killers:
+            for i in range(KILLERS_PER_PLY):
+                slots[i] = None
+        self.history = [score >> 1 for score in self.history]
+
+    def order(self, state: BitState, moves: List[Move], ply: int,
+              hash_move: Optional[Move] = None, quiet_heuristics: bool = True) -> List[Move]:
+        """
+        Sort 'moves' in place and return it.
+        quiet_heuristics=False skips killers and history, leaving quiet moves
+        in generation order.
+        """
+        killers = self.killers[ply] if quiet_heuristics and ply < MAX_PLY else ()
+        history = self.history if quiet_heuristics else None
+
+        def score(move: Move) -> int:
+            if move == hash_move:
+                return HASH_MOVE_SCORE
+            if move[0] == CAPTURE:
+                return CAPTURE_SCORE + capture_gain(state, move)
+            for slot, killer in enumerate(killers):
+                if move == killer:
+                    return KILLER_SCORES[slot]
+            return history[_history_index(move)] if history is not None else 0
+
+        # sort is stable, so ties keep generation order
+        moves.sort(key=score, reverse=True)
+        return moves
+
+    def record_cutoff(self, move: Move, ply: int, depth: int):
+        """A quiet move caused a beta cutoff: remember it as a killer and in history."""
+        if move[0] == CAPTURE:
+            return
+        if ply < MAX_PLY:
+            slots = self.killers[ply]
+            if slots[0] != move:
+                slots[1] = slots[0]
+                slots[0] = move
+        self.history[_history_index(move)] += depth * depth
@@ -0,0 +1,174 @@
+import math
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from typing import Dict, List, Optional, Tuple
+from game.bitboard import BitState, Move
+
+# Root searches shallower than this are not worth the inter-process overhead
+PARALLEL_MIN_DEPTH = 3
+# How often the parent checks its stop flag while waiting on workers
+STOP_POLL_SECONDS = 0.05
+
+# Compact state sent to workers: (tigers, goats, turn, goats_on_board, goats_captured)
+PackedState = Tuple[int, int, str, int, int]
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_workers = 0
+
+# Worker-side AIs, one per configuration, kept for the life of the process so
+# their transposition tables stay warm between requests.
+_worker_ais: Dict[tuple, object] = {}
+
+
+def pack_state(state: BitState) -> PackedState:
+    return (state.tigers, state.goats, state.turn,
+            state.goats_on_board, state.goats_captured)
+
+
+def unpack_state(packed: PackedState) -> BitState:
+    return BitState(*packed)
+
+
+def get_pool(workers: int) -> ProcessPoolExecutor:
+    """Return the shared process pool, (re)creating it with 'workers' processes."""
+    global _pool, _pool_workers
+    if _pool is None or _pool_workers != workers:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = ProcessPoolExecutor(max_workers=workers)
+        _pool_workers = workers
+    return _pool
+
+
+def shutdown_pool():
+    global _pool, _pool_workers
+    if _pool is not None:
+        _pool.shutdown(wait=True, cancel_futures=True)
+    _pool = None
+    _pool_workers = 0
+
+
+def _worker_ai(config: tuple):
+    ai = _worker_ais.get(config)
+    if ai is None:
+        from ai.ai_player import MinimaxAI
+        ai = MinimaxAI(**dict(config))
+        _worker_ais[config] = ai
+    return ai
+
+
+def _search_root_move(config: tuple, packed: PackedState, move: Move, depth: int,
+                      alpha: float, beta: float, is_maximizing: bool,
+                      time_left: Optional[float], draws: tuple):
+    """
+    Worker task: value of one root move searched to 'depth' within (alpha, beta).
+    Returns (value, counts, drawn), value None if the time budget ran out;
+    'counts' are the search's SearchContext.counts() and 'drawn' its
+    SearchContext.drawn.
+    """
+    from ai.ai_player import SearchContext, _SearchTimeout
+    ai = _worker_ai(config)
+    board = unpack_state(packed)
+    board.make_move(move)
+    deadline = time.perf_counter() + time_left if time_left is not None else None
+    ctx = SearchContext(ai.ordering, deadline)
+    ctx.set_draw_state(draws)
+    try:
+        value = ai.minimax(board, depth - 1, alpha, beta, not is_maximizing, 1, ctx)
+    except _SearchTimeout:
+        value = None
+    return value, ctx.counts(), ctx.drawn
+
+
+def parallel_search_root(ai, ctx, board: BitState, moves: List[Move], depth: int,
+                         is_maximizing: bool):
+    """
+    Split the root moves of 'board' across the process pool.
+
+    The first move is searched locally with a full window to get a bound.
+    The remaining moves go to the workers, a few at a time, each with the
+    best bound known when it is submitted. A move that beats its bound has an
+    exact value. A move that only ties the final best value behind a tighter
+    bound is re-searched, so the chosen move is the first best move in root
+    order, exactly as in the serial search.
+    """
+    from ai.ai_player import _SearchTimeout
+
+    better = (lambda a, b: a > b) if is_maximizing else (lambda a, b: a < b)
+
+    first = moves[0]
+    board.make_move(first)
+    first_val = ai.minimax(board, depth - 1, -math.inf, math.inf, not is_maximizing, 1, ctx)
+    board.unmake_move(first)
+
+    best_val = first_val
+    packed = pack_state(board)
+    config = ai.worker_config()
+    draws = ctx.draw_state()
+    pool = get_pool(ai.parallel)
+
+    # index -> (value, bound it was searched against)
+    results: Dict[int, Tuple[float, float]] = {0: (first_val, first_val)}
+    pending = {}
+    next_index = 1
+
+    def time_left():
+        if ctx.deadline is None:
+            return None
+        return max(0.0, ctx.deadline - time.perf_counter())
+
+    def submit(index):
+        if is_maximizing:
+            window = (best_val, math.inf)
+        else:
+            window = (-math.inf, best_val)
+        future = pool.submit(_search_root_move, config, packed, moves[index], depth,
+                             window[0], window[1], is_maximizing, time_left(), draws)
+        pending[future] = (index, best_val)
+
+    try:
+        while next_index < len(moves) and len(pending) < ai.parallel * 2:
+            submit(next_index)
+            next_index += 1
+
+        while pending:
+            done, _ = wait(pending, timeout=STOP_POLL_SECONDS, return_when=FIRST_COMPLETED)
+            if ctx.stop is not None and ctx.stop.is_set():
+                raise _SearchTimeout()
+            for future in done:
+                index, bound = pending.pop(future)
+                value, counts, drawn = future.result()
+                ctx.add_counts(counts)
+                ctx.drawn = ctx.drawn or drawn
+                if value is None:
+                    raise _SearchTimeout()
+                results[index] = (value, bound)
+                if better(value, best_val):
+                    best_val = value
+            while next_index < len(moves) and len(pending) < ai.parallel * 2:
+                submit(next_index)
+                next_index += 1
+    finally:
+        for future in pending:
+            future.cancel()
+
+    # Serial search keeps the first move (in root order) that reaches best_val.
+    best_index = None
+    for index in range(len(moves)):
+        value, bound = results[index]
+        if value == best_val and (index == 0 or better(value, bound)):
+            best_index = index
+            break
+        if index > 0 and value == bound == best_val:
+            # Failed against a bound equal to the best value: the true value
+            # may tie it. Re-search against the first move's value to decide.
+            board.make_move(moves[index])
+            if is_maximizing:
+                exact = ai.minimax(board, depth - 1, first_val, math.inf, False, 1, ctx)
+            else:
+                exact = ai.minimax(board, depth - 1, -math.inf, first_val, True, 1, ctx)
+            board.unmake_move(moves[index])
+            if exact == best_val:
+                best_index = index
+                break
+    return best_val, moves[best_index]
@@ -0,0 +1,126 @@
+"""
+Batched self-play with evaluation-driven policies, for tuning the
+evaluation weights and checking balance changes (see game/batch.py).
+
+    python -m ai.selfplay --games 10000 --tigers greedy --goats capture
+
+evaluate_batch scores N positions exactly like evaluation.evaluate, and the
+greedy policy plays the move whose successor scores best for the side to
+move, so two weight sets can be compared over thousands of games at once.
+Needs NumPy.
+"""
+import argparse
+import json
+import time
+from typing import Dict, Optional, Sequence
+import numpy as np
+from game.bitboard import MAX_GOATS, NODE_COUNT
+from game.batch import (
+    BatchGames, apply_actions, random_policy, capture_policy,
+    ADJACENCY, EDGES, JUMP_SRC, JUMP_MID, JUMP_DEST, WIN_CAPTURES, TIGER_START,
+)
+from ai.evaluation import PHASE_WEIGHTS, Weights
+from ai.ai_player import WIN_SCORE
+
+# JUMP_*_NODES[j, n] = 1 if jump j starts from / jumps over node n.
+# Counts go through float32 matrix products: NumPy has no BLAS for integers.
+_ADJACENCY = ADJACENCY.astype(np.float32)
+JUMP_SRC_NODES = np.eye(NODE_COUNT, dtype=np.float32)[JUMP_SRC]
+JUMP_MID_NODES = np.eye(NODE_COUNT, dtype=np.float32)[JUMP_MID]
+
+
+def features_batch(tigers: np.ndarray, goats: np.ndarray,
+                   captured: np.ndarray) -> Dict[str, np.ndarray]:
+    """evaluation.features for N positions at once, one array per feature."""
+    empty = ~(tigers | goats)
+    open_steps = empty.astype(np.float32) @ _ADJACENCY   # Empty neighbours of each node
+    jumps = (tigers[:, JUMP_SRC] & goats[:, JUMP_MID] & empty[:, JUMP_DEST]).astype(np.float32)
+    can_jump = jumps @ JUMP_SRC_NODES
+    return {
+        'captured': captured.astype(np.int32),
+        'mobility': (open_steps * tigers).sum(axis=1).astype(np.int32),
+        'threats': (jumps @ JUMP_MID_NODES > 0).sum(axis=1),
+        'trapped': (tigers & (open_steps == 0) & (can_jump == 0)).sum(axis=1),
+        'links': (goats[:, EDGES[:, 0]] & goats[:, EDGES[:, 1]]).sum(axis=1),
+    }
+
+
+def _weighted(f: Dict[str, np.ndarray], placed: np.ndarray,
+              phase_weights: Sequence[Weights]) -> np.ndarray:
+    weights = np.array(phase_weights, dtype=np.int64)[(placed >= MAX_GOATS).astype(np.intp)]
+    return sum(weights[:, i] * f[name] for i, name in enumerate(Weights._fields))
+
+
+def evaluate_batch(tigers: np.ndarray, goats: np.ndarray, placed: np.ndarray,
+                   captured: np.ndarray, phase_weights: Sequence[Weights] = PHASE_WEIGHTS) -> np.ndarray:
+    """evaluation.evaluate for N positions at once."""
+    return _weighted(features_batch(tigers, goats, captured), placed, phase_weights)
+
+
+def make_greedy_policy(phase_weights: Sequence[Weights] = PHASE_WEIGHTS, epsilon: float = 0.05):
+    """
+    One-ply greedy policy on the static evaluation: play the move whose
+    successor scores best for the side to move, winning moves first, ties
+    broken at random. With probability 'epsilon' a game plays a random move
+    instead, so a batch does not play one game N times.
+    """
+    def policy(games, rows, legal, rng):
+        pair_rows, pair_actions = np.nonzero(legal)
+        index = rows[pair_rows]
+        tigers, goats = games.tigers[index], games.goats[index]
+        tiger_turn, placed, captured = games.tiger_turn[index], games.placed[index], games.captured[index]
+        sign = np.where(tiger_turn, 1, -1)
+        goat_moved = ~tiger_turn
+        apply_actions(tigers, goats, tiger_turn, placed, captured, pair_actions)
+
+        f = features_batch(tigers, goats, captured)
+        value = _weighted(f, placed, phase_weights)
+        value = np.where(captured >= WIN_CAPTURES, WIN_SCORE, value)
+        value = np.where(goat_moved & (f['trapped'] == len(TIGER_START)), -WIN_SCORE, value)
+
+        scores = np.full(legal.shape, -np.inf)
+        scores[pair_rows, pair_actions] = sign * value + rng.random(len(value)) * 0.5
+        actions = scores.argmax(axis=1)
+        explore = rng.random(len(rows)) < epsilon
+        if explore.any():
+            actions[explore] = random_policy(games, rows[explore], legal[explore], rng)
+        return actions
+
+    return policy
+
+
+def run(games: int, tiger_policy: str, goat_policy: str, max_plies: int = 200,
+        epsilon: float = 0.05, seed: Optional[int] = None) -> dict:
+    """Play 'games' games between two named policies and summarize them."""
+    policies = {
+        "random": random_policy,
+        "capture": capture_policy,
+        "greedy": make_greedy_policy(epsilon=epsilon),
+    }
+    start = time.perf_counter()
+    result = BatchGames(games, max_plies).play(policies[tiger_policy], policies[goat_policy], seed)
+    elapsed = time.perf_counter() - start
+    return {
+        "tigers": tiger_policy,
+        "goats": goat_policy,
+        **result.summary(),
+        "seconds": round(elapsed, 3),
+        "games_per_second": round(games / elapsed, 1),
+    }
+
+
+def main(argv=None):
+    choices = ["random", "capture", "greedy"]
+    parser = argparse.ArgumentParser(description="Batched self-play statistics.")
+    parser.add_argument("--games", type=int, default=10000)
+    parser.add_argument("--tigers", choices=choices, default="capture")
+    parser.add_argument("--goats", choices=choices, default="greedy")
+    parser.add_argument("--max-plies", type=int, default=200)
+    parser.add_argument("--epsilon", type=float, default=0.05, help="random move rate of greedy players")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args(argv)
+    print(json.dumps(run(args.games, args.tigers, args.goats, args.max_plies, args.epsilon, args.seed), indent=2))
+
+
+if __name__ == "__main__":
+    main()
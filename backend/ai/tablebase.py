@@ -0,0 +1,496 @@
+"""
+Endgame tablebase for the movement phase.
+
+Once every goat is placed the game is a finite graph game: 3 tigers, some
+goats and the number of captures so far. For a given goat count and capture
+count, every position (tiger nodes, goat nodes, side to move) gets one byte:
+
+    0      no forced result (neither side can force a win, or not within
+           MAX_DISTANCE plies)
+    n + 1  the game ends in n plies with best play; the side to move wins
+           if n is odd and loses if n is even
+
+Tables are solved by retrograde analysis: start from the lost positions
+(tigers to move and blocked) and from the results of capture moves, which
+lead into the table with one goat fewer and one capture more, then walk
+predecessors outwards in order of distance.
+
+Generating a table (and the smaller tables its captures lead into):
+
+    python -m ai.tablebase --dir tablebase --max-goats 11 --workers 4
+
+Positions are stored in their canonical mirror orientation (see
+game/symmetry.py) and ranked as combinations (colex order), so a table holds
+891 * C(20,goats) * 2 entries: 891 of the C(23,3) = 1771 tiger placements
+are canonical. Solving one keeps SOLVE_BYTES_PER_ENTRY (3) bytes per entry
+in memory. Real games have goats on the board + captured = 15, and their
+captures all lead down to the 11-goat table, the largest: about 860 MB to
+solve (80 MB for 15 goats). Without --max-goats, main() builds as far as
+fits in --memory (half the machine's RAM by default). The generator is pure
+Python, so these tables take hours; the file format and lookup are the same
+for any table size.
+"""
+import argparse
+import mmap
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations
+from typing import Dict, List, Optional, Tuple
+from game.bitboard import (
+    BitState, BIT, FULL_MASK, MAX_GOATS, NEIGHBOR_MASKS, NODE_COUNT, CAPTURE, Move, iter_bits,
+)
+from game.symmetry import canonical_masks, mirror_mask
+
+TIGER_COUNT = 3
+# Tigers win on the fifth capture, so tables only exist below that
+WIN_CAPTURES = 5
+# Largest distance that fits in one byte
+MAX_DISTANCE = 254
+
+HEADER_SIZE = 8
+MAGIC = b"BGTB"
+VERSION = 2
+
+# BINOM[n][k] = n choose k
+BINOM = [[0] * (NODE_COUNT + 1) for _ in range(NODE_COUNT + 1)]
+for _n in range(NODE_COUNT + 1):
+    BINOM[_n][0] = 1
+    for _k in range(1, _n + 1):
+        BINOM[_n][_k] = BINOM[_n - 1][_k - 1] + BINOM[_n - 1][_k]
+
+_FREE_NODES = NODE_COUNT - TIGER_COUNT
+
+
+def _tiger_rank(a: int, b: int, c: int) -> int:
+    return BINOM[a][1] + BINOM[b][2] + BINOM[c][3]
+
+
+# Canonical tiger placements (not larger than their mirror image) by colex
+# rank, and the slot each one gets in a table; -1 for the others.
+CANONICAL_TIGERS: Dict[int, Tuple[int, int, int]] = {}
+_TIGER_SLOTS = [-1] * BINOM[NODE_COUNT][TIGER_COUNT]
+for _combo in combinations(range(NODE_COUNT), TIGER_COUNT):
+    _mask = BIT[_combo[0]] | BIT[_combo[1]] | BIT[_combo[2]]
+    if mirror_mask(_mask) >= _mask:
+        CANONICAL_TIGERS[_tiger_rank(*_combo)] = _combo
+for _slot, _rank in enumerate(sorted(CANONICAL_TIGERS)):
+    _TIGER_SLOTS[_rank] = _slot
+# The same slots by tiger mask
+_SLOT_BY_TIGERS = {BIT[a] | BIT[b] | BIT[c]: _TIGER_SLOTS[rank]
+                   for rank, (a, b, c) in CANONICAL_TIGERS.items()}
+
+
+def table_name(goats: int, captured: int) -> str:
+    return f"tb_g{goats}_c{captured}.bin"
+
+
+def table_size(goats: int) -> int:
+    """Entries in the table for 'goats' goats on the board."""
+    return len(CANONICAL_TIGERS) * BINOM[_FREE_NODES][goats] * 2
+
+
+def position_index(tigers: int, goats: int, turn: str, goat_count: int) -> int:
+    """
+    Index of a position in its table, after mirroring it to its canonical
+    orientation. Goat nodes are numbered among the non-tiger nodes.
+    """
+    tigers, goats, _ = canonical_masks(tigers, goats)
+    goat_rank = 0
+    i = 1
+    mask = goats
+    while mask:
+        low = mask & -mask
+        node = low.bit_length() - 1
+        goat_rank += BINOM[node - bin(tigers & (low - 1)).count('1')][i]
+        i += 1
+        mask ^= low
+    return ((_SLOT_BY_TIGERS[tigers] * BINOM[_FREE_NODES][goat_count] + goat_rank) << 1) | (turn == 'T')
+
+
+def decode(value: int, turn: str) -> Tuple[Optional[str], int]:
+    """(winner, plies to the end) for a table byte; (None, 0) if there is no forced result."""
+    if value == 0:
+        return None, 0
+    plies = value - 1
+    other = 'G' if turn == 'T' else 'T'
+    return (turn if plies % 2 else other), plies
+
+
+def _covered(board: BitState) -> bool:
+    return board.goats_on_board >= MAX_GOATS and board.goats_captured < WIN_CAPTURES
+
+
+# === Lookup ===
+
+class Tablebase:
+    """
+    Read-only access to the tables in 'directory', memory-mapped on first use.
+    Missing tables are simply not covered. Safe to share between threads.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._tables: Dict[Tuple[int, int], Optional[mmap.mmap]] = {}
+        self._lock = threading.Lock()
+
+    def _table(self, goats: int, captured: int) -> Optional[mmap.mmap]:
+        key = (goats, captured)
+        try:
+            return self._tables[key]
+        except KeyError:
+            pass
+        with self._lock:
+            if key not in self._tables:
+                self._tables[key] = self._open(goats, captured)
+            return self._tables[key]
+
+    def _open(self, goats: int, captured: int) -> Optional[mmap.mmap]:
+        path = os.path.join(self.directory, table_name(goats, captured))
+        try:
+            with open(path, "rb") as f:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+        header = bytes(data[:HEADER_SIZE])
+        if (len(data) != HEADER_SIZE + table_size(goats) or header[:4] != MAGIC
+                or tuple(header[4:7]) != (VERSION, goats, captured)):
+            data.close()
+            return None
+        return data
+
+    def close(self):
+        with self._lock:
+            for data in self._tables.values():
+                if data is not None:
+                    data.close()
+            self._tables.clear()
+
+    def probe_value(self, board: BitState) -> Optional[int]:
+        """Raw table byte for 'board', or None if no table covers it."""
+        if not _covered(board):
+            return None
+        goat_count = bin(board.goats).count('1')
+        table = self._table(goat_count, board.goats_captured)
+        if table is None:
+            return None
+        return table[HEADER_SIZE + position_index(board.tigers, board.goats, board.turn, goat_count)]
+
+    def probe(self, board: BitState) -> Optional[Tuple[Optional[str], int]]:
+        """(winner, plies) for 'board', winner None for no forced result; None if not covered."""
+        value = self.probe_value(board)
+        if value is None:
+            return None
+        return decode(value, board.turn)
+
+    def _child_result(self, board: BitState) -> Optional[Tuple[Optional[str], int]]:
+        winner = board.winner()
+        if winner is not None:
+            return winner, 0
+        return self.probe(board)
+
+    def best_move(self, board: BitState) -> Optional[Tuple[Move, Optional[str], int]]:
+        """
+        Perfect move for the side to move: the fastest win, else a move that
+        keeps the game open, else the slowest loss. Returns (move, winner, plies),
+        plies 0 if there is no forced result, or None if the position or one of
+        its successors is not covered.
+        """
+        if self.probe(board) is None:
+            return None
+        me = board.turn
+        best = None
+        best_rank = None
+        for move in board.generate_moves():
+            board.make_move(move)
+            result = self._child_result(board)
+            board.unmake_move(move)
+            if result is None:
+                return None
+            winner, plies = result
+            # Lower rank is better for the mover
+            if winner == me:
+                rank = (0, plies)
+            elif winner is None:
+                rank = (1, 0)
+            else:
+                rank = (2, -plies)
+            if best_rank is None or rank < best_rank:
+                best, best_rank = (move, winner, plies + 1 if winner else 0), rank
+        return best
+
+
+# === Generation ===
+
+# Memory solve() needs per table entry: the result, the number of successors
+# not yet known to be won by the opponent, and the slowest loss by a capture
+SOLVE_BYTES_PER_ENTRY = 3
+
+# Tiger placement, and the nodes left for goats, of each table slot
+_SLOT_TIGERS = [CANONICAL_TIGERS[rank] for rank in sorted(CANONICAL_TIGERS)]
+_SLOT_FREE = [[n for n in range(NODE_COUNT) if n not in combo] for combo in _SLOT_TIGERS]
+
+
+def solve_memory(goats: int) -> int:
+    """Bytes solve() needs for the table with 'goats' goats on the board."""
+    return SOLVE_BYTES_PER_ENTRY * table_size(goats)
+
+
+def _entry(plies: int) -> int:
+    """
+    Table byte of a result 'plies' plies away. Past MAX_DISTANCE, 0: the
+    result is left undecided, so neither it nor the positions that only
+    reach it claim a forced result.
+    """
+    return plies + 1 if plies <= MAX_DISTANCE else 0
+
+
+def _position(index: int, goat_count: int) -> Tuple[int, int, str]:
+    """(tigers, goats, turn) of the canonical position at 'index'; the inverse of position_index."""
+    slot, goat_rank = divmod(index >> 1, BINOM[_FREE_NODES][goat_count])
+    a, b, c = _SLOT_TIGERS[slot]
+    free = _SLOT_FREE[slot]
+    goats = 0
+    node = _FREE_NODES
+    for i in range(goat_count, 0, -1):
+        node -= 1
+        while BINOM[node][i] > goat_rank:
+            node -= 1
+        goat_rank -= BINOM[node][i]
+        goats |= BIT[free[node]]
+    return BIT[a] | BIT[b] | BIT[c], goats, 'T' if index & 1 else 'G'
+
+
+def _parents(index: int, goat_count: int) -> set:
+    """
+    Indexes of the positions with a move (not a capture) to the one at
+    'index', found by taking back each move the last side could have made.
+    """
+    tigers, goats, turn = _position(index, goat_count)
+    empty = FULL_MASK & ~(tigers | goats)
+    parents = set()
+    if turn == 'T':  # The goats moved last
+        for node in iter_bits(goats):
+            for origin in iter_bits(NEIGHBOR_MASKS[node] & empty):
+                parents.add(position_index(tigers, goats ^ BIT[node] ^ BIT[origin], 'G', goat_count))
+    else:
+        for node in iter_bits(tigers):
+            for origin in iter_bits(NEIGHBOR_MASKS[node] & empty):
+                parents.add(position_index(tigers ^ BIT[node] ^ BIT[origin], goats, 'T', goat_count))
+    return parents
+
+
+def _initialise(goats: int, captured: int, first_slot: int, last_slot: int, directory: str):
+    """
+    Starting state of the entries of tiger slots first_slot..last_slot - 1,
+    a contiguous run of the table. Returns (values, remaining, slowest
+    capture loss, largest value) where 'values' already holds the lost
+    positions and the wins through a capture; a win through a quiet move
+    may still turn out faster.
+    """
+    lower = Tablebase(directory) if goats > 0 and captured + 1 < WIN_CAPTURES else None
+    block = BINOM[_FREE_NODES][goats] * 2
+    start = first_slot * block
+    size = (last_slot - first_slot) * block
+    values, remaining, capture_loss = bytearray(size), bytearray(size), bytearray(size)
+    for slot in range(first_slot, last_slot):
+        combo = _SLOT_TIGERS[slot]
+        tigers = BIT[combo[0]] | BIT[combo[1]] | BIT[combo[2]]
+        symmetric = mirror_mask(tigers) == tigers
+        free = _SLOT_FREE[slot]
+        for goat_combo in combinations(range(_FREE_NODES), goats):
+            goat_mask = 0
+            for j in goat_combo:
+                goat_mask |= BIT[free[j]]
+            if symmetric and canonical_masks(tigers, goat_mask)[2]:
+                continue  # Stored as its mirror image
+            for turn in ('G', 'T'):
+                board = BitState(tigers, goat_mask, turn, MAX_GOATS, captured)
+                i = position_index(tigers, goat_mask, turn, goats) - start
+                moves = board.generate_moves()
+                # Distinct successors in this table: _parents finds each once
+                inside = set()
+                count = 0
+                win = 0
+                for move in moves:
+                    if move[0] != CAPTURE:
+                        step = BIT[move[1]] | BIT[move[2]]
+                        if turn == 'G':
+                            inside.add(position_index(tigers, goat_mask ^ step, 'T', goats))
+                        else:
+                            inside.add(position_index(tigers ^ step, goat_mask, 'G', goats))
+                        continue
+                    if captured + 1 >= WIN_CAPTURES:
+                        win = _entry(1)  # The fifth capture
+                        continue
+                    board.make_move(move)
+                    value = lower.probe_value(board) if lower is not None else None
+                    board.unmake_move(move)
+                    if value is None:
+                        raise FileNotFoundError(table_name(goats - 1, captured + 1) + " is missing")
+                    if value == 0:
+                        count += 1  # Never decided: this position cannot be lost
+                    elif (value - 1) % 2 == 0:
+                        entry = _entry(value)  # Capture into a lost position
+                        if entry and (not win or entry < win):
+                            win = entry
+                    else:
+                        capture_loss[i] = max(capture_loss[i], value)
+                count += len(inside)
+                remaining[i] = count
+                if win:
+                    values[i] = win
+                elif count == 0:
+                    if moves:
+                        values[i] = _entry(capture_loss[i])  # Every move loses
+                    elif turn == 'T':
+                        values[i] = _entry(0)  # Tigers to move and blocked
+                    # Goats with no move: no forced result
+    if lower is not None:
+        lower.close()
+    return values, remaining, capture_loss, max(values, default=0)
+
+
+def solve(goats: int, captured: int, directory: str, workers: int = 0) -> bytearray:
+    """
+    Solve one table by retrograde analysis. Its capture table must already be
+    in 'directory'. workers > 0 sets up the positions on that many processes.
+
+    Memory stays at SOLVE_BYTES_PER_ENTRY bytes per entry (plus the chunks
+    workers hand back): predecessors are found by taking moves back, and the
+    positions decided in n plies are the entries holding n + 1.
+    """
+    if workers > 0:
+        size = table_size(goats)
+        block = size // len(_SLOT_TIGERS)
+        values, remaining, capture_loss = bytearray(size), bytearray(size), bytearray(size)
+        highest = 0
+        parts = workers * 4
+        bounds = [len(_SLOT_TIGERS) * k // parts for k in range(parts + 1)]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            chunks = pool.map(_initialise, [goats] * parts, [captured] * parts, bounds[:-1], bounds[1:],
+                              [directory] * parts)
+            for first_slot, (part_values, part_remaining, part_loss, part_highest) in zip(bounds, chunks):
+                start = first_slot * block
+                end = start + len(part_values)
+                values[start:end] = part_values
+                remaining[start:end] = part_remaining
+                capture_loss[start:end] = part_loss
+                highest = max(highest, part_highest)
+    else:
+        values, remaining, capture_loss, highest = _initialise(goats, captured, 0, len(_SLOT_TIGERS), directory)
+
+    n = 0
+    while n < highest:
+        level = bytes((n + 1,))
+        index = values.find(level)
+        while index >= 0:
+            if n % 2 == 0:
+                # Lost for the side to move: every parent wins in n + 1
+                win = _entry(n + 1)
+                if win:
+                    for parent in _parents(index, goats):
+                        if not values[parent] or values[parent] > win:
+                            values[parent] = win
+                    highest = max(highest, win)
+            else:
+                # Won: a parent is lost once every move leads to such a win
+                for parent in _parents(index, goats):
+                    if values[parent]:
+                        continue
+                    remaining[parent] -= 1
+                    if remaining[parent] == 0:
+                        values[parent] = _entry(max(capture_loss[parent], n + 1))
+                        highest = max(highest, values[parent])
+            index = values.find(level, index + 1)
+        n += 1
+    return values
+
+
+def write_table(directory: str, goats: int, captured: int, values: bytearray):
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, table_name(goats, captured))
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(MAGIC + bytes((VERSION, goats, captured, 0)))
+        f.write(values)
+    os.replace(tmp, path)
+
+
+def generate(directory: str, goats: int, captured: int, workers: int = 0,
+             force: bool = False) -> List[str]:
+    """
+    Build the table for (goats, captured) and every smaller table its
+    captures lead into. Tables already on disk are kept unless 'force'.
+    Returns the names of the tables written.
+    """
+    chain = []
+    g, c = goats, captured
+    while c < WIN_CAPTURES and g >= 0:
+        chain.append((g, c))
+        g, c = g - 1, c + 1
+    written = []
+    for g, c in reversed(chain):
+        path = os.path.join(directory, table_name(g, c))
+        if os.path.exists(path) and not force:
+            continue
+        write_table(directory, g, c, solve(g, c, directory, workers))
+        written.append(table_name(g, c))
+    return written
+
+
+def physical_memory() -> Optional[int]:
+    """Bytes of RAM in this machine, or None if the platform does not say."""
+    try:
+        return os.sysconf("SC_PHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (AttributeError, OSError, ValueError):
+        return None
+
+
+def default_max_goats(memory: int) -> int:
+    """
+    Most goats --max-goats can cover with every table solved in 'memory'
+    bytes. Each real-game table needs the ones below it, down to the
+    largest (11 goats), so this is MAX_GOATS or nothing fits (returns 10).
+    """
+    first = MAX_GOATS - WIN_CAPTURES + 1
+    max_goats = first - 1
+    for goats in range(first, MAX_GOATS + 1):
+        if solve_memory(goats) > memory:
+            break
+        max_goats = goats
+    return max_goats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate movement-phase endgame tables.")
+    parser.add_argument("--dir", default="tablebase", help="output directory")
+    parser.add_argument("--max-goats", type=int,
+                        help="cover real games down to this many goats left (11-15); "
+                             "default: as many as fit in --memory")
+    parser.add_argument("--memory", type=int, help="MB to solve in (default: half the RAM)")
+    parser.add_argument("--goats", type=int, help="build one table: goats on the board")
+    parser.add_argument("--captured", type=int, help="build one table: goats captured")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--force", action="store_true", help="rebuild existing tables")
+    args = parser.parse_args(argv)
+
+    if args.goats is not None:
+        targets = [(args.goats, args.captured or 0)]
+    else:
+        max_goats = args.max_goats
+        if max_goats is None:
+            memory = args.memory * 2 ** 20 if args.memory else (physical_memory() or 0) // 2
+            max_goats = default_max_goats(memory)
+            if max_goats < MAX_GOATS - WIN_CAPTURES + 1:
+                parser.error(f"the 11-goat table needs {solve_memory(max_goats + 1) // 2 ** 20} MB "
+                             f"to solve, more than {memory // 2 ** 20} MB; pass --memory")
+        # In a real game goats on the board + captured = 15
+        targets = [(g, MAX_GOATS - g) for g in range(MAX_GOATS - WIN_CAPTURES + 1, max_goats + 1)]
+    for goats, captured in targets:
+        for name in generate(args.dir, goats, captured, args.workers, args.force):
+            print(f"wrote {name}")
+
+
+if __name__ == "__main__":
+    main()
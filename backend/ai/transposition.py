@@ -0,0 +1,47 @@
+from typing import List, Optional, Tuple
+
+# Bound types for stored values
+EXACT, LOWER, UPPER = 0, 1, 2
+
+# Entry layout: (key, depth, flag, value, best_move, generation)
+Entry = Tuple[int, int, int, float, Optional[tuple], int]
+
+
+class TranspositionTable:
+    """
+    Fixed-size hash table of search results keyed by Zobrist hash.
+
+    Memory is bounded by the slot count chosen at construction: each key maps
+    to one slot, and a new result replaces the old one when the old one is
+    empty, comes from an earlier search (generation), or was searched to a
+    shallower or equal depth.
+    """
+
+    def __init__(self, size_bits: int = 16):
+        self.size = 1 << size_bits
+        self.mask = self.size - 1
+        self.table: List[Optional[Entry]] = [None] * self.size
+        self.generation = 0
+
+    def new_search(self):
+        """Mark the start of a new search so older entries become replaceable."""
+        self.generation = (self.generation + 1) & 0xFFFF
+
+    def clear(self):
+        self.table = [None] * self.size
+        self.generation = 0
+
+    def probe(self, key: int) -> Optional[Entry]:
+        entry = self.table[key & self.mask]
+        if entry is not None and entry[0] == key:
+            return entry
+        return None
+
+    def store(self, key: int, depth: int, flag: int, value: float, best_move: Optional[tuple]):
+        index = key & self.mask
+        old = self.table[index]
+        if old is None or old[5] != self.generation or depth >= old[1]:
+            self.table[index] = (key, depth, flag, value, best_move, self.generation)
+
+    def __len__(self) -> int:
+        return sum(1 for entry in self.table if entry is not None)
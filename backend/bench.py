@@ -0,0 +1,224 @@
+"""
+Benchmarks for move generation and search.
+
+    python bench.py                      # run everything, print JSON
+    python bench.py -o before.json       # save results
+    python bench.py --compare before.json
+
+Perft counts every leaf of the legal move tree to a fixed depth through
+GameEngine.get_valid_moves/apply_move, and checks the count against the
+bitboard move generator. The search benchmark runs MinimaxAI at a fixed
+depth on curated placement- and movement-phase positions and reports nodes,
+nodes per second, time and peak memory. --compare prints the speed ratio
+against a saved run and fails if a perft count changed.
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Dict, List, Optional
+from game.engine import GameEngine, GameState
+from game.bitboard import BitState
+from ai.ai_player import MinimaxAI
+
+# name -> (tigers, goats, turn, goats_placed, goats_captured)
+POSITIONS: Dict[str, tuple] = {
+    "start": ([0, 3, 4], [], 'G', 0, 0),
+    "placement-early": ([0, 4, 20], [2, 15, 19], 'G', 4, 1),
+    "placement-late": ([2, 11, 21], [1, 3, 5, 6, 7, 9, 16, 18, 22], 'T', 11, 2),
+    "movement-open": ([5, 7, 8], [2, 3, 6, 10, 11, 13, 14, 15, 16, 18, 19, 20, 22], 'G', 15, 2),
+    "movement-crowded": ([8, 9, 15], [1, 2, 3, 4, 5, 6, 7, 12, 13, 17, 18, 19, 21, 22], 'G', 15, 1),
+}
+
+# (position, depth) pairs for perft
+PERFT_CASES = [
+    ("start", 5),
+    ("placement-early", 5),
+    ("placement-late", 5),
+    ("movement-open", 6),
+    ("movement-crowded", 6),
+]
+
+# (position, depth) pairs for fixed-depth search
+SEARCH_CASES = [
+    ("start", 6),
+    ("placement-early", 6),
+    ("placement-late", 6),
+    ("movement-open", 7),
+    ("movement-crowded", 7),
+]
+
+
+def make_state(name: str) -> GameState:
+    tigers, goats, turn, placed, captured = POSITIONS[name]
+    state = GameState()
+    for node in tigers:
+        state.board_map[node] = 'T'
+    for node in goats:
+        state.board_map[node] = 'G'
+    state.turn = turn
+    state.goats_on_board = placed
+    state.goats_captured = captured
+    return state
+
+
+def perft(engine: GameEngine, depth: int) -> int:
+    """Leaf count of the legal move tree, via the GameEngine API."""
+    if depth == 0:
+        return 1
+    if engine.check_winner():
+        return 0
+    moves = engine.get_valid_moves()
+    if depth == 1:
+        return len(moves)
+    state = engine.state
+    total = 0
+    for move in moves:
+        engine.state = state.clone()
+        engine.apply_move(move)
+        total += perft(engine, depth - 1)
+    engine.state = state
+    return total
+
+
+def perft_bits(board: BitState, depth: int) -> int:
+    """Same count through the bitboard make/unmake path."""
+    if depth == 0:
+        return 1
+    if board.winner():
+        return 0
+    moves = board.generate_moves()
+    if depth == 1:
+        return len(moves)
+    total = 0
+    for move in moves:
+        board.make_move(move)
+        total += perft_bits(board, depth - 1)
+        board.unmake_move(move)
+    return total
+
+
+def run_perft(cases=PERFT_CASES) -> List[dict]:
+    results = []
+    for name, depth in cases:
+        engine = GameEngine()
+        engine.state = make_state(name)
+        start = time.perf_counter()
+        nodes = perft(engine, depth)
+        seconds = time.perf_counter() - start
+
+        board = BitState.from_game_state(make_state(name))
+        start = time.perf_counter()
+        bit_nodes = perft_bits(board, depth)
+        bit_seconds = time.perf_counter() - start
+
+        results.append({
+            "position": name,
+            "depth": depth,
+            "nodes": nodes,
+            "seconds": round(seconds, 4),
+            "moves_per_second": round(nodes / seconds) if seconds else None,
+            "bitboard_seconds": round(bit_seconds, 4),
+            "bitboard_moves_per_second": round(bit_nodes / bit_seconds) if bit_seconds else None,
+            "match": nodes == bit_nodes,
+        })
+    return results
+
+
+def run_search(cases=SEARCH_CASES, **ai_options) -> List[dict]:
+    results = []
+    for name, depth in cases:
+        state = make_state(name)
+        ai = MinimaxAI(depth=depth, **ai_options)
+        start = time.perf_counter()
+        result = ai.search(state, state.turn)
+        seconds = time.perf_counter() - start
+
+        # Memory is measured on a second, identical run: tracemalloc slows
+        # the search down too much to time it at the same time.
+        ai = MinimaxAI(depth=depth, **ai_options)
+        tracemalloc.start()
+        ai.search(state, state.turn)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        results.append({
+            "position": name,
+            "depth": depth,
+            "move": result.move,
+            "score": result.score,
+            "nodes": result.nodes,
+            "seconds": round(seconds, 4),
+            "nodes_per_second": round(result.nodes / seconds) if seconds else None,
+            "peak_memory_bytes": peak,
+        })
+    return results
+
+
+def git_revision() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"],
+                             capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current: dict, baseline: dict) -> bool:
+    """Print speed ratios against 'baseline'. Returns False if any perft count differs."""
+    ok = True
+    for section, rate in (("perft", "moves_per_second"), ("search", "nodes_per_second")):
+        old = {(r["position"], r["depth"]): r for r in baseline.get(section, [])}
+        for row in current.get(section, []):
+            before = old.get((row["position"], row["depth"]))
+            if before is None:
+                continue
+            speedup = f"x{before['seconds'] / row['seconds']:.2f}" if row["seconds"] else "x-"
+            note = ""
+            if row["nodes"] != before["nodes"]:
+                note = f"  NODES CHANGED {before['nodes']} -> {row['nodes']}"
+                ok = ok and section != "perft"  # Search node counts may legitimately change
+            # Rates are None for rows that took no measurable time
+            old_rate = "-" if before[rate] is None else before[rate]
+            new_rate = "-" if row[rate] is None else row[rate]
+            print(f"{section:7} {row['position']:18} d={row['depth']}  "
+                  f"{old_rate:>10} -> {new_rate:>10} /s  {speedup}{note}")
+    return ok
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("-o", "--output", help="write JSON results to this file")
+    parser.add_argument("--compare", help="baseline JSON file to compare against")
+    parser.add_argument("--only", choices=["perft", "search"], help="run one part only")
+    args = parser.parse_args(argv)
+
+    report = {
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+    }
+    if args.only != "search":
+        report["perft"] = run_perft()
+    if args.only != "perft":
+        report["search"] = run_search()
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    ok = all(row["match"] for row in report.get("perft", []))
+    if args.compare:
+        with open(args.compare) as f:
+            ok = compare(report, json.load(f)) and ok
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,261 @@
+"""
+Batched self-play: thousands of games advanced in lock step with NumPy.
+
+Every move that can ever be legal is one column of a fixed action table
+(ACTIONS): a PLACE per node, a step per directed board edge, a capture per
+jump. A batch stores N games as boolean occupancy arrays, so the legal moves
+of all N games are a handful of gathers through the action table's index
+arrays, and a policy picks one column per game.
+
+    games = BatchGames(10000)
+    result = games.play(capture_policy, random_policy, seed=1)
+    print(result.summary())
+
+The rules are GameEngine's, move for move (see test_batch.py). Needs NumPy.
+"""
+from typing import Callable, NamedTuple, Optional
+import numpy as np
+from .board import NEIGHBORS
+from .bitboard import NODE_COUNT, MAX_GOATS, PLACE, CAPTURE
+from .engine import DrawRules, DEFAULT_DRAW_RULES
+from .movelog import MOVES
+from .zobrist import TIGER_KEYS, GOAT_KEYS, SIDE_KEY
+
+TIGER_START = (0, 3, 4)
+WIN_CAPTURES = 5
+
+# Winner codes in BatchGames.winner and BatchResult.winners
+NO_WINNER, TIGER_WIN, GOAT_WIN, DRAW = 0, 1, 2, 3
+WINNER_NAMES = (None, 'T', 'G', 'D')
+
+# One row per action: (kind, from, to, capture), like the compact move
+# tuples of bitboard.py. Places first, then steps, then captures; a row's
+# index is also the move's byte in a move log (movelog.py).
+ACTIONS = np.array(MOVES, dtype=np.intp)
+ACTION_COUNT = len(ACTIONS)
+KIND, SRC, DEST, MID = ACTIONS.T
+
+PLACES = slice(0, NODE_COUNT)
+STEPS = slice(NODE_COUNT, int(np.searchsorted(KIND, CAPTURE)))
+CAPTURES = slice(STEPS.stop, ACTION_COUNT)
+STEP_SRC, STEP_DEST = SRC[STEPS], DEST[STEPS]
+JUMP_SRC, JUMP_MID, JUMP_DEST = SRC[CAPTURES], MID[CAPTURES], DEST[CAPTURES]
+IS_CAPTURE = KIND == CAPTURE
+
+# Undirected edges, and the adjacency matrix: ADJACENCY[a, b] = 1 if a-b is an edge
+EDGES = np.array([(a, b) for a in range(NODE_COUNT) for b in NEIGHBORS[a] if a < b], dtype=np.intp)
+ADJACENCY = np.zeros((NODE_COUNT, NODE_COUNT), dtype=np.int32)
+ADJACENCY[EDGES[:, 0], EDGES[:, 1]] = 1
+ADJACENCY[EDGES[:, 1], EDGES[:, 0]] = 1
+
+_TIGER_KEYS = np.array(TIGER_KEYS, dtype=np.uint64)
+_GOAT_KEYS = np.array(GOAT_KEYS, dtype=np.uint64)
+
+
+def position_keys(tigers: np.ndarray, goats: np.ndarray, tiger_turn: np.ndarray) -> np.ndarray:
+    """
+    Zobrist keys of N positions, without the placed/captured terms: those
+    are constant between two placements or captures, the only stretch in
+    which positions can repeat.
+    """
+    keys = np.bitwise_xor.reduce(np.where(tigers, _TIGER_KEYS, np.uint64(0)), axis=1)
+    keys ^= np.bitwise_xor.reduce(np.where(goats, _GOAT_KEYS, np.uint64(0)), axis=1)
+    return np.where(tiger_turn, keys ^ np.uint64(SIDE_KEY), keys)
+
+
+def legal_actions(tigers: np.ndarray, goats: np.ndarray, tiger_turn: np.ndarray,
+                  placed: np.ndarray) -> np.ndarray:
+    """
+    (N, ACTION_COUNT) mask of the legal actions of N positions.
+    'tigers'/'goats' are (N, 23) occupancy, 'tiger_turn' and 'placed' are (N,).
+    """
+    empty = ~(tigers | goats)
+    placing = ~tiger_turn & (placed < MAX_GOATS)
+    goat_steps = ~tiger_turn & ~placing
+    # Pieces of the side to move that step rather than place
+    movers = np.where(tiger_turn[:, None], tigers, goats & goat_steps[:, None])
+    legal = np.empty((len(tigers), ACTION_COUNT), dtype=bool)
+    legal[:, PLACES] = placing[:, None] & empty
+    legal[:, STEPS] = movers[:, STEP_SRC] & empty[:, STEP_DEST]
+    legal[:, CAPTURES] = ((tigers & tiger_turn[:, None])[:, JUMP_SRC]
+                          & goats[:, JUMP_MID] & empty[:, JUMP_DEST])
+    return legal
+
+
+def apply_actions(tigers: np.ndarray, goats: np.ndarray, tiger_turn: np.ndarray,
+                  placed: np.ndarray, captured: np.ndarray, actions: np.ndarray):
+    """Apply one legal action per position, in place. No validation."""
+    rows = np.arange(len(actions))
+    kind, src, dest, mid = KIND[actions], SRC[actions], DEST[actions], MID[actions]
+
+    place = kind == PLACE
+    goats[rows[place], dest[place]] = True
+    placed[place] += 1
+
+    # Steps and captures move a piece from 'src' to 'dest'
+    goat_step = ~place & ~tiger_turn
+    goats[rows[goat_step], src[goat_step]] = False
+    goats[rows[goat_step], dest[goat_step]] = True
+    tiger_step = ~place & tiger_turn
+    tigers[rows[tiger_step], src[tiger_step]] = False
+    tigers[rows[tiger_step], dest[tiger_step]] = True
+
+    capture = kind == CAPTURE
+    goats[rows[capture], mid[capture]] = False
+    captured[capture] += 1
+    tiger_turn ^= True
+
+
+# policy(games, rows, legal, rng) -> one action per row.
+# 'rows' are the games to move, all with the same side to move; 'legal' is
+# their (len(rows), ACTION_COUNT) legal mask, with at least one legal action
+# per row.
+Policy = Callable[['BatchGames', np.ndarray, np.ndarray, np.random.Generator], np.ndarray]
+
+
+def random_policy(games, rows, legal, rng):
+    """Any legal move, uniformly."""
+    return np.where(legal, rng.random(legal.shape), -1.0).argmax(axis=1)
+
+
+def capture_policy(games, rows, legal, rng):
+    """
+    game/playout.py's policy: a random capture if there is one, otherwise a
+    random move. (Goats never have captures, so they play randomly.)
+    """
+    return np.where(legal, rng.random(legal.shape) + IS_CAPTURE, -1.0).argmax(axis=1)
+
+
+class BatchResult(NamedTuple):
+    winners: np.ndarray    # Winner code per game (NO_WINNER, TIGER_WIN, GOAT_WIN, DRAW)
+    plies: np.ndarray      # Moves played per game
+    captured: np.ndarray   # Goats captured per game
+
+    def summary(self) -> dict:
+        games = len(self.winners)
+        counts = np.bincount(self.winners, minlength=len(WINNER_NAMES))
+        return {
+            "games": games,
+            "tiger_win_rate": round(float(counts[TIGER_WIN]) / games, 4),
+            "goat_win_rate": round(float(counts[GOAT_WIN]) / games, 4),
+            "draw_rate": round(float(counts[DRAW]) / games, 4),
+            "no_result_rate": round(float(counts[NO_WINNER]) / games, 4),
+            "mean_plies": round(float(self.plies.mean()), 2),
+            "max_plies": int(self.plies.max()),
+            "mean_captures": round(float(self.captured.mean()), 3),
+            # Games ending with 0, 1, ... 5 goats captured
+            "captures": np.bincount(self.captured, minlength=WIN_CAPTURES + 1).tolist(),
+        }
+
+
+class BatchGames:
+    """
+    N games from the start position, played in lock step.
+
+    Arrays, indexed by game: 'tigers'/'goats' (N, 23) occupancy,
+    'tiger_turn', 'placed', 'captured', 'plies', 'quiet_plies', 'winner'
+    and 'done'. 'legal' is the legal action mask of every game; finished
+    games have no legal actions. A game is finished when
+    GameEngine.check_winner has a result (including draws under
+    'draw_rules'), when the goats have no move (no result, as in
+    playout.py), or after 'max_plies' moves (no result).
+    """
+
+    def __init__(self, count: int, max_plies: int = 200,
+                 draw_rules: DrawRules = DEFAULT_DRAW_RULES):
+        self.max_plies = max_plies
+        self.draw_rules = draw_rules
+        self.tigers = np.zeros((count, NODE_COUNT), dtype=bool)
+        self.tigers[:, TIGER_START] = True
+        self.goats = np.zeros((count, NODE_COUNT), dtype=bool)
+        self.tiger_turn = np.zeros(count, dtype=bool)
+        self.placed = np.zeros(count, dtype=np.int8)
+        self.captured = np.zeros(count, dtype=np.int8)
+        self.plies = np.zeros(count, dtype=np.int32)
+        self.quiet_plies = np.zeros(count, dtype=np.int32)
+        # Position keys since the last placement or capture, by quiet ply
+        span = min(draw_rules.no_progress_plies or max_plies, max_plies) + 1
+        self._keys = np.zeros((count, span if draw_rules.repetitions else 0), dtype=np.uint64)
+        self.winner = np.full(count, NO_WINNER, dtype=np.int8)
+        self.done = np.zeros(count, dtype=bool)
+        self._refresh()
+
+    def __len__(self) -> int:
+        return len(self.done)
+
+    def _refresh(self):
+        """Settle finished games and recompute the legal mask."""
+        won = ~self.done & (self.captured >= WIN_CAPTURES)
+        self.winner[won] = TIGER_WIN
+        self.done |= won
+
+        legal = legal_actions(self.tigers, self.goats, self.tiger_turn, self.placed)
+        legal[self.done] = False
+        stuck = ~self.done & ~legal.any(axis=1)
+        trapped = stuck & self.tiger_turn
+        self.winner[trapped] = GOAT_WIN
+        self.done |= trapped
+
+        drawn = ~self.done & self._drawn()
+        self.winner[drawn] = DRAW
+        self.done |= drawn | stuck | (self.plies >= self.max_plies)
+        legal[self.done] = False
+        self.legal = legal
+
+    def _drawn(self) -> np.ndarray:
+        """GameEngine's draw rules, for every game."""
+        rules = self.draw_rules
+        drawn = np.zeros(len(self), dtype=bool)
+        if rules.no_progress_plies:
+            drawn |= self.quiet_plies >= rules.no_progress_plies
+        if rules.repetitions:
+            live = np.flatnonzero(~self.done & (self.quiet_plies < self._keys.shape[1]))
+            quiet = self.quiet_plies[live]
+            keys = position_keys(self.tigers[live], self.goats[live], self.tiger_turn[live])
+            history = self._keys[live]
+            history[np.arange(len(live)), quiet] = keys
+            self._keys[live] = history
+            seen = np.arange(history.shape[1]) <= quiet[:, None]
+            repeats = ((history == keys[:, None]) & seen).sum(axis=1)
+            drawn[live] |= repeats >= rules.repetitions
+        return drawn
+
+    def step(self, actions: np.ndarray):
+        """
+        Play actions[i] in every unfinished game i. Raises ValueError if one
+        of them is not legal there.
+        """
+        rows = np.flatnonzero(~self.done)
+        actions = np.asarray(actions)[rows]
+        if not self.legal[rows, actions].all():
+            raise ValueError("Illegal action")
+        tigers, goats = self.tigers[rows], self.goats[rows]
+        tiger_turn, placed, captured = self.tiger_turn[rows], self.placed[rows], self.captured[rows]
+        apply_actions(tigers, goats, tiger_turn, placed, captured, actions)
+        progress = (placed != self.placed[rows]) | (captured != self.captured[rows])
+        self.quiet_plies[rows] = np.where(progress, 0, self.quiet_plies[rows] + 1)
+        self.tigers[rows], self.goats[rows] = tigers, goats
+        self.tiger_turn[rows], self.placed[rows], self.captured[rows] = tiger_turn, placed, captured
+        self.plies[rows] += 1
+        self._refresh()
+
+    def choose(self, tiger_policy: Policy, goat_policy: Policy,
+               rng: np.random.Generator) -> np.ndarray:
+        """One action per game from the policy of its side to move (0 if finished)."""
+        actions = np.zeros(len(self), dtype=np.intp)
+        for policy, side in ((tiger_policy, self.tiger_turn), (goat_policy, ~self.tiger_turn)):
+            rows = np.flatnonzero(side & ~self.done)
+            if len(rows):
+                actions[rows] = policy(self, rows, self.legal[rows], rng)
+        return actions
+
+    def play(self, tiger_policy: Policy = capture_policy, goat_policy: Policy = random_policy,
+             seed: Optional[int] = None) -> BatchResult:
+        """Play every game to the end."""
+        rng = np.random.default_rng(seed)
+        while not self.done.all():
+            self.step(self.choose(tiger_policy, goat_policy, rng))
+        return self.result()
+
+    def result(self) -> BatchResult:
+        return BatchResult(self.winner.copy(), self.plies.copy(), self.captured.astype(np.intp))
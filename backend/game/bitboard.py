@@ -0,0 +1,297 @@
+from typing import Dict, List, Optional, Tuple
+from .board import NEIGHBORS, JUMPS
+from .zobrist import (
+    TIGER_KEYS, GOAT_KEYS, SIDE_KEY, PLACED_KEYS, CAPTURED_KEYS, compute_key,
+)
+from .symmetry import MIRROR_TIGER_KEYS, MIRROR_GOAT_KEYS, mirror_mask
+
+NODE_COUNT = 23
+MAX_GOATS = 15
+FULL_MASK = (1 << NODE_COUNT) - 1
+
+# BIT[n] is the occupancy bit for node n
+BIT = tuple(1 << n for n in range(NODE_COUNT))
+
+# NEIGHBOR_MASKS[n] has a bit set for every node adjacent to n
+NEIGHBOR_MASKS = tuple(
+    sum(BIT[m] for m in NEIGHBORS[n]) for n in range(NODE_COUNT)
+)
+
+# JUMP_BITS[n] -> tuple of (jump_over, land_on, over_bit, land_bit)
+JUMP_BITS = tuple(
+    tuple((mid, land, BIT[mid], BIT[land]) for (mid, land) in JUMPS[n])
+    for n in range(NODE_COUNT)
+)
+
+# Compact move tuples used by the search: (kind, from, to, capture)
+# 'from' is -1 for PLACE, 'capture' is -1 unless the move is a CAPTURE.
+PLACE, MOVE, CAPTURE = 0, 1, 2
+KIND_NAMES = ('PLACE', 'MOVE', 'CAPTURE')
+_KIND_CODES = {name: code for code, name in enumerate(KIND_NAMES)}
+
+Move = Tuple[int, int, int, int]
+
+
+def _popcount(mask: int) -> int:
+    return bin(mask).count('1')
+
+
+def iter_bits(mask: int):
+    """Yield the node index of every set bit in 'mask', lowest first."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def move_to_dict(move: Move) -> dict:
+    """Convert a compact move tuple to the engine/API dict format."""
+    kind, src, dest, mid = move
+    if kind == PLACE:
+        return {'type': 'PLACE', 'to': dest}
+    if kind == MOVE:
+        return {'type': 'MOVE', 'from': src, 'to': dest}
+    return {'type': 'CAPTURE', 'from': src, 'to': dest, 'capture': mid}
+
+
+def move_from_dict(move: dict) -> Move:
+    """Convert an engine/API move dict to a compact move tuple."""
+    kind = _KIND_CODES[move['type']]
+    src = move.get('from')
+    mid = move.get('capture')
+    return (
+        kind,
+        -1 if src is None else src,
+        move['to'],
+        -1 if mid is None else mid,
+    )
+
+
+class BitState:
+    """
+    Compact game state for search.
+    Tiger and goat occupancy are 23-bit integer masks (bit n = node n).
+    Moves are applied and reverted in place with make_move/unmake_move,
+    so the search never has to copy the state.
+    'key' is the Zobrist hash of the position, updated incrementally.
+    'mirror_key' is the hash of its left-right mirror image (see symmetry.py).
+    'goat_links' counts adjacent goat pairs, an evaluation feature that would
+    otherwise need a scan over every goat; it is also updated incrementally.
+    """
+    __slots__ = ('tigers', 'goats', 'turn', 'goats_on_board', 'goats_captured',
+                 'key', 'mirror_key', 'goat_links')
+
+    def __init__(self, tigers: int = 0, goats: int = 0, turn: str = 'G',
+                 goats_on_board: int = 0, goats_captured: int = 0):
+        self.tigers = tigers
+        self.goats = goats
+        self.turn = turn
+        self.goats_on_board = goats_on_board
+        self.goats_captured = goats_captured
+        self.key = compute_key(tigers, goats, turn, goats_on_board, goats_captured)
+        self.mirror_key = compute_key(mirror_mask(tigers), mirror_mask(goats), turn,
+                                      goats_on_board, goats_captured)
+        self.goat_links = sum(_popcount(NEIGHBOR_MASKS[n] & goats) for n in iter_bits(goats)) // 2
+
+    # === Conversion ===
+
+    @classmethod
+    def from_board_map(cls, board_map: Dict[int, Optional[str]], turn: str,
+                       goats_on_board: int, goats_captured: int) -> 'BitState':
+        tigers = goats = 0
+        for node, occupant in board_map.items():
+            if occupant == 'T':
+                tigers |= BIT[node]
+            elif occupant == 'G':
+                goats |= BIT[node]
+        return cls(tigers, goats, turn, goats_on_board, goats_captured)
+
+    @classmethod
+    def from_game_state(cls, state) -> 'BitState':
+        return cls.from_board_map(state.board_map, state.turn,
+                                  state.goats_on_board, state.goats_captured)
+
+    def to_board_map(self) -> Dict[int, Optional[str]]:
+        board_map: Dict[int, Optional[str]] = {}
+        for node in range(NODE_COUNT):
+            bit = BIT[node]
+            if self.tigers & bit:
+                board_map[node] = 'T'
+            elif self.goats & bit:
+                board_map[node] = 'G'
+            else:
+                board_map[node] = None
+        return board_map
+
+    def to_game_state(self):
+        from .engine import GameState
+        state = GameState()
+        state.board_map = self.to_board_map()
+        state.turn = self.turn
+        state.goats_on_board = self.goats_on_board
+        state.goats_captured = self.goats_captured
+        return state
+
+    def copy(self) -> 'BitState':
+        return BitState(self.tigers, self.goats, self.turn,
+                        self.goats_on_board, self.goats_captured)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, BitState):
+            return NotImplemented
+        return (self.tigers == other.tigers and self.goats == other.goats
+                and self.turn == other.turn and self.key == other.key
+                and self.mirror_key == other.mirror_key
+                and self.goat_links == other.goat_links
+                and self.goats_on_board == other.goats_on_board
+                and self.goats_captured == other.goats_captured)
+
+    def __repr__(self) -> str:
+        return (f"BitState(tigers={self.tigers:#x}, goats={self.goats:#x}, turn={self.turn!r}, "
+                f"placed={self.goats_on_board}, captured={self.goats_captured})")
+
+    # === Rules ===
+
+    def is_phase_one(self) -> bool:
+        return self.goats_on_board < MAX_GOATS
+
+    def generate_moves(self) -> List[Move]:
+        """
+        Returns the valid moves for the side to move, in the same order as
+        GameEngine.get_valid_moves.
+        """
+        moves = []
+        empty = FULL_MASK & ~(self.tigers | self.goats)
+        if self.turn == 'G':
+            if self.goats_on_board < MAX_GOATS:
+                for node in iter_bits(empty):
+                    moves.append((PLACE, -1, node, -1))
+            else:
+                for node in iter_bits(self.goats):
+                    for n in iter_bits(NEIGHBOR_MASKS[node] & empty):
+                        moves.append((MOVE, node, n, -1))
+        else:
+            goats = self.goats
+            for t_node in iter_bits(self.tigers):
+                for n in iter_bits(NEIGHBOR_MASKS[t_node] & empty):
+                    moves.append((MOVE, t_node, n, -1))
+                for (mid, land, mid_bit, land_bit) in JUMP_BITS[t_node]:
+                    if goats & mid_bit and empty & land_bit:
+                        moves.append((CAPTURE, t_node, land, mid))
+        return moves
+
+    def tiger_captures(self) -> List[Move]:
+        """Captures the tigers have on this board, whoever is to move."""
+        moves = []
+        empty = FULL_MASK & ~(self.tigers | self.goats)
+        goats = self.goats
+        for t_node in iter_bits(self.tigers):
+            for (mid, land, mid_bit, land_bit) in JUMP_BITS[t_node]:
+                if goats & mid_bit and empty & land_bit:
+                    moves.append((CAPTURE, t_node, land, mid))
+        return moves
+
+    def tiger_can_move(self) -> bool:
+        """True if any tiger has a step or a capture available."""
+        empty = FULL_MASK & ~(self.tigers | self.goats)
+        goats = self.goats
+        for t_node in iter_bits(self.tigers):
+            if NEIGHBOR_MASKS[t_node] & empty:
+                return True
+            for (_, _, mid_bit, land_bit) in JUMP_BITS[t_node]:
+                if goats & mid_bit and empty & land_bit:
+                    return True
+        return False
+
+    def winner(self) -> Optional[str]:
+        """
+        Same rules as GameEngine.check_winner, except draws: those depend on
+        the game's history (see MinimaxAI's SearchContext for the search side).
+        """
+        if self.goats_captured >= 5:
+            return 'T'
+        if self.turn == 'T' and not self.tiger_can_move():
+            return 'G'
+        return None
+
+    # === Make / unmake ===
+
+    def make_move(self, move: Move):
+        """Apply a move generated by generate_moves. No validation."""
+        kind, src, dest, mid = move
+        key = self.key ^ SIDE_KEY
+        mkey = self.mirror_key ^ SIDE_KEY
+        if kind == PLACE:
+            self.goat_links += _popcount(NEIGHBOR_MASKS[dest] & self.goats)
+            self.goats |= BIT[dest]
+            counts = PLACED_KEYS[self.goats_on_board] ^ PLACED_KEYS[self.goats_on_board + 1]
+            key ^= GOAT_KEYS[dest] ^ counts
+            mkey ^= MIRROR_GOAT_KEYS[dest] ^ counts
+            self.goats_on_board += 1
+        elif kind == MOVE:
+            if self.turn == 'G':
+                others = self.goats ^ BIT[src]
+                self.goat_links += (_popcount(NEIGHBOR_MASKS[dest] & others)
+                                    - _popcount(NEIGHBOR_MASKS[src] & others))
+                self.goats ^= BIT[src] | BIT[dest]
+                key ^= GOAT_KEYS[src] ^ GOAT_KEYS[dest]
+                mkey ^= MIRROR_GOAT_KEYS[src] ^ MIRROR_GOAT_KEYS[dest]
+            else:
+                self.tigers ^= BIT[src] | BIT[dest]
+                key ^= TIGER_KEYS[src] ^ TIGER_KEYS[dest]
+                mkey ^= MIRROR_TIGER_KEYS[src] ^ MIRROR_TIGER_KEYS[dest]
+        else:
+            self.tigers ^= BIT[src] | BIT[dest]
+            self.goats ^= BIT[mid]
+            self.goat_links -= _popcount(NEIGHBOR_MASKS[mid] & self.goats)
+            counts = CAPTURED_KEYS[self.goats_captured] ^ CAPTURED_KEYS[self.goats_captured + 1]
+            key ^= TIGER_KEYS[src] ^ TIGER_KEYS[dest] ^ GOAT_KEYS[mid] ^ counts
+            mkey ^= MIRROR_TIGER_KEYS[src] ^ MIRROR_TIGER_KEYS[dest] ^ MIRROR_GOAT_KEYS[mid] ^ counts
+            self.goats_captured += 1
+        self.key = key
+        self.mirror_key = mkey
+        self.turn = 'T' if self.turn == 'G' else 'G'
+
+    def make_null_move(self):
+        """Pass the turn without moving. Only used inside the search."""
+        self.turn = 'T' if self.turn == 'G' else 'G'
+        self.key ^= SIDE_KEY
+        self.mirror_key ^= SIDE_KEY
+
+    unmake_null_move = make_null_move
+
+    def unmake_move(self, move: Move):
+        """Revert a move previously applied with make_move."""
+        self.turn = 'T' if self.turn == 'G' else 'G'
+        kind, src, dest, mid = move
+        key = self.key ^ SIDE_KEY
+        mkey = self.mirror_key ^ SIDE_KEY
+        if kind == PLACE:
+            self.goats ^= BIT[dest]
+            self.goat_links -= _popcount(NEIGHBOR_MASKS[dest] & self.goats)
+            self.goats_on_board -= 1
+            counts = PLACED_KEYS[self.goats_on_board] ^ PLACED_KEYS[self.goats_on_board + 1]
+            key ^= GOAT_KEYS[dest] ^ counts
+            mkey ^= MIRROR_GOAT_KEYS[dest] ^ counts
+        elif kind == MOVE:
+            if self.turn == 'G':
+                self.goats ^= BIT[src] | BIT[dest]
+                others = self.goats ^ BIT[src]
+                self.goat_links -= (_popcount(NEIGHBOR_MASKS[dest] & others)
+                                    - _popcount(NEIGHBOR_MASKS[src] & others))
+                key ^= GOAT_KEYS[src] ^ GOAT_KEYS[dest]
+                mkey ^= MIRROR_GOAT_KEYS[src] ^ MIRROR_GOAT_KEYS[dest]
+            else:
+                self.tigers ^= BIT[src] | BIT[dest]
+                key ^= TIGER_KEYS[src] ^ TIGER_KEYS[dest]
+                mkey ^= MIRROR_TIGER_KEYS[src] ^ MIRROR_TIGER_KEYS[dest]
+        else:
+            self.tigers ^= BIT[src] | BIT[dest]
+            self.goat_links += _popcount(NEIGHBOR_MASKS[mid] & self.goats)
+            self.goats ^= BIT[mid]
+            self.goats_captured -= 1
+            counts = CAPTURED_KEYS[self.goats_captured] ^ CAPTURED_KEYS[self.goats_captured + 1]
+            key ^= TIGER_KEYS[src] ^ TIGER_KEYS[dest] ^ GOAT_KEYS[mid] ^ counts
+            mkey ^= MIRROR_TIGER_KEYS[src] ^ MIRROR_TIGER_KEYS[dest] ^ MIRROR_GOAT_KEYS[mid] ^ counts
+        self.key = key
+        self.mirror_key = mkey
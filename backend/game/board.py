@@ -19,10 +19,30 @@ class Board:
     - Inner triangular diagonals at bottom between Row 3 and Row 4
     """
     
+    # Immutable lookup tables shared by every Board instance.
+    # Built once, the first time a Board is constructed.
+    _neighbor_table: Optional[Tuple[Tuple[int, ...], ...]] = None
+    _jump_table: Optional[Tuple[Tuple[Tuple[int, int], ...], ...]] = None
+
     def __init__(self):
         self.nodes = list(range(23))
         self.adjacency: Dict[int, List[int]] = {i: [] for i in range(23)}
         self._build_graph()
+        if Board._neighbor_table is None:
+            self._build_tables()
+        # neighbors[node] -> sorted tuple of adjacent nodes
+        # jumps[node] -> tuple of (jump_over, land_on) pairs
+        self.neighbors = Board._neighbor_table
+        self.jumps = Board._jump_table
+
+    def _build_tables(self):
+        """Precompute per-node neighbor and jump tables from the graph."""
+        Board._neighbor_table = tuple(
+            tuple(sorted(self.adjacency[node])) for node in self.nodes
+        )
+        Board._jump_table = tuple(
+            tuple(self._compute_jumps(node)) for node in self.nodes
+        )
 
     def _add_edge(self, u: int, v: int):
         """Add bidirectional edge between two nodes."""
@@ -80,13 +100,22 @@ class Board:
 
     def get_neighbors(self, node: int) -> List[int]:
         """Return sorted list of adjacent nodes."""
-        return sorted(self.adjacency.get(node, []))
+        if 0 <= node < len(self.neighbors):
+            return list(self.neighbors[node])
+        return []
 
     def get_valid_jumps(self, node: int) -> List[Tuple[int, int]]:
         """
         Returns list of (jump_over, land_on) tuples for a Tiger at 'node'.
         A jump is valid if node -> jump_over -> land_on form a straight line.
         """
+        if 0 <= node < len(self.jumps):
+            return list(self.jumps[node])
+        return []
+
+    @staticmethod
+    def _compute_jumps(node: int) -> List[Tuple[int, int]]:
+        """Derive the straight-line jumps for 'node'. Used to build the jump table."""
         jumps = []
         
         # === Horizontal Jumps (within rows) ===
@@ -171,7 +200,7 @@ class Board:
     
     def is_connected(self, u: int, v: int) -> bool:
         """Check if two nodes are directly connected."""
-        return v in self.adjacency.get(u, [])
+        return 0 <= u < len(self.neighbors) and v in self.neighbors[u]
     
     def get_all_nodes(self) -> List[int]:
         """Return all node IDs."""
@@ -182,4 +211,10 @@ class Board:
         return len(self.nodes)
     
     def __repr__(self) -> str:
-        return f"Board(nodes={len(self.nodes)}, edges={sum(len(v) for v in self.adjacency.values()) // 2})"
+        return f"Board(nodes={len(self.nodes)}, edges={sum(len(v) for v in self.neighbors) // 2})"
+
+
+# Module-level views of the shared tables for code that has no Board instance.
+_SHARED_BOARD = Board()
+NEIGHBORS = _SHARED_BOARD.neighbors
+JUMPS = _SHARED_BOARD.jumps
@@ -1,5 +1,21 @@
-from typing import Dict, List, Optional, Tuple
-from .board import Board
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from .board import Board, NEIGHBORS, JUMPS
+from .zobrist import compute_key
+from .movelog import encode_move, decode_moves
+
+
+class DrawRules(NamedTuple):
+    """
+    When a game is drawn ('D'). Either rule can be turned off with 0.
+    repetitions: the same position, same side to move, occurs this many times.
+    no_progress_plies: this many plies in a row without a placement or capture.
+    """
+    repetitions: int = 3
+    no_progress_plies: int = 100
+
+
+DEFAULT_DRAW_RULES = DrawRules()
+
 
 class GameState:
     def __init__(self):
@@ -8,7 +24,13 @@ class GameState:
         self.goats_on_board: int = 0
         self.goats_captured: int = 0
         self.max_goats: int = 15
-        self.history: List[str] = [] # For logging
+        self.move_log = bytearray() # Every move played, one byte each (see movelog.py)
+        self.draw_rules: DrawRules = DEFAULT_DRAW_RULES
+        # Plies since the last placement or capture, and how often each
+        # position (Zobrist key) has occurred since then. Placements and
+        # captures can never be undone, so older positions cannot recur.
+        self.quiet_plies: int = 0
+        self.positions: Dict[int, int] = {}
 
     def is_phase_one(self) -> bool:
         return self.goats_on_board < self.max_goats
@@ -19,13 +41,178 @@ class GameState:
         new_state.turn = self.turn
         new_state.goats_on_board = self.goats_on_board
         new_state.goats_captured = self.goats_captured
-        new_state.history = list(self.history)
+        new_state.move_log = self.move_log.copy()
+        new_state.draw_rules = self.draw_rules
+        new_state.quiet_plies = self.quiet_plies
+        new_state.positions = dict(self.positions)
         return new_state
 
+
+def position_key(state: GameState) -> int:
+    """Zobrist key of the position in 'state', as BitState.key."""
+    tigers = goats = 0
+    for node, occupant in state.board_map.items():
+        if occupant == 'T':
+            tigers |= 1 << node
+        elif occupant == 'G':
+            goats |= 1 << node
+    return compute_key(tigers, goats, state.turn, state.goats_on_board, state.goats_captured)
+
+
+# === Pure rule functions ===
+# These only read or update the GameState passed in and keep no other state,
+# so any number of threads can use them at once on different states.
+
+def get_valid_moves(state: GameState) -> List[dict]:
+    """
+    Returns a list of valid moves for the player to move in 'state'.
+    Format: {'type': 'PLACE'|'MOVE'|'CAPTURE', 'from': int, 'to': int, ...}
+    """
+    moves = []
+    if state.turn == 'G':
+        if state.is_phase_one():
+            # Phase 1: Place Goat on any empty spot
+            for node, occupant in state.board_map.items():
+                if occupant is None:
+                    moves.append({'type': 'PLACE', 'to': node})
+        else:
+            # Phase 2: Move Goat to adjacent empty spot
+            for node, occupant in state.board_map.items():
+                if occupant == 'G':
+                    for n in NEIGHBORS[node]:
+                        if state.board_map[n] is None:
+                            moves.append({'type': 'MOVE', 'from': node, 'to': n})
+
+    elif state.turn == 'T':
+        # Tigers move or capture
+        tigers = [node for node, occ in state.board_map.items() if occ == 'T']
+        for t_node in tigers:
+            # 1. Normal Move
+            for n in NEIGHBORS[t_node]:
+                if state.board_map[n] is None:
+                    moves.append({'type': 'MOVE', 'from': t_node, 'to': n})
+
+            # 2. Capture Move
+            for (mid, dest) in JUMPS[t_node]:
+                if state.board_map[mid] == 'G' and state.board_map[dest] is None:
+                    moves.append({'type': 'CAPTURE', 'from': t_node, 'to': dest, 'capture': mid})
+
+    return moves
+
+def apply_move(state: GameState, move: dict) -> bool:
+    """
+    Applies a move to 'state' in place if it is valid. Returns True if successful.
+    """
+    progress = (state.goats_on_board, state.goats_captured)
+    if not state.positions:
+        state.positions[position_key(state)] = 1
+    if not _apply_move(state, move):
+        return False
+    state.move_log.append(encode_move(move))
+
+    if (state.goats_on_board, state.goats_captured) != progress:
+        state.quiet_plies = 0
+        state.positions = {}
+    else:
+        state.quiet_plies += 1
+    key = position_key(state)
+    state.positions[key] = state.positions.get(key, 0) + 1
+    return True
+
+def _apply_move(state: GameState, move: dict) -> bool:
+    # Validate logic could be strict here, but assuming input is from get_valid_moves or trusted
+    # We'll do basic validation
+
+    m_type = move['type']
+
+    if state.turn == 'G':
+        if m_type == 'PLACE':
+            if not state.is_phase_one(): return False
+            dest = move['to']
+            if state.board_map[dest] is not None: return False
+            state.board_map[dest] = 'G'
+            state.goats_on_board += 1
+            state.turn = 'T'
+            return True
+
+        elif m_type == 'MOVE':
+            if state.is_phase_one(): return False
+            src, dest = move['from'], move['to']
+            if state.board_map[src] != 'G': return False
+            if state.board_map[dest] is not None: return False
+            if dest not in NEIGHBORS[src]: return False
+
+            state.board_map[src] = None
+            state.board_map[dest] = 'G'
+            state.turn = 'T'
+            return True
+
+    elif state.turn == 'T':
+        src = move['from']
+        dest = move['to']
+        if state.board_map[src] != 'T': return False
+        if state.board_map[dest] is not None: return False
+
+        if m_type == 'MOVE':
+            if dest not in NEIGHBORS[src]: return False
+            state.board_map[src] = None
+            state.board_map[dest] = 'T'
+            state.turn = 'G'
+            return True
+
+        elif m_type == 'CAPTURE':
+            mid = move.get('capture')
+            if mid is None: return False
+            # Verify jump
+            if (mid, dest) not in JUMPS[src]: return False
+            if state.board_map[mid] != 'G': return False
+
+            state.board_map[src] = None
+            state.board_map[mid] = None # Eat goat
+            state.board_map[dest] = 'T'
+            state.goats_captured += 1
+            state.turn = 'G'
+            return True
+
+    return False
+
+def draw_reason(state: GameState) -> Optional[str]:
+    """'repetition' or 'no progress' if 'state' is drawn under its draw rules, else None."""
+    rules = state.draw_rules
+    if rules.repetitions and state.positions and max(state.positions.values()) >= rules.repetitions:
+        return 'repetition'
+    if rules.no_progress_plies and state.quiet_plies >= rules.no_progress_plies:
+        return 'no progress'
+    return None
+
+def check_winner(state: GameState, valid_moves: Optional[List[dict]] = None) -> Optional[str]:
+    """
+    Returns 'T' if Tigers win, 'G' if Goats win, 'D' for a draw (see
+    DrawRules), else None, for 'state'.
+    Pass 'valid_moves' if they are already known, to skip generating them again.
+    """
+    # Tigers win if they capture 5 goats
+    if state.goats_captured >= 5:
+        return 'T'
+
+    # Goats win if Tigers have NO moves
+    if state.turn == 'T':
+        if valid_moves is None:
+            valid_moves = get_valid_moves(state)
+        if not valid_moves:
+            return 'G'
+
+    if draw_reason(state):
+        return 'D'
+
+    return None
+
+
 class GameEngine:
-    def __init__(self):
+    def __init__(self, draw_rules: DrawRules = DEFAULT_DRAW_RULES):
         self.board = Board()
         self.state = GameState()
+        self.state.draw_rules = draw_rules
         self._initialize_tigers()
 
     def _initialize_tigers(self):
@@ -35,125 +222,43 @@ class GameEngine:
         self.state.board_map[3] = 'T'
         self.state.board_map[4] = 'T'
 
+    @classmethod
+    def replay(cls, log: bytes, draw_rules: DrawRules = DEFAULT_DRAW_RULES) -> 'GameEngine':
+        """
+        A new game with the moves of 'log' (see movelog.py) played. Raises
+        ValueError if the log is corrupt or holds an illegal move.
+        """
+        engine = cls(draw_rules)
+        try:
+            moves = decode_moves(log)
+        except IndexError:
+            raise ValueError("Corrupt move log")
+        for ply, move in enumerate(moves):
+            if not engine.apply_move(move):
+                raise ValueError(f"Illegal move {move} at ply {ply}")
+        return engine
+
     def get_valid_moves(self) -> List[dict]:
         """
         Returns a list of valid moves for the current player.
         Format: {'type': 'PLACE'|'MOVE'|'CAPTURE', 'from': int, 'to': int, ...}
         """
-        moves = []
-        if self.state.turn == 'G':
-            if self.state.is_phase_one():
-                # Phase 1: Place Goat on any empty spot
-                for node, occupant in self.state.board_map.items():
-                    if occupant is None:
-                        moves.append({'type': 'PLACE', 'to': node})
-            else:
-                # Phase 2: Move Goat to adjacent empty spot
-                for node, occupant in self.state.board_map.items():
-                    if occupant == 'G':
-                        neighbors = self.board.get_neighbors(node)
-                        for n in neighbors:
-                            if self.state.board_map[n] is None:
-                                moves.append({'type': 'MOVE', 'from': node, 'to': n})
-        
-        elif self.state.turn == 'T':
-            # Tigers move or capture
-            tigers = [node for node, occ in self.state.board_map.items() if occ == 'T']
-            for t_node in tigers:
-                # 1. Normal Move
-                neighbors = self.board.get_neighbors(t_node)
-                for n in neighbors:
-                    if self.state.board_map[n] is None:
-                        moves.append({'type': 'MOVE', 'from': t_node, 'to': n})
-                
-                # 2. Capture Move
-                jumps = self.board.get_valid_jumps(t_node)
-                for (mid, dest) in jumps:
-                    if self.state.board_map[mid] == 'G' and self.state.board_map[dest] is None:
-                        moves.append({'type': 'CAPTURE', 'from': t_node, 'to': dest, 'capture': mid})
-        
-        return moves
+        return get_valid_moves(self.state)
 
     def apply_move(self, move: dict) -> bool:
         """
         Applies a move if it is valid. Returns True if successful.
         """
-        # Validate logic could be strict here, but assuming input is from get_valid_moves or trusted
-        # We'll do basic validation
-        
-        m_type = move['type']
-        
-        if self.state.turn == 'G':
-            if m_type == 'PLACE':
-                if not self.state.is_phase_one(): return False
-                dest = move['to']
-                if self.state.board_map[dest] is not None: return False
-                self.state.board_map[dest] = 'G'
-                self.state.goats_on_board += 1
-                self.state.turn = 'T'
-                self.state.history.append(f"G placed at {dest}")
-                return True
-                
-            elif m_type == 'MOVE':
-                if self.state.is_phase_one(): return False
-                src, dest = move['from'], move['to']
-                if self.state.board_map[src] != 'G': return False
-                if self.state.board_map[dest] is not None: return False
-                if dest not in self.board.get_neighbors(src): return False
-                
-                self.state.board_map[src] = None
-                self.state.board_map[dest] = 'G'
-                self.state.turn = 'T'
-                self.state.history.append(f"G moved {src}->{dest}")
-                return True
-                
-        elif self.state.turn == 'T':
-            src = move['from']
-            dest = move['to']
-            if self.state.board_map[src] != 'T': return False
-            if self.state.board_map[dest] is not None: return False
-            
-            if m_type == 'MOVE':
-                if dest not in self.board.get_neighbors(src): return False
-                self.state.board_map[src] = None
-                self.state.board_map[dest] = 'T'
-                self.state.turn = 'G'
-                self.state.history.append(f"T moved {src}->{dest}")
-                return True
-                
-            elif m_type == 'CAPTURE':
-                mid = move.get('capture')
-                if mid is None: return False
-                # Verify jump
-                valid_jumps = self.board.get_valid_jumps(src)
-                if (mid, dest) not in valid_jumps: return False
-                if self.state.board_map[mid] != 'G': return False
-                
-                self.state.board_map[src] = None
-                self.state.board_map[mid] = None # Eat goat
-                self.state.board_map[dest] = 'T'
-                self.state.goats_captured += 1
-                self.state.turn = 'G'
-                self.state.history.append(f"T captured {mid} ({src}->{dest})")
-                return True
-                
-        return False
+        return apply_move(self.state, move)
 
-    def check_winner(self) -> Optional[str]:
+    def check_winner(self, valid_moves: Optional[List[dict]] = None) -> Optional[str]:
         """
-        Returns 'T' if Tigers win, 'G' if Goats win, else None.
+        Returns 'T' if Tigers win, 'G' if Goats win, 'D' for a draw, else None.
         """
-        # Tigers win if they capture 5 goats
-        if self.state.goats_captured >= 5:
-            return 'T'
-        
-        # Goats win if Tigers have NO moves
-        if self.state.turn == 'T':
-            valid_moves = self.get_valid_moves()
-            if not valid_moves:
-                return 'G'
-                
-        return None
+        return check_winner(self.state, valid_moves)
+
+    def draw_reason(self) -> Optional[str]:
+        return draw_reason(self.state)
 
     def print_board(self):
         """Debug print"""
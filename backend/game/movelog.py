@@ -0,0 +1,43 @@
+"""
+Compact binary move logs: one byte per move.
+
+Only 155 different moves can ever be played: a PLACE per node, a step per
+directed board edge and a capture per jump. MOVES lists them all (in the
+same order as the action table of game/batch.py), and a move is logged as
+its index in that list, so a whole game fits in a few hundred bytes.
+"""
+from typing import Dict, Iterable, List, Tuple
+from .board import NEIGHBORS, JUMPS
+from .bitboard import NODE_COUNT, PLACE, MOVE, CAPTURE, Move, move_to_dict
+
+# Every possible move as a compact move tuple: places, then steps, then captures
+MOVES: Tuple[Move, ...] = tuple(
+    [(PLACE, -1, node, -1) for node in range(NODE_COUNT)]
+    + [(MOVE, src, dest, -1) for src in range(NODE_COUNT) for dest in NEIGHBORS[src]]
+    + [(CAPTURE, src, land, mid) for src in range(NODE_COUNT) for (mid, land) in JUMPS[src]]
+)
+MOVE_CODES: Dict[Move, int] = {move: code for code, move in enumerate(MOVES)}
+
+
+def encode_move(move: dict) -> int:
+    """
+    The log byte of an engine/API move dict. Fields the move's type does not
+    use are ignored. Raises KeyError for a move that can never be legal.
+    """
+    kind = move['type']
+    if kind == 'PLACE':
+        return MOVE_CODES[(PLACE, -1, move['to'], -1)]
+    if kind == 'MOVE':
+        return MOVE_CODES[(MOVE, move['from'], move['to'], -1)]
+    if kind == 'CAPTURE':
+        return MOVE_CODES[(CAPTURE, move['from'], move['to'], move['capture'])]
+    raise KeyError(kind)
+
+
+def encode_moves(moves: Iterable[dict]) -> bytes:
+    return bytes(encode_move(move) for move in moves)
+
+
+def decode_moves(log: bytes) -> List[dict]:
+    """The moves of a log as engine/API dicts. Raises IndexError on a corrupt byte."""
+    return [move_to_dict(MOVES[code]) for code in log]
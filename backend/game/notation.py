@@ -0,0 +1,46 @@
+"""
+Compact text encoding of positions, for /analyze and analysis tools:
+
+    T..TT.G................ T 1 0
+
+The 23 nodes in order ('T' tiger, 'G' goat, '.' empty), then the side to
+move, the goats placed so far and the goats captured.
+"""
+from .bitboard import NODE_COUNT, MAX_GOATS
+from .engine import GameState, DrawRules, DEFAULT_DRAW_RULES
+
+_OCCUPANTS = {'T': 'T', 'G': 'G', '.': None}
+TIGER_COUNT = 3
+
+
+def format_position(state: GameState) -> str:
+    board = ''.join(state.board_map[node] or '.' for node in range(NODE_COUNT))
+    return f"{board} {state.turn} {state.goats_on_board} {state.goats_captured}"
+
+
+def parse_position(text: str, draw_rules: DrawRules = DEFAULT_DRAW_RULES) -> GameState:
+    """The GameState 'text' encodes. Raises ValueError if it is malformed or impossible."""
+    fields = text.split()
+    if len(fields) != 4:
+        raise ValueError("expected '<nodes> <turn> <placed> <captured>'")
+    board, turn, placed, captured = fields
+    if len(board) != NODE_COUNT or any(c not in _OCCUPANTS for c in board):
+        raise ValueError(f"nodes must be {NODE_COUNT} characters of 'T', 'G' or '.'")
+    if turn not in ('T', 'G'):
+        raise ValueError("turn must be 'T' or 'G'")
+    try:
+        placed, captured = int(placed), int(captured)
+    except ValueError:
+        raise ValueError("placed and captured must be integers")
+    if board.count('T') != TIGER_COUNT:
+        raise ValueError(f"there must be {TIGER_COUNT} tigers")
+    if not 0 <= captured <= placed <= MAX_GOATS or board.count('G') != placed - captured:
+        raise ValueError("goat counts do not match the board")
+
+    state = GameState()
+    state.board_map = {node: _OCCUPANTS[c] for node, c in enumerate(board)}
+    state.turn = turn
+    state.goats_on_board = placed
+    state.goats_captured = captured
+    state.draw_rules = draw_rules
+    return state
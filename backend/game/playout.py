@@ -0,0 +1,40 @@
+import random
+from typing import Callable, List, Optional, Sequence
+from .bitboard import BitState, CAPTURE
+
+
+def _is_capture(move) -> bool:
+    """Works on engine/API move dicts and on compact move tuples."""
+    if isinstance(move, dict):
+        return move['type'] == 'CAPTURE'
+    return move[0] == CAPTURE
+
+
+def choose_playout_move(moves: Sequence, turn: str, rng: random.Random = random,
+                        is_capture: Callable = _is_capture):
+    """
+    Playout policy: Tigers take a random capture if they have one,
+    otherwise any random move. Goats play any random move.
+    """
+    if turn == 'T':
+        captures = [m for m in moves if is_capture(m)]
+        if captures:
+            return rng.choice(captures)
+    return rng.choice(moves)
+
+
+def playout(board: BitState, rng: random.Random = random, max_plies: int = 100) -> Optional[str]:
+    """
+    Play 'board' out with the playout policy, in place.
+    Returns the winner, or None if nobody has won after 'max_plies' or the
+    goats are left without a move.
+    """
+    for _ in range(max_plies):
+        winner = board.winner()
+        if winner:
+            return winner
+        moves = board.generate_moves()
+        if not moves:
+            return None
+        board.make_move(choose_playout_move(moves, board.turn, rng))
+    return board.winner()
@@ -0,0 +1,96 @@
+"""
+Left-right mirror symmetry of the board.
+
+The apex sits on the axis and every row reflects column-wise, so mirroring
+a position gives one with the same value and mirrored best moves. Caches
+keyed by position store the canonical form (the smaller of a position and
+its mirror image) and map moves back on the way out.
+"""
+from typing import Tuple
+from .board import NEIGHBORS, JUMPS
+from .zobrist import TIGER_KEYS, GOAT_KEYS
+
+# (first, last) node of each row, apex excluded
+_ROWS = ((1, 6), (7, 12), (13, 18), (19, 22))
+
+
+def _build_mirror() -> Tuple[int, ...]:
+    mirror = list(range(23))
+    for first, last in _ROWS:
+        for node in range(first, last + 1):
+            mirror[node] = first + last - node
+    return tuple(mirror)
+
+
+# MIRROR[n] is the node n is reflected onto
+MIRROR = _build_mirror()
+
+# The reflection must map adjacency and jump lines onto themselves
+assert all(
+    tuple(sorted(MIRROR[m] for m in NEIGHBORS[n])) == NEIGHBORS[MIRROR[n]]
+    for n in range(23)
+), "board is not mirror-symmetric"
+assert all(
+    sorted((MIRROR[over], MIRROR[land]) for over, land in JUMPS[n]) == sorted(JUMPS[MIRROR[n]])
+    for n in range(23)
+), "jump lines are not mirror-symmetric"
+
+# Mirroring a 23-bit mask, one table per byte
+_MIRROR_BYTES = tuple(
+    tuple(
+        sum(1 << MIRROR[shift + b] for b in range(8) if value >> b & 1 and shift + b < 23)
+        for value in range(256)
+    )
+    for shift in (0, 8, 16)
+)
+
+# Zobrist keys of the mirrored node, so a BitState can keep the key of its
+# mirror image up to date alongside its own
+MIRROR_TIGER_KEYS = tuple(TIGER_KEYS[MIRROR[n]] for n in range(23))
+MIRROR_GOAT_KEYS = tuple(GOAT_KEYS[MIRROR[n]] for n in range(23))
+
+
+def mirror_mask(mask: int) -> int:
+    low, mid, high = _MIRROR_BYTES
+    return low[mask & 0xFF] | mid[mask >> 8 & 0xFF] | high[mask >> 16]
+
+
+def mirror_move(move):
+    """Mirror a compact move tuple (kind, from, to, capture). -1 stays -1."""
+    kind, src, dest, mid = move
+    return (kind, MIRROR[src] if src >= 0 else -1, MIRROR[dest], MIRROR[mid] if mid >= 0 else -1)
+
+
+def mirror_move_dict(move: dict) -> dict:
+    """Mirror a move in engine/API dict format."""
+    mirrored = dict(move)
+    for field in ('from', 'to', 'capture'):
+        if mirrored.get(field) is not None:
+            mirrored[field] = MIRROR[mirrored[field]]
+    return mirrored
+
+
+def canonical_masks(tigers: int, goats: int) -> Tuple[int, int, bool]:
+    """
+    (tigers, goats, mirrored) of the canonical orientation: the one with the
+    smaller tiger mask, ties broken by the goat mask.
+    """
+    m_tigers = mirror_mask(tigers)
+    if m_tigers < tigers:
+        return m_tigers, mirror_mask(goats), True
+    if m_tigers == tigers:
+        m_goats = mirror_mask(goats)
+        if m_goats < goats:
+            return tigers, m_goats, True
+    return tigers, goats, False
+
+
+def canonical_key(state) -> Tuple[int, bool]:
+    """
+    (key, mirrored) for a BitState: the smaller of its Zobrist key and the
+    key of its mirror image. Moves found in the mirrored orientation must be
+    passed through mirror_move before they are played on 'state'.
+    """
+    if state.mirror_key < state.key:
+        return state.mirror_key, True
+    return state.key, False
@@ -0,0 +1,31 @@
+import random
+
+# Zobrist keys for incremental position hashing.
+# A fixed seed keeps keys identical across processes and restarts, so hashes
+# can be shared with worker processes or written to disk.
+_rng = random.Random(0x41505A4F)
+
+def _key() -> int:
+    return _rng.getrandbits(64)
+
+TIGER_KEYS = tuple(_key() for _ in range(23))
+GOAT_KEYS = tuple(_key() for _ in range(23))
+# XORed in when it is the Tigers' turn
+SIDE_KEY = _key()
+# Indexed by goats placed (0-15) and goats captured (0-15)
+PLACED_KEYS = tuple(_key() for _ in range(16))
+CAPTURED_KEYS = tuple(_key() for _ in range(16))
+
+
+def compute_key(tigers: int, goats: int, turn: str,
+                goats_on_board: int, goats_captured: int) -> int:
+    """Full Zobrist key of a position, computed from scratch."""
+    key = PLACED_KEYS[goats_on_board] ^ CAPTURED_KEYS[goats_captured]
+    if turn == 'T':
+        key ^= SIDE_KEY
+    for node in range(23):
+        if tigers >> node & 1:
+            key ^= TIGER_KEYS[node]
+        elif goats >> node & 1:
+            key ^= GOAT_KEYS[node]
+    return key
@@ -0,0 +1,261 @@
+import itertools
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+# Job states
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = 'queued', 'running', 'done', 'failed', 'cancelled'
+
+
+class QueueFullError(Exception):
+    """Raised by submit() when the queue already holds max_queued jobs."""
+
+
+class JobCancelledError(Exception):
+    """Set as the job's outcome when it is cancelled before it finishes."""
+
+
+class AIJob:
+    """
+    One AI search waiting for or running on a worker thread.
+    'run' receives a threading.Event that is set when the job is cancelled,
+    and should return early once it sees it. Its result (or exception) is
+    delivered through 'future'.
+    """
+
+    def __init__(self, job_id: str, game_id: str, run: Callable[[threading.Event], Any],
+                 background: bool = False):
+        self.job_id = job_id
+        self.game_id = game_id
+        self.run = run
+        self.background = background
+        self.future: Future = Future()
+        self.cancel_event = threading.Event()
+        self.status = QUEUED
+        self.created = time.monotonic()
+
+    def to_dict(self) -> dict:
+        data = {"job_id": self.job_id, "game_id": self.game_id, "status": self.status}
+        if self.status == DONE:
+            data["result"] = self.future.result()
+        elif self.status == FAILED:
+            error = self.future.exception()
+            data["error"] = getattr(error, "detail", None) or str(error)
+        return data
+
+
+class AIJobQueue:
+    """
+    Bounded pool of worker threads running AI jobs.
+
+    - At most 'max_queued' jobs wait at once; submit() raises QueueFullError
+      beyond that so callers can push back (HTTP 429).
+    - Each game has its own FIFO and workers take games in round-robin
+      order, so one busy game cannot starve the others.
+    - A new job for a game cancels that game's older jobs, queued or running.
+    - Finished jobs are kept for polling, up to 'max_retained'.
+    - Background jobs (e.g. pondering) only start when no regular job is
+      waiting, at most 'workers - 1' at a time so one worker stays free for
+      regular jobs (so never with a single worker). Past 'max_background'
+      waiting, submit() drops them. promote() turns one into a regular job.
+    """
+
+    def __init__(self, workers: int = 2, max_queued: int = 64, max_retained: int = 1024,
+                 max_background: int = 64):
+        self.workers = workers
+        self.max_queued = max_queued
+        self.max_retained = max_retained
+        self.max_background = max_background
+        self._cond = threading.Condition()
+        self._queues: Dict[str, Deque[AIJob]] = {}
+        # Games with queued jobs, in the order they will be served
+        self._rotation: Deque[str] = deque()
+        self._queued = 0
+        self._background: Deque[AIJob] = deque()
+        self._background_running = 0
+        self._running: Dict[str, List[AIJob]] = {}
+        self._jobs: "OrderedDict[str, AIJob]" = OrderedDict()
+        self._ids = itertools.count(1)
+        self._threads = []
+        self._closed = False
+
+    def _ensure_started(self):
+        if not self._threads:
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._worker, name=f"ai-worker-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def submit(self, game_id: str, run: Callable[[threading.Event], Any],
+               replace: bool = True, background: bool = False) -> Optional[AIJob]:
+        """
+        Queue 'run' for 'game_id'. Raises QueueFullError when the regular
+        queue is full; a background job is dropped instead (returns None).
+        """
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("queue is shut down")
+            if replace:
+                self._cancel_game_locked(game_id)
+            if background:
+                if len(self._background) >= self.max_background:
+                    return None
+            elif self._queued >= self.max_queued:
+                raise QueueFullError()
+            job = AIJob(f"{next(self._ids)}", game_id, run, background)
+            self._jobs[job.job_id] = job
+            if background:
+                self._background.append(job)
+            else:
+                self._enqueue_locked(job)
+            self._prune_locked()
+            self._ensure_started()
+            self._cond.notify()
+            return job
+
+    def get(self, job_id: str) -> AIJob:
+        """Raises KeyError if the job is unknown or no longer retained."""
+        with self._cond:
+            return self._jobs[job_id]
+
+    def promote(self, job_id: str) -> bool:
+        """
+        Move a waiting background job to the back of its game's regular
+        queue, e.g. once a request wants its result. Returns False if the job
+        is not a waiting background job.
+        """
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None or job.status != QUEUED or not job.background:
+                return False
+            self._background.remove(job)
+            job.background = False
+            self._enqueue_locked(job)
+            self._cond.notify()
+            return True
+
+    def cancel(self, job_id: str) -> bool:
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None or job.status not in (QUEUED, RUNNING):
+                return False
+            self._cancel_job_locked(job)
+            return True
+
+    def cancel_game(self, game_id: str) -> int:
+        """Cancel every queued or running job of a game. Returns how many."""
+        with self._cond:
+            return self._cancel_game_locked(game_id)
+
+    def queue_depth(self) -> int:
+        """Regular jobs waiting to run."""
+        with self._cond:
+            return self._queued
+
+    def shutdown(self):
+        with self._cond:
+            self._closed = True
+            for game_id in list(self._queues):
+                self._cancel_game_locked(game_id)
+            for job in list(self._background):
+                self._cancel_job_locked(job)
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    # === Internals (call with self._cond held) ===
+
+    def _enqueue_locked(self, job: AIJob):
+        queue = self._queues.get(job.game_id)
+        if queue is None:
+            queue = self._queues[job.game_id] = deque()
+            self._rotation.append(job.game_id)
+        queue.append(job)
+        self._queued += 1
+
+    def _cancel_game_locked(self, game_id: str) -> int:
+        cancelled = 0
+        queued = list(self._queues.get(game_id, ()))
+        queued += [job for job in self._background if job.game_id == game_id]
+        for job in queued + self._running.get(game_id, []):
+            if job.status in (QUEUED, RUNNING):
+                self._cancel_job_locked(job)
+                cancelled += 1
+        return cancelled
+
+    def _cancel_job_locked(self, job: AIJob):
+        job.cancel_event.set()
+        if job.status == QUEUED and job.background:
+            self._background.remove(job)
+        elif job.status == QUEUED:
+            queue = self._queues[job.game_id]
+            queue.remove(job)
+            self._queued -= 1
+            if not queue:
+                del self._queues[job.game_id]
+                self._rotation.remove(job.game_id)
+        # A running job finishes its search early and is then discarded
+        job.status = CANCELLED
+        if not job.future.done():
+            job.future.set_exception(JobCancelledError())
+
+    def _has_work_locked(self) -> bool:
+        if self._rotation:
+            return True
+        return bool(self._background) and self._background_running < self.workers - 1
+
+    def _next_job_locked(self) -> AIJob:
+        if not self._rotation:
+            self._background_running += 1
+            return self._background.popleft()
+        game_id = self._rotation.popleft()
+        queue = self._queues[game_id]
+        job = queue.popleft()
+        self._queued -= 1
+        if queue:
+            self._rotation.append(game_id)
+        else:
+            del self._queues[game_id]
+        return job
+
+    def _prune_locked(self):
+        while len(self._jobs) > self.max_retained:
+            oldest = next(iter(self._jobs.values()))
+            if oldest.status in (QUEUED, RUNNING):
+                break
+            self._jobs.popitem(last=False)
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                while not self._has_work_locked() and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                job = self._next_job_locked()
+                job.status = RUNNING
+                self._running.setdefault(job.game_id, []).append(job)
+            try:
+                result = job.run(job.cancel_event)
+                error = None
+            except Exception as exc:  # delivered to whoever awaits the job
+                result, error = None, exc
+            with self._cond:
+                running = self._running[job.game_id]
+                running.remove(job)
+                if not running:
+                    del self._running[job.game_id]
+                if job.background:
+                    self._background_running -= 1
+                    self._cond.notify()  # Another background job may start now
+                if job.status == CANCELLED:
+                    continue
+                if error is None:
+                    job.status = DONE
+                    job.future.set_result(result)
+                else:
+                    job.status = FAILED
+                    job.future.set_exception(error)
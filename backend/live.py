@@ -0,0 +1,72 @@
+import asyncio
+
+
+class Subscriber:
+    """
+    One WebSocket watching a game. Messages go through an asyncio queue, so
+    they can be sent from any thread (request handlers run on a thread pool)
+    and reach the socket in the order they were published.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.queue: "asyncio.Queue[dict]" = asyncio.Queue()
+
+    def send(self, message: dict):
+        self.loop.call_soon_threadsafe(self.queue.put_nowait, message)
+
+    async def pump(self, websocket):
+        """Forward queued messages to 'websocket' until cancelled."""
+        while True:
+            await websocket.send_json(await self.queue.get())
+
+
+def state_diff(old: dict, new: dict) -> dict:
+    """
+    The fields of state payload 'new' that differ from 'old'. 'board' only
+    lists the nodes whose occupant changed.
+    """
+    changes = {key: value for key, value in new.items()
+               if key != "board" and old.get(key) != value}
+    board = {node: occupant for node, occupant in new["board"].items()
+             if old["board"].get(node) != occupant}
+    if board:
+        changes["board"] = board
+    return changes
+
+
+def full_state(session, payload: dict) -> dict:
+    return {"type": "state", "version": session.version, "state": payload}
+
+
+def subscribe(session, subscriber: Subscriber, payload: dict):
+    """Start pushing 'session' to 'subscriber', beginning with its full state 'payload'. Hold session.lock."""
+    session.subscribers.add(subscriber)
+    session.published = payload
+    subscriber.send(full_state(session, payload))
+
+
+def unsubscribe(session, subscriber: Subscriber):
+    session.subscribers.discard(subscriber)
+    if not session.subscribers:
+        session.published = None
+
+
+def publish(session, payload: dict, full: bool = False, **extra):
+    """
+    The game in 'session' changed (see GameSession.changed) to state
+    'payload': push the change to every subscriber, as a diff from the last
+    published state, or as the full state if 'full'. 'extra' fields (e.g.
+    the move played) ride along with the message. Hold session.lock.
+    """
+    if not session.subscribers:
+        session.published = None
+        return
+    old, session.published = session.published, payload
+    if full or old is None:
+        message = full_state(session, payload)
+    else:
+        message = {"type": "diff", "version": session.version, "changes": state_diff(old, payload)}
+    message.update((key, value) for key, value in extra.items() if value is not None)
+    for subscriber in list(session.subscribers):
+        subscriber.send(message)
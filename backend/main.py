@@ -1,12 +1,39 @@
-from fastapi import FastAPI, HTTPException
+import asyncio
+import atexit
+import json
+import logging
+import os
+import secrets
+from fastapi import FastAPI, HTTPException, Request, Response, WebSocket, WebSocketDisconnect
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from pydantic import BaseModel, ValidationError
+from starlette.concurrency import run_in_threadpool
 from typing import List, Optional, Dict
-from game.engine import GameEngine
 from ai.ai_player import MinimaxAI
+from ai.mcts import MCTSAI
+from game.engine import DrawRules, GameEngine, check_winner
+from game.notation import format_position, parse_position
+from sessions import GameStore, GameSession, Snapshot
+from persistence import GameLog
+from metrics import Registry, RequestMetrics, SearchMetrics
+from jobs import AIJob, AIJobQueue, JobCancelledError, QueueFullError
+from pondering import AIParams, Ponderer
+import live
+
+# LOG_LEVEL=DEBUG also logs every move applied
+logging.basicConfig(level=os.environ.get("LOG_LEVEL", "INFO").upper(),
+                    format="%(asctime)s %(levelname)s %(name)s %(message)s")
+logger = logging.getLogger(__name__)
 
 app = FastAPI()
 
+# Prometheus metrics at /metrics: request counts and latency per route, and
+# search statistics of the minimax engine. METRICS=0 turns all of it off.
+metrics = Registry(enabled=os.environ.get("METRICS", "1") != "0")
+if metrics.enabled:
+    app.add_middleware(RequestMetrics, registry=metrics)
+
 # Enable CORS for frontend
 app.add_middleware(
     CORSMiddleware,
@@ -16,9 +43,69 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Global Game Instance
-game_engine = GameEngine()
-ai_player = MinimaxAI(depth=3)
+# GAME_DB names an SQLite file that keeps every game's moves, so games survive
+# restarts (and --reload); without it games only live in memory. Games unused
+# for GAME_TTL_SECONDS are pruned from it at startup and every 10 minutes.
+GAME_TTL_SECONDS = float(os.environ.get("GAME_TTL_SECONDS", "3600"))
+game_log = GameLog(os.environ["GAME_DB"], max_age=GAME_TTL_SECONDS) if os.environ.get("GAME_DB") else None
+if game_log is not None:
+    atexit.register(game_log.close)
+
+# Game sessions, each with its own engine and lock.
+# Idle games expire after GAME_TTL_SECONDS; past MAX_GAMES the least recently used is evicted.
+# A game is drawn when a position occurs DRAW_REPETITIONS times, or after
+# DRAW_NO_PROGRESS_PLIES plies without a placement or capture (0 turns a rule off;
+# with both off, a movement-phase game can go on forever).
+store = GameStore(
+    max_games=int(os.environ.get("MAX_GAMES", "10000")),
+    ttl_seconds=GAME_TTL_SECONDS,
+    draw_rules=DrawRules(
+        repetitions=int(os.environ.get("DRAW_REPETITIONS", "3")),
+        no_progress_plies=int(os.environ.get("DRAW_NO_PROGRESS_PLIES", "100")),
+    ),
+    game_log=game_log,
+)
+# The unscoped endpoints (/state, /move, ...) play this game
+DEFAULT_GAME_ID = "default"
+
+# AI_WORKERS > 0 splits root moves across that many worker processes.
+# The AI is shared by all games; its transposition table is keyed by position.
+# TABLEBASE_DIR points at endgame tables built with `python -m ai.tablebase`.
+ai_player = MinimaxAI(
+    depth=3,
+    parallel=int(os.environ.get("AI_WORKERS", "0")),
+    tablebase=os.environ.get("TABLEBASE_DIR") or None,
+    # Built with `python -m ai.opening_book`; a missing file is an empty book
+    opening_book=os.environ.get(
+        "OPENING_BOOK", os.path.join(os.path.dirname(os.path.abspath(__file__)), "opening_book.bin")),
+    metrics=SearchMetrics(metrics) if metrics.enabled else None,
+)
+
+# Monte Carlo engine, picked per request with ?engine=mcts
+mcts_player = MCTSAI(iterations=int(os.environ.get("MCTS_ITERATIONS", "3000")))
+ENGINES = {"minimax": ai_player, "mcts": mcts_player}
+
+# AI searches run on their own bounded thread pool, off the request path.
+# Past AI_QUEUE_DEPTH waiting jobs, new AI requests get 429.
+ai_jobs = AIJobQueue(
+    workers=int(os.environ.get("AI_JOB_WORKERS", "2")),
+    max_queued=int(os.environ.get("AI_QUEUE_DEPTH", "64")),
+)
+
+# Largest search an AI request may ask for (depth in plies, time budget in
+# ms), so that one request cannot hold a worker indefinitely.
+MAX_DEPTH = int(os.environ.get("AI_MAX_DEPTH", "8"))
+MAX_TIME_MS = int(os.environ.get("AI_MAX_TIME_MS", "10000"))
+
+# Pondering: after each AI move, search the human's PONDER_REPLIES most likely
+# replies in the background (0 = off), time-budgeted requests for at most
+# PONDER_TIME_MS each.
+ponderer = Ponderer(
+    ai_jobs,
+    lambda state, params: make_search_run(state, params),
+    replies=int(os.environ.get("PONDER_REPLIES", "0")),
+    time_ms=int(os.environ.get("PONDER_TIME_MS", "2000")),
+)
 
 # Pydantic Models
 class MoveRequest(BaseModel):
@@ -27,6 +114,13 @@ class MoveRequest(BaseModel):
     to_node: Optional[int] = None
     capture_node: Optional[int] = None
 
+class AIRequest(BaseModel):
+    """An "ai" WebSocket message: search for 'player' and play the move."""
+    player: str = 'T'
+    time_ms: Optional[int] = None
+    depth: Optional[int] = None
+    engine: str = "minimax"
+
 class ValidMove(BaseModel):
     type: str
     from_node: Optional[int] = None
@@ -38,38 +132,89 @@ class GameStateResponse(BaseModel):
     turn: str
     goats_placed: int
     goats_captured: int
-    winner: Optional[str] = None
+    winner: Optional[str] = None # 'T', 'G', or 'D' for a draw
+    draw_reason: Optional[str] = None # 'repetition' or 'no progress'
+    quiet_plies: int = 0 # Plies since the last placement or capture
     valid_moves: List[dict] # Simplified for now, or use ValidMove
 
+class AnalyzePosition(BaseModel):
+    position: Optional[str] = None # '<nodes> <turn> <placed> <captured>', see game/notation.py
+    moves: Optional[str] = None # Or the game's move log from the start, in hex (game/movelog.py)
+    depth: Optional[int] = None # Budget for this position, else the request's
+    time_ms: Optional[int] = None
+
+class AnalyzeRequest(BaseModel):
+    positions: List[AnalyzePosition]
+    engine: str = "minimax"
+    depth: Optional[int] = None
+    time_ms: Optional[int] = None
+
+# Most positions one /analyze request may send
+MAX_ANALYZE_POSITIONS = int(os.environ.get("MAX_ANALYZE_POSITIONS", "10000"))
+
 @app.get("/")
 def read_root():
     return {"message": "Aadu Puli Aattam API"}
 
-@app.post("/new-game")
-def new_game():
-    global game_engine
-    game_engine = GameEngine()
-    return {"message": "Game Reset"}
+@app.get("/metrics")
+def get_metrics():
+    if not metrics.enabled:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
 
-@app.get("/state", response_model=GameStateResponse)
-def get_state():
-    winner = game_engine.check_winner()
-    moves = game_engine.get_valid_moves()
-    return {
-        "board": game_engine.state.board_map,
-        "turn": game_engine.state.turn,
-        "goats_placed": game_engine.state.goats_on_board,
-        "goats_captured": game_engine.state.goats_captured,
-        "winner": winner,
-        "valid_moves": moves
-    }
+def get_session(game_id: str) -> GameSession:
+    try:
+        return store.get(game_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Game not found")
 
-@app.post("/move")
-def make_move(move: MoveRequest):
-    winner = game_engine.check_winner()
-    if winner:
-        raise HTTPException(status_code=400, detail="Game Over")
+def state_snapshot(session: GameSession) -> Snapshot:
+    """The game's current state, computed and serialized once per version."""
+    with session.lock:
+        snapshot = session.snapshot
+        if snapshot is not None and snapshot.version == session.version:
+            return snapshot
+        engine = session.engine
+        moves = engine.get_valid_moves()
+        winner = engine.check_winner(moves)
+        payload = {
+            "board": dict(engine.state.board_map),
+            "turn": engine.state.turn,
+            "goats_placed": engine.state.goats_on_board,
+            "goats_captured": engine.state.goats_captured,
+            "winner": winner,
+            "draw_reason": engine.draw_reason() if winner == 'D' else None,
+            "quiet_plies": engine.state.quiet_plies,
+            "valid_moves": moves
+        }
+        body = json.dumps(payload, separators=(",", ":")).encode()
+        snapshot = Snapshot(session.version, payload, body, f'"{session.epoch}-{session.version}"')
+        session.snapshot = snapshot
+        return snapshot
+
+def state_payload(session: GameSession) -> dict:
+    """The current state as a dict. Shared by every caller until the next move: do not modify it."""
+    return state_snapshot(session).payload
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or any(tag.removeprefix("W/") == etag for tag in tags)
+
+def snapshot_response(snapshot: Snapshot, if_none_match: Optional[str] = None) -> Response:
+    """
+    Serve a snapshot's cached JSON with its ETag, or 304 Not Modified if
+    'if_none_match' (the request's If-None-Match header) already names it.
+    """
+    # no-cache: clients may keep the body but must revalidate it every time
+    headers = {"ETag": snapshot.etag, "Cache-Control": "no-cache"}
+    if etag_matches(if_none_match, snapshot.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(snapshot.body, media_type="application/json", headers=headers)
 
+def apply_move_request(session: GameSession, move: MoveRequest, ai: Optional[dict] = None) -> Snapshot:
+    """Play 'move' and push it to the game's WebSockets. 'ai' holds the search stats of an AI move."""
     # Convert Pydantic to dict for engine
     move_dict = {
         'type': move.type,
@@ -79,22 +224,413 @@ def make_move(move: MoveRequest):
         move_dict['from'] = move.from_node
     if move.capture_node is not None:
         move_dict['capture'] = move.capture_node
-        
-    print(f"Applying move: {move_dict}")
-    success = game_engine.apply_move(move_dict)
-    
-    if not success:
-        raise HTTPException(status_code=400, detail="Invalid Move")
-        
-    return get_state()
+
+    with session.lock:
+        engine = session.engine
+        if state_snapshot(session).payload["winner"]:
+            raise HTTPException(status_code=400, detail="Game Over")
+
+        logger.debug("Applying move %s to game %s", move_dict, session.game_id,
+                     extra={"game_id": session.game_id, "move": move_dict})
+        success = session.play(move_dict)
+
+        if not success:
+            raise HTTPException(status_code=400, detail="Invalid Move")
+
+        params = session.ai_params
+        if params is not None:
+            if engine.state.turn != params.player:
+                ponderer.start(session, params)  # The AI's move: think on the human's time
+            else:
+                ponderer.keep(session)  # The human's move: keep the matching search
+
+        snapshot = state_snapshot(session)
+        live.publish(session, snapshot.payload, move=move_dict, ai=ai)
+        return snapshot
+
+def check_ai_params(time_ms: Optional[int], depth: Optional[int], engine: str):
+    if time_ms is not None and time_ms <= 0:
+        raise HTTPException(status_code=400, detail="time_ms must be positive")
+    if time_ms is not None and time_ms > MAX_TIME_MS:
+        raise HTTPException(status_code=400, detail=f"time_ms must be at most {MAX_TIME_MS}")
+    if depth is not None and depth <= 0:
+        raise HTTPException(status_code=400, detail="depth must be positive")
+    if depth is not None and depth > MAX_DEPTH:
+        raise HTTPException(status_code=400, detail=f"depth must be at most {MAX_DEPTH}")
+    if engine not in ENGINES:
+        raise HTTPException(status_code=400, detail=f"Unknown engine '{engine}'")
+    if depth is not None and engine != "minimax":
+        raise HTTPException(status_code=400, detail="depth is only supported by the minimax engine")
+
+def submit_ai_job(session: GameSession, player: str, time_ms: Optional[int],
+                  depth: Optional[int], engine: str = "minimax") -> AIJob:
+    """Validate an AI request and queue its search. A newer request for the same game replaces it."""
+    check_ai_params(time_ms, depth, engine)
+    params = AIParams(player, engine, depth, time_ms)
+
+    # Search a snapshot so the game stays usable while the AI thinks
+    with session.lock:
+        state = session.engine.state.clone()
+        if state.turn != player:
+            raise HTTPException(status_code=400, detail=f"Not {player}'s turn")
+        session.ai_params = params
+        pondered = ponderer.take(session, params)
+        if pondered is not None:
+            return pondered
+
+    try:
+        return ai_jobs.submit(session.game_id, make_search_run(state, params))
+    except QueueFullError:
+        raise HTTPException(status_code=429, detail="AI is busy, try again later")
+
+def make_search_run(state, params: AIParams):
+    """Job function that searches 'state' for an AI request."""
+    ai = ENGINES[params.engine]
+
+    def run(cancelled) -> dict:
+        result = ai.search(state, params.player, depth=params.depth, time_ms=params.time_ms,
+                           stop=cancelled)
+        if not result.move:
+             raise HTTPException(status_code=400, detail="No moves available")
+
+        # Move fields stay at the top level; search stats are added alongside
+        return {
+            **result.move,
+            "engine": params.engine,
+            "depth": result.depth,
+            "nodes": result.nodes,
+            "score": result.score,
+            "pv": result.pv,
+        }
+
+    return run
+
+async def await_ai_job(job: AIJob) -> dict:
+    try:
+        return await asyncio.wrap_future(job.future)
+    except JobCancelledError:
+        raise HTTPException(status_code=409, detail="AI request was cancelled")
+
+def reset_session(session: GameSession):
+    ai_jobs.cancel_game(session.game_id)
+    with session.lock:
+        ponderer.stop(session)
+        session.reset()
+        live.publish(session, state_payload(session), full=True)
+
+# === Game sessions ===
+
+@app.post("/games")
+def create_game():
+    session = store.create()
+    return {"game_id": session.game_id, "state": state_payload(session)}
+
+@app.delete("/games/{game_id}")
+def delete_game(game_id: str):
+    if not store.delete(game_id):
+        raise HTTPException(status_code=404, detail="Game not found")
+    ai_jobs.cancel_game(game_id)
+    return {"message": "Game Deleted"}
+
+@app.post("/games/{game_id}/new-game")
+def new_game_in_session(game_id: str):
+    reset_session(get_session(game_id))
+    return {"message": "Game Reset"}
+
+@app.get("/games/{game_id}/state", response_model=GameStateResponse)
+def get_game_state(game_id: str, request: Request):
+    """The game state, with an ETag: send it back in If-None-Match to get 304 until the next move."""
+    return snapshot_response(state_snapshot(get_session(game_id)), request.headers.get("if-none-match"))
+
+@app.post("/games/{game_id}/move")
+def make_game_move(game_id: str, move: MoveRequest):
+    return snapshot_response(apply_move_request(get_session(game_id), move))
+
+@app.get("/games/{game_id}/ai-move")
+async def get_game_ai_move(game_id: str, player: str = 'T', time_ms: Optional[int] = None,
+                           depth: Optional[int] = None, engine: str = "minimax"):
+    """
+    Suggest a move for 'player'.
+    Without parameters searches to the AI's default depth. With 'time_ms'
+    deepens iteratively until the wall-clock budget is spent.
+    engine=mcts uses Monte Carlo tree search instead: its default iteration
+    count, or as many iterations as fit in 'time_ms'.
+    """
+    # Restoring the game from the log reads the disk
+    session = await run_in_threadpool(get_session, game_id)
+    job = await run_in_threadpool(submit_ai_job, session, player, time_ms, depth, engine)
+    return await await_ai_job(job)
+
+# === AI jobs ===
+
+@app.post("/games/{game_id}/ai-jobs", status_code=202)
+def create_ai_job(game_id: str, player: str = 'T', time_ms: Optional[int] = None,
+                  depth: Optional[int] = None, engine: str = "minimax"):
+    """Queue an AI search and return its job ID right away."""
+    return submit_ai_job(get_session(game_id), player, time_ms, depth, engine).to_dict()
+
+@app.get("/ai-jobs/{job_id}")
+async def get_ai_job(job_id: str, wait_ms: Optional[int] = None):
+    """Job status, with the result once done. 'wait_ms' waits up to that long for it to finish."""
+    try:
+        job = ai_jobs.get(job_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if wait_ms:
+        try:
+            await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(job.future)), wait_ms / 1000)
+        except Exception:
+            pass  # Timed out or failed; the status below says which
+    return job.to_dict()
+
+@app.delete("/ai-jobs/{job_id}")
+def cancel_ai_job(job_id: str):
+    if not ai_jobs.cancel(job_id):
+        raise HTTPException(status_code=404, detail="No active job with that ID")
+    return {"message": "Job Cancelled"}
+
+# === Batch analysis ===
+
+def parse_analysis(request: AnalyzeRequest) -> list:
+    """(state, params) per position of an /analyze request. Raises 400 naming the first bad one."""
+    if len(request.positions) > MAX_ANALYZE_POSITIONS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_ANALYZE_POSITIONS} positions per request")
+    items = []
+    for index, item in enumerate(request.positions):
+        try:
+            if (item.position is None) == (item.moves is None):
+                raise ValueError("give exactly one of 'position' and 'moves'")
+            if item.position is not None:
+                state = parse_position(item.position, store.draw_rules)
+            else:
+                state = GameEngine.replay(bytes.fromhex(item.moves), store.draw_rules).state
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Position {index}: {e}")
+        if item.depth is None and item.time_ms is None:
+            depth, time_ms = request.depth, request.time_ms
+        else:
+            depth, time_ms = item.depth, item.time_ms
+        check_ai_params(time_ms, depth, request.engine)
+        items.append((state, AIParams(state.turn, request.engine, depth, time_ms)))
+    return items
+
+MOVE_FIELDS = ("type", "from", "to", "capture")
+
+def analysis_line(index: int, state, future: asyncio.Future) -> dict:
+    line = {"index": index, "position": format_position(state)}
+    try:
+        result = future.result()
+    except HTTPException as e:
+        line["error"] = e.detail
+    except JobCancelledError:
+        line["error"] = "AI request was cancelled"
+    except Exception:
+        # One failed search must not end the stream for the other positions
+        logger.exception("Analysis of position %d (%s) failed", index, line["position"])
+        line["error"] = "Search failed"
+    else:
+        line["move"] = {key: result[key] for key in MOVE_FIELDS if key in result}
+        line.update((key, result[key]) for key in ("score", "depth", "nodes", "pv"))
+    return line
+
+async def analysis_lines(items: list):
+    """
+    Search every position on the AI worker pool and yield one NDJSON line
+    per position, in the order they finish. At most two jobs per worker are
+    queued at a time, so a large batch neither fills the queue nor starves
+    the games being played (the queue serves its callers in turn).
+    """
+    analysis_id = f"analysis-{secrets.token_urlsafe(8)}"
+    window = 2 * ai_jobs.workers
+    pending: Dict[asyncio.Future, int] = {}
+    upcoming = list(reversed(range(len(items))))  # Indexes still to submit, next last
+    try:
+        while upcoming or pending:
+            while upcoming and len(pending) < window:
+                index = upcoming[-1]
+                state, params = items[index]
+                winner = check_winner(state)
+                if winner:
+                    upcoming.pop()
+                    yield json.dumps({"index": index, "position": format_position(state),
+                                      "winner": winner, "move": None}) + "\n"
+                    continue
+                try:
+                    job = ai_jobs.submit(analysis_id, make_search_run(state, params), replace=False)
+                except QueueFullError:
+                    break  # Retry once something finishes
+                except Exception:
+                    upcoming.pop()
+                    logger.exception("Could not queue the analysis of position %d", index)
+                    yield json.dumps({"index": index, "position": format_position(state),
+                                      "error": "Search failed"}) + "\n"
+                    continue
+                upcoming.pop()
+                pending[asyncio.wrap_future(job.future)] = index
+            if not pending:
+                if upcoming:
+                    await asyncio.sleep(0.05)  # Queue full of other games' jobs
+                continue
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for future in done:
+                index = pending.pop(future)
+                yield json.dumps(analysis_line(index, items[index][0], future)) + "\n"
+    finally:
+        ai_jobs.cancel_game(analysis_id)  # Drops the rest if the client went away
+
+@app.post("/analyze")
+def analyze(request: AnalyzeRequest):
+    """
+    Analyze many positions in one request. Each position is searched like
+    /ai-move (for the side to move, with its own depth or time budget, or
+    the request's), concurrently on the AI workers, which share one
+    transposition table. The response streams one JSON object per line as
+    each search finishes: "index" (into "positions"), "position", and
+    "move", "score", "depth", "nodes", "pv" - or "winner" for a finished
+    game, or "error".
+    """
+    return StreamingResponse(analysis_lines(parse_analysis(request)), media_type="application/x-ndjson")
+
+# === Live updates ===
+
+async def play_ai_move(session: GameSession, request: AIRequest):
+    """Search for the side to move and play the result, unless the game moved on meanwhile."""
+    def submit():
+        with session.lock:
+            return session.version, submit_ai_job(session, request.player, request.time_ms,
+                                                  request.depth, request.engine)
+
+    version, job = await run_in_threadpool(submit)
+    result = await await_ai_job(job)
+    move = MoveRequest(type=result["type"], from_node=result.get("from"), to_node=result["to"],
+                       capture_node=result.get("capture"))
+    stats = {key: result[key] for key in ("engine", "depth", "nodes", "score")}
+
+    def apply():
+        with session.lock:
+            if session.version != version:
+                raise HTTPException(status_code=409, detail="Game changed while the AI was thinking")
+            apply_move_request(session, move, ai=stats)
+
+    await run_in_threadpool(apply)
+
+async def handle_socket_message(session: GameSession, subscriber: live.Subscriber, message: dict):
+    """
+    Act on one message from a game's WebSocket. Moves and resets reach every
+    subscriber through live.publish; errors only go back to the sender,
+    tagged with the message's 'id' if it had one.
+    """
+    try:
+        kind = message.get("type")
+        if kind == "move":
+            await run_in_threadpool(apply_move_request, session, MoveRequest.model_validate(message.get("move")))
+        elif kind == "ai":
+            await play_ai_move(session, AIRequest.model_validate(message))
+        elif kind == "new-game":
+            await run_in_threadpool(reset_session, session)
+        elif kind == "state":
+            def resend():
+                with session.lock:
+                    subscriber.send(live.full_state(session, state_payload(session)))
+            await run_in_threadpool(resend)
+        else:
+            raise HTTPException(status_code=400, detail=f"Unknown message type '{kind}'")
+    except HTTPException as e:
+        subscriber.send({"type": "error", "status": e.status_code, "detail": e.detail, "id": message.get("id")})
+    except ValidationError as e:
+        subscriber.send({"type": "error", "status": 422, "detail": e.errors(include_url=False),
+                         "id": message.get("id")})
+    except Exception:
+        # "ai" messages run as tasks nobody awaits: the sender is the only one to tell
+        logger.exception("Could not handle %s message for game %s", message.get("type"), session.game_id)
+        subscriber.send({"type": "error", "status": 500, "detail": "Internal server error",
+                         "id": message.get("id")})
+
+async def serve_game_socket(websocket: WebSocket, session: GameSession):
+    """
+    Push 'session' to 'websocket': the full state on connect, then a diff
+    of the changed fields after every move, whichever client played it.
+    The socket also takes requests, as JSON messages:
+
+        {"type": "move", "move": {"type": "MOVE", "from_node": 1, "to_node": 2}}
+        {"type": "ai", "player": "T", "time_ms": 500, "engine": "minimax"}
+        {"type": "new-game"}
+        {"type": "state"}
+
+    "ai" searches and plays the move on the server (its search stats come
+    with the diff as "ai"); "state" resends the full state. AI requests run
+    in the background, so the socket keeps taking messages meanwhile.
+    """
+    await websocket.accept()
+    subscriber = live.Subscriber(asyncio.get_running_loop())
+    def subscribe():
+        with session.lock:
+            live.subscribe(session, subscriber, state_payload(session))
+
+    await run_in_threadpool(subscribe)
+    sender = asyncio.create_task(subscriber.pump(websocket))
+    thinking = set()
+    try:
+        while True:
+            try:
+                message = json.loads(await websocket.receive_text())
+                if not isinstance(message, dict):
+                    raise ValueError
+            except ValueError:
+                subscriber.send({"type": "error", "status": 400, "detail": "Messages must be JSON objects"})
+                continue
+            if message.get("type") == "ai":
+                task = asyncio.create_task(handle_socket_message(session, subscriber, message))
+                thinking.add(task)
+                task.add_done_callback(thinking.discard)
+            else:
+                await handle_socket_message(session, subscriber, message)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        def unsubscribe():
+            with session.lock:
+                live.unsubscribe(session, subscriber)
+
+        await run_in_threadpool(unsubscribe)
+        for task in thinking:
+            task.cancel()
+        sender.cancel()
+
+@app.websocket("/games/{game_id}/ws")
+async def game_socket(websocket: WebSocket, game_id: str):
+    try:
+        session = await run_in_threadpool(store.get, game_id)
+    except KeyError:
+        await websocket.close(code=4404, reason="Game not found")
+        return
+    await serve_game_socket(websocket, session)
+
+# === Default game (unscoped endpoints) ===
+
+@app.post("/new-game")
+def new_game():
+    reset_session(store.get_or_create(DEFAULT_GAME_ID))
+    return {"message": "Game Reset"}
+
+@app.get("/state", response_model=GameStateResponse)
+def get_state(request: Request):
+    return snapshot_response(state_snapshot(store.get_or_create(DEFAULT_GAME_ID)),
+                             request.headers.get("if-none-match"))
+
+@app.post("/move")
+def make_move(move: MoveRequest):
+    return snapshot_response(apply_move_request(store.get_or_create(DEFAULT_GAME_ID), move))
 
 @app.get("/ai-move")
-def get_ai_move(player: str = 'T'):
-    if game_engine.state.turn != player:
-        raise HTTPException(status_code=400, detail=f"Not {player}'s turn")
-        
-    best_move = ai_player.get_best_move(game_engine.state, player)
-    if not best_move:
-         raise HTTPException(status_code=400, detail="No moves available")
-         
-    return best_move
+async def get_ai_move(player: str = 'T', time_ms: Optional[int] = None, depth: Optional[int] = None,
+                      engine: str = "minimax"):
+    """Same as /games/{game_id}/ai-move, for the default game."""
+    session = await run_in_threadpool(store.get_or_create, DEFAULT_GAME_ID)
+    job = await run_in_threadpool(submit_ai_job, session, player, time_ms, depth, engine)
+    return await await_ai_job(job)
+
+@app.websocket("/ws")
+async def default_game_socket(websocket: WebSocket):
+    """Same as /games/{game_id}/ws, for the default game."""
+    await serve_game_socket(websocket, await run_in_threadpool(store.get_or_create, DEFAULT_GAME_ID))
@@ -0,0 +1,212 @@
+"""
+Counters and histograms served at /metrics in the Prometheus text format.
+
+Kept dependency-free: a Registry hands out instruments and renders them.
+A disabled registry hands out instruments that do nothing, so code can
+record unconditionally and pay one no-op call when metrics are off.
+"""
+import bisect
+import math
+import threading
+import time
+from typing import Dict, List, Sequence, Tuple
+
+# Request latency, seconds
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+DEPTH_BUCKETS = tuple(range(1, 13))
+NODES_PER_SECOND_BUCKETS = (1e3, 2.5e3, 5e3, 1e4, 2.5e4, 5e4, 1e5, 2.5e5, 5e5, 1e6)
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for v in values)
+    return "{" + ",".join(f'{name}="{value}"' for name, value in zip(names, escaped)) + "}"
+
+
+class Counter:
+    """A monotonically increasing count per label combination."""
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values: Dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, *label_values: str):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def value(self, *label_values: str) -> float:
+        return self._values.get(label_values, 0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for label_values, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labels, label_values)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    """Observations counted into fixed 'buckets' (upper bounds), per label combination."""
+
+    def __init__(self, name: str, help: str, buckets: Sequence[float], labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # label values -> (count per bucket, not cumulative; sum)
+        self._values: Dict[tuple, Tuple[List[int], List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.get(label_values) or self._values.setdefault(
+                label_values, ([0] * len(self.buckets), [0.0]))
+            counts[index] += 1
+            total[0] += value
+
+    def count(self, *label_values: str) -> int:
+        entry = self._values.get(label_values)
+        return sum(entry[0]) if entry else 0
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for label_values, (counts, total) in sorted(self._values.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, counts):
+                    cumulative += count
+                    labels = _format_labels(self.labels + ("le",), label_values + (_format_value(bound),))
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                labels = _format_labels(self.labels, label_values)
+                lines.append(f"{self.name}_sum{labels} {_format_value(total[0])}")
+                lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class _NullInstrument:
+    """What a disabled registry hands out: records nothing."""
+
+    def inc(self, *args):
+        pass
+
+    def observe(self, *args):
+        pass
+
+
+NULL_INSTRUMENT = _NullInstrument()
+
+
+class Registry:
+    """The instruments behind one /metrics page."""
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._metrics = []
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()):
+        return self._add(Counter(name, help, labels))
+
+    def histogram(self, name: str, help: str, buckets: Sequence[float], labels: Sequence[str] = ()):
+        return self._add(Histogram(name, help, buckets, labels))
+
+    def _add(self, metric):
+        if not self.enabled:
+            return NULL_INSTRUMENT
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+class SearchMetrics:
+    """
+    What MinimaxAI records about each search (see MinimaxAI.search): node
+    counts, speed, depth reached, transposition table probes and hits, and
+    expanded nodes and beta cutoffs. Hit and cutoff rates are ratios of
+    these counters, e.g. rate(apa_tt_hits_total) / rate(apa_tt_probes_total).
+    """
+
+    def __init__(self, registry: Registry, engine: str = "minimax"):
+        self.engine = engine
+        self.searches = registry.counter("apa_searches_total", "AI searches run.", ["engine"])
+        self.nodes = registry.counter("apa_search_nodes_total", "Nodes visited by AI searches.", ["engine"])
+        self.seconds = registry.histogram("apa_search_seconds", "Wall-clock time of AI searches.",
+                                          LATENCY_BUCKETS, ["engine"])
+        self.nodes_per_second = registry.histogram("apa_search_nodes_per_second", "Search speed.",
+                                                   NODES_PER_SECOND_BUCKETS, ["engine"])
+        self.depth = registry.histogram("apa_search_depth", "Deepest iteration each search completed.",
+                                        DEPTH_BUCKETS, ["engine"])
+        self.tt_probes = registry.counter("apa_tt_probes_total", "Transposition table lookups.", ["engine"])
+        self.tt_hits = registry.counter("apa_tt_hits_total", "Transposition table lookups that found an entry.",
+                                        ["engine"])
+        self.expanded = registry.counter("apa_search_expanded_total", "Interior nodes whose moves were searched.",
+                                         ["engine"])
+        self.cutoffs = registry.counter("apa_beta_cutoffs_total", "Expanded nodes that ended in a beta cutoff.",
+                                        ["engine"])
+
+    def record_search(self, ctx, depth: int, seconds: float):
+        """Record a finished search from its SearchContext."""
+        engine = self.engine
+        self.searches.inc(1, engine)
+        self.nodes.inc(ctx.nodes, engine)
+        self.seconds.observe(seconds, engine)
+        if seconds > 0:
+            self.nodes_per_second.observe(ctx.nodes / seconds, engine)
+        self.depth.observe(depth, engine)
+        self.tt_probes.inc(ctx.tt_probes, engine)
+        self.tt_hits.inc(ctx.tt_hits, engine)
+        self.expanded.inc(ctx.expanded, engine)
+        self.cutoffs.inc(ctx.cutoffs, engine)
+
+
+class RequestMetrics:
+    """
+    ASGI middleware counting HTTP requests and timing them, by method,
+    route template (e.g. /games/{game_id}/move) and status.
+    """
+
+    def __init__(self, app, registry: Registry):
+        self.app = app
+        self.requests = registry.counter("apa_http_requests_total", "HTTP requests served.",
+                                         ["method", "route", "status"])
+        self.latency = registry.histogram("apa_http_request_seconds", "HTTP request latency.",
+                                          LATENCY_BUCKETS, ["method", "route"])
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        start = time.perf_counter()
+        status = 500
+
+        async def send_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_status)
+        finally:
+            # The router records the matched route in the scope
+            route = scope.get("route")
+            path = getattr(route, "path", "unmatched")
+            method = scope["method"]
+            self.requests.inc(1, method, path, str(status))
+            self.latency.observe(time.perf_counter() - start, method, path)
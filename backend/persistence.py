@@ -0,0 +1,188 @@
+import logging
+from contextlib import closing
+import queue
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    game_id TEXT PRIMARY KEY,
+    updated REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS moves (
+    id INTEGER PRIMARY KEY,
+    game_id TEXT NOT NULL,
+    data BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS moves_by_game ON moves (game_id, id);
+"""
+
+# Queued operations
+_APPEND, _START, _DELETE, _TOUCH, _FLUSH, _STOP = range(6)
+
+
+class GameLog:
+    """
+    Durable move logs of every game, in SQLite.
+
+    A game's log is its moves in the one-byte format of game/movelog.py,
+    stored as chunks in the 'moves' table. Writes never touch the disk on
+    the caller's thread: append(), start() and delete() queue the change,
+    and a writer thread commits whatever has queued up, every 'interval'
+    seconds at most, in one transaction, merging the appends of each game
+    into one chunk. A crash loses at most the last 'interval' of moves.
+
+    Reads (load, prune) see every change queued before them.
+
+    With 'max_age', the writer also deletes games unchanged (see touch())
+    for longer than that, at startup and then every 'prune_interval' seconds.
+    """
+
+    def __init__(self, path: str, interval: float = 0.05, max_batch: int = 10000,
+                 clock: Callable[[], float] = time.time, max_age: Optional[float] = None,
+                 prune_interval: float = 600):
+        self.path = path
+        self.interval = interval
+        self.max_batch = max_batch
+        self.max_age = max_age
+        self.prune_interval = prune_interval
+        self._clock = clock
+        self._queue: "queue.Queue[tuple]" = queue.Queue()
+        with closing(self._connect()) as db:
+            db.executescript(SCHEMA)
+        self._writer = threading.Thread(target=self._write_loop, name="game-log", daemon=True)
+        self._writer.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self.path, timeout=30)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        return db
+
+    # === Writes (queued) ===
+
+    def start(self, game_id: str):
+        """Begin an empty log for 'game_id', replacing any earlier one."""
+        self._queue.put((_START, game_id, self._clock()))
+
+    def append(self, game_id: str, data: bytes):
+        """Add moves to the end of a game's log."""
+        self._queue.put((_APPEND, game_id, data))
+
+    def delete(self, game_id: str):
+        self._queue.put((_DELETE, game_id, None))
+
+    def touch(self, game_id: str):
+        """Mark a game as still in use, so pruning keeps it."""
+        self._queue.put((_TOUCH, game_id, None))
+
+    def flush(self):
+        """Wait until everything queued so far is committed."""
+        if not self._writer.is_alive():
+            return
+        done = threading.Event()
+        self._queue.put((_FLUSH, None, done))
+        done.wait()
+
+    def close(self):
+        """Commit what is queued and stop the writer."""
+        if self._writer.is_alive():
+            self._queue.put((_STOP, None, None))
+            self._writer.join()
+
+    # === Reads ===
+
+    def load(self, game_id: str, max_age: Optional[float] = None) -> Optional[bytes]:
+        """
+        The log of 'game_id', or None if there is none or it has not changed
+        for more than 'max_age' seconds.
+        """
+        self.flush()
+        with closing(self._connect()) as db:
+            row = db.execute("SELECT updated FROM games WHERE game_id = ?", (game_id,)).fetchone()
+            if row is None or (max_age is not None and self._clock() - row[0] > max_age):
+                return None
+            chunks = db.execute("SELECT data FROM moves WHERE game_id = ? ORDER BY id", (game_id,))
+            return b"".join(chunk for (chunk,) in chunks)
+
+    def prune(self, max_age: float) -> int:
+        """Delete every game unchanged for more than 'max_age' seconds. Returns how many were deleted."""
+        self.flush()
+        with closing(self._connect()) as db, db:
+            return self._delete_stale(db, max_age)
+
+    def _delete_stale(self, db: sqlite3.Connection, max_age: float) -> int:
+        oldest = self._clock() - max_age
+        stale = "SELECT game_id FROM games WHERE updated < ?"
+        db.execute(f"DELETE FROM moves WHERE game_id IN ({stale})", (oldest,))
+        return db.execute("DELETE FROM games WHERE updated < ?", (oldest,)).rowcount
+
+    # === Writer thread ===
+
+    def _write_loop(self):
+        db = self._connect()
+        running = True
+        next_prune = time.monotonic()
+        while running:
+            if self.max_age is not None and time.monotonic() >= next_prune:
+                try:
+                    with db:
+                        pruned = self._delete_stale(db, self.max_age)
+                    logger.info("Pruned %d stale games from the game log", pruned)
+                except sqlite3.Error:
+                    logger.exception("Could not prune the game log")
+                next_prune = time.monotonic() + self.prune_interval
+            try:
+                wait = max(0, next_prune - time.monotonic()) if self.max_age is not None else None
+                batch = [self._queue.get(timeout=wait)]
+            except queue.Empty:
+                continue  # Time to prune
+            deadline = time.monotonic() + self.interval
+            while len(batch) < self.max_batch and batch[-1][0] not in (_FLUSH, _STOP):
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            try:
+                with db:
+                    self._commit(db, batch)
+            except sqlite3.Error:
+                logger.exception("Could not write %d game log changes", len(batch))
+            for kind, _, done in batch:
+                if kind == _FLUSH:
+                    done.set()
+                elif kind == _STOP:
+                    running = False
+        db.close()
+
+    def _commit(self, db: sqlite3.Connection, batch: List[tuple]):
+        now = self._clock()
+        # Moves appended per game since its last start/delete in this batch
+        appended: Dict[str, bytearray] = {}
+        touched = set()
+        for kind, game_id, value in batch:
+            if kind == _APPEND:
+                appended.setdefault(game_id, bytearray()).extend(value)
+            elif kind == _TOUCH:
+                touched.add(game_id)
+            elif kind in (_START, _DELETE):
+                appended.pop(game_id, None)  # Superseded
+                db.execute("DELETE FROM moves WHERE game_id = ?", (game_id,))
+                if kind == _START:
+                    db.execute("INSERT OR REPLACE INTO games (game_id, updated) VALUES (?, ?)",
+                               (game_id, value))
+                else:
+                    db.execute("DELETE FROM games WHERE game_id = ?", (game_id,))
+        rows: List[Tuple[str, bytes]] = [(game_id, bytes(data)) for game_id, data in appended.items()]
+        # Moves of a deleted game are dropped
+        db.executemany("INSERT INTO moves (game_id, data) SELECT ?1, ?2 "
+                       "WHERE EXISTS (SELECT 1 FROM games WHERE game_id = ?1)", rows)
+        db.executemany("UPDATE games SET updated = ? WHERE game_id = ?",
+                       [(now, game_id) for game_id in touched.union(appended)])
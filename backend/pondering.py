@@ -0,0 +1,128 @@
+from typing import Callable, Dict, List, NamedTuple, Optional
+from game.engine import GameState, apply_move
+from game.bitboard import BitState, Move, move_to_dict
+from ai.evaluation import evaluate
+from jobs import AIJob, AIJobQueue, CANCELLED, FAILED
+
+
+class AIParams(NamedTuple):
+    """What an AI request asked for. Pondered results are only reused for the same request."""
+    player: str
+    engine: str
+    depth: Optional[int]
+    time_ms: Optional[int]
+
+    def covers(self, other: "AIParams") -> bool:
+        """Whether a search run for these params answers 'other': the same request, with no less time."""
+        if self._replace(time_ms=None) != other._replace(time_ms=None):
+            return False
+        if self.time_ms is None or other.time_ms is None:
+            return self.time_ms is None and other.time_ms is None
+        return self.time_ms >= other.time_ms
+
+
+# Builds the job function that searches 'state' for 'params'
+RunFactory = Callable[[GameState, AIParams], Callable]
+
+
+def likely_replies(state: GameState, count: int) -> List[Move]:
+    """
+    The opponent's 'count' most likely moves: the ones that look best for
+    them one ply deep on the static evaluation.
+    """
+    board = BitState.from_game_state(state)
+    moves = board.generate_moves()
+    sign = 1 if board.turn == 'T' else -1
+
+    def score(move: Move) -> int:
+        board.make_move(move)
+        value = evaluate(board)
+        board.unmake_move(move)
+        return sign * value
+
+    moves.sort(key=score, reverse=True)
+    return moves[:count]
+
+
+class Ponderer:
+    """
+    Searches ahead while the human thinks.
+
+    After the AI's move is played, start() queues a background search for
+    each of the human's 'replies' most likely answers (time-budgeted
+    requests get at most 'time_ms' each). When the human moves, keep()
+    cancels all but the search for the position actually reached, and take()
+    hands that search to the next AI request. Searches also fill the shared transposition table, so even a
+    missed guess is not wasted. replies=0 turns pondering off.
+
+    Slots live on the GameSession ('ponder'); hold session.lock around calls.
+    """
+
+    def __init__(self, queue: AIJobQueue, make_run: RunFactory, replies: int = 0,
+                 time_ms: int = 2000):
+        self.queue = queue
+        self.make_run = make_run
+        self.replies = replies
+        self.time_ms = time_ms
+
+    def start(self, session, params: AIParams):
+        """Ponder the human's replies to the position in 'session'."""
+        self.stop(session)
+        if self.replies <= 0:
+            return
+        state = session.engine.state
+        if session.engine.check_winner():
+            return
+        # Time-budgeted requests are pondered for at most self.time_ms each;
+        # fixed-depth (or fixed-iteration) searches are bounded already
+        time_ms = min(params.time_ms, self.time_ms) if params.time_ms else None
+        budget = params._replace(time_ms=time_ms)
+        slots: Dict[int, AIJob] = {}
+        for move in likely_replies(state, self.replies):
+            # Played on a copy of the game, so the search sees its draw rules and history
+            child = state.clone()
+            apply_move(child, move_to_dict(move))
+            job = self.queue.submit(session.game_id, self.make_run(child, budget),
+                                    replace=False, background=True)
+            if job is None:
+                break  # Background queue full: ponder less
+            slots[BitState.from_game_state(child).key] = job
+        session.ponder = slots
+        session.ponder_params = budget
+
+    def keep(self, session):
+        """The human has moved: cancel every search except the one for this position."""
+        slots = session.ponder
+        if not slots:
+            return
+        key = BitState.from_game_state(session.engine.state).key
+        for slot_key, job in list(slots.items()):
+            if slot_key != key:
+                self.queue.cancel(job.job_id)
+                del slots[slot_key]
+
+    def take(self, session, params: AIParams) -> Optional[AIJob]:
+        """
+        The pondered search for the current position, if it answers 'params'
+        (a search capped below the requested time does not). A search still
+        waiting in the background lane moves to the game's regular queue.
+        Clears every slot either way.
+        """
+        slots, session.ponder = session.ponder, {}
+        if not slots or not session.ponder_params.covers(params):
+            for job in slots.values():
+                self.queue.cancel(job.job_id)
+            return None
+        key = BitState.from_game_state(session.engine.state).key
+        job = slots.pop(key, None)
+        for other in slots.values():
+            self.queue.cancel(other.job_id)
+        if job is None or job.status in (CANCELLED, FAILED):
+            return None
+        self.queue.promote(job.job_id)
+        return job
+
+    def stop(self, session):
+        for job in session.ponder.values():
+            self.queue.cancel(job.job_id)
+        session.ponder = {}
@@ -0,0 +1,238 @@
+import logging
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, NamedTuple, Optional
+from game.engine import GameEngine, DrawRules, DEFAULT_DRAW_RULES
+from persistence import GameLog
+
+logger = logging.getLogger(__name__)
+
+
+class Snapshot(NamedTuple):
+    """A game's state at one version, as served to clients."""
+    version: int
+    payload: dict
+    body: bytes  # 'payload' as JSON
+    etag: str
+
+
+class GameSession:
+    """
+    One game hosted by the server. Hold 'lock' while reading or changing 'engine'.
+    With a 'log', every move and reset is also recorded there.
+    """
+
+    def __init__(self, game_id: str, now: float, draw_rules: DrawRules = DEFAULT_DRAW_RULES,
+                 engine: Optional[GameEngine] = None, log: Optional[GameLog] = None):
+        self.game_id = game_id
+        self.draw_rules = draw_rules
+        self.engine = engine or GameEngine(draw_rules)
+        self.log = log
+        self.lock = threading.RLock()
+        self.created = now
+        self.last_access = now
+        # When the game log was last told this game is in use (GameLog.touch)
+        self.touched = now
+        # Last AI request, and background searches of the replies to it (pondering.py)
+        self.ai_params = None
+        self.ponder = {}
+        self.ponder_params = None
+        # Bumped on every change. 'epoch' tells apart sessions that reuse an ID,
+        # so their ETags never collide; 'snapshot' caches the current state.
+        self.version = 0
+        self.epoch = secrets.token_hex(4)
+        self.snapshot: Optional[Snapshot] = None
+        # WebSockets watching this game (live.py) and the last state pushed to them
+        self.subscribers = set()
+        self.published = None
+
+    def reset(self):
+        """Start this game over, keeping its ID and subscribers."""
+        self.engine = GameEngine(self.draw_rules)
+        self.changed()
+        self.ai_params = None
+        self.ponder = {}
+        self.ponder_params = None
+        if self.log is not None:
+            self.log.start(self.game_id)
+
+    def play(self, move: dict) -> bool:
+        """Apply 'move' if it is legal, recording the change. Returns True if it was played."""
+        if not self.engine.apply_move(move):
+            return False
+        self.changed()
+        if self.log is not None:
+            self.log.append(self.game_id, bytes(self.engine.state.move_log[-1:]))
+        return True
+
+    def changed(self):
+        """Record a change to 'engine', making the cached snapshot stale."""
+        self.version += 1
+
+
+class GameStore:
+    """
+    In-memory store of game sessions.
+
+    Holds at most 'max_games' games. Creating a game beyond the cap evicts
+    the least recently used one, and a game untouched for 'ttl_seconds' is
+    dropped the next time the store sweeps or someone asks for it.
+    Every game is played under 'draw_rules'.
+
+    With a 'game_log', games outlive the process: asking for a game that is
+    not in memory (after a restart, or once evicted) rebuilds it by
+    replaying its log, if it has been used within the TTL. IDs found in
+    neither place are remembered (up to 'max_games' of them), so asking
+    again does not read the disk. Games in use are touched in the log at
+    least every half TTL, so the log does not prune them.
+    """
+
+    def __init__(self, max_games: int = 10000, ttl_seconds: float = 3600,
+                 clock: Callable[[], float] = time.monotonic,
+                 draw_rules: DrawRules = DEFAULT_DRAW_RULES,
+                 game_log: Optional[GameLog] = None):
+        self.max_games = max_games
+        self.ttl_seconds = ttl_seconds
+        self.draw_rules = draw_rules
+        self.game_log = game_log
+        self._clock = clock
+        # Ordered from least to most recently used
+        self._games: "OrderedDict[str, GameSession]" = OrderedDict()
+        # IDs the game log does not have, least recently asked for first
+        self._missing: "OrderedDict[str, None]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def create(self, game_id: Optional[str] = None) -> GameSession:
+        with self._lock:
+            if game_id is None:
+                game_id = secrets.token_urlsafe(8)
+                while game_id in self._games:
+                    game_id = secrets.token_urlsafe(8)
+            return self._create_locked(game_id)
+
+    def _create_locked(self, game_id: str) -> GameSession:
+        session = self._add(game_id)
+        if self.game_log is not None:
+            self.game_log.start(game_id)
+        return session
+
+    def _add(self, game_id: str, engine: Optional[GameEngine] = None) -> GameSession:
+        now = self._clock()
+        self._evict_expired(now)
+        while len(self._games) >= self.max_games:
+            self._games.popitem(last=False)
+        session = GameSession(game_id, now, self.draw_rules, engine, self.game_log)
+        self._games[game_id] = session
+        self._missing.pop(game_id, None)
+        return session
+
+    def _remember_missing(self, game_id: str):
+        self._missing[game_id] = None
+        self._missing.move_to_end(game_id)
+        while len(self._missing) > self.max_games:
+            self._missing.popitem(last=False)
+
+    def get(self, game_id: str) -> GameSession:
+        """
+        Return the session and mark it used. Raises KeyError if unknown or
+        expired (and, with a game log, not restorable from it).
+        """
+        try:
+            return self._get(game_id)
+        except KeyError:
+            if self.game_log is None or game_id in self._missing:
+                raise
+        # Replay outside the lock: it reads the disk
+        try:
+            engine = self._replay(game_id)
+        except KeyError:
+            with self._lock:
+                if game_id not in self._games:  # Not created meanwhile
+                    self._remember_missing(game_id)
+            raise
+        with self._lock:
+            session = self._games.get(game_id)
+            if session is None:  # Not restored by someone else meanwhile
+                session = self._add(game_id, engine)
+            return session
+
+    def _replay(self, game_id: str) -> GameEngine:
+        log = self.game_log.load(game_id, max_age=self.ttl_seconds)
+        if log is None:
+            raise KeyError(game_id)
+        try:
+            return GameEngine.replay(log, self.draw_rules)
+        except ValueError as e:
+            logger.warning("Cannot restore game %s: %s", game_id, e)
+            raise KeyError(game_id)
+
+    def _get(self, game_id: str) -> GameSession:
+        with self._lock:
+            now = self._clock()
+            session = self._games.get(game_id)
+            if session is None:
+                raise KeyError(game_id)
+            if now - session.last_access > self.ttl_seconds:
+                del self._games[game_id]
+                raise KeyError(game_id)
+            self._touch(session, now)
+            return session
+
+    def _touch(self, session: GameSession, now: float):
+        session.last_access = now
+        self._games.move_to_end(session.game_id)
+        if self.game_log is not None and now - session.touched > self.ttl_seconds / 2:
+            session.touched = now
+            self.game_log.touch(session.game_id)
+
+    def get_or_create(self, game_id: str) -> GameSession:
+        """
+        The session of 'game_id', restored or created if need be. Concurrent
+        first requests for an ID all get the same session.
+        """
+        try:
+            return self.get(game_id)
+        except KeyError:
+            pass
+        with self._lock:
+            session = self._games.get(game_id)
+            if session is not None:  # Restored or created by someone else meanwhile
+                self._touch(session, self._clock())
+                return session
+            return self._create_locked(game_id)
+
+    def delete(self, game_id: str) -> bool:
+        with self._lock:
+            deleted = self._games.pop(game_id, None) is not None
+        if self.game_log is not None:
+            # The game may only be on disk
+            deleted = deleted or self.game_log.load(game_id) is not None
+            self.game_log.delete(game_id)
+            with self._lock:
+                if game_id not in self._games:
+                    self._remember_missing(game_id)
+        return deleted
+
+    def evict_expired(self) -> int:
+        """Drop every game idle longer than the TTL. Returns how many were dropped."""
+        with self._lock:
+            return self._evict_expired(self._clock())
+
+    def _evict_expired(self, now: float) -> int:
+        # LRU order is also last-access order, so expired games are at the front
+        evicted = 0
+        while self._games:
+            session = next(iter(self._games.values()))
+            if now - session.last_access <= self.ttl_seconds:
+                break
+            self._games.popitem(last=False)
+            evicted += 1
+        return evicted
+
+    def __len__(self) -> int:
+        return len(self._games)
+
+    def __contains__(self, game_id: str) -> bool:
+        return game_id in self._games
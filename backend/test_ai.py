@@ -1,5 +1,9 @@
-from game.engine import GameEngine
-from ai.ai_player import MinimaxAI
+from game.engine import DrawRules, GameEngine
+from ai.ai_player import MinimaxAI, SearchContext, compare_ordering
+from ai.ordering import MoveOrderer
+from game.bitboard import BitState, CAPTURE, MOVE
+from ai.transposition import TranspositionTable, EXACT, LOWER
+from test_engine import movement_game, SHUFFLE
 
 def test_ai():
     game = GameEngine()
@@ -24,5 +28,194 @@ def test_ai():
 
     print("AI Test Passed!")
 
+def test_transposition_table_bounded():
+    tt = TranspositionTable(size_bits=4)
+    for key in range(1000):
+        tt.store(key, 1, EXACT, key, None)
+    # Never holds more entries than slots
+    assert len(tt) <= tt.size == 16
+    assert tt.probe(999)[3] == 999
+    # A shallower result from the same search does not evict a deeper one
+    tt.store(1 << 20, 5, EXACT, 1, None)
+    tt.store(2 << 20, 2, LOWER, 2, None)
+    assert tt.probe(1 << 20) is not None
+    assert tt.probe(2 << 20) is None
+    # ...but anything from an older search is replaceable
+    tt.new_search()
+    tt.store(2 << 20, 2, LOWER, 2, None)
+    assert tt.probe(2 << 20) is not None
+
+def test_ai_keeps_table_between_moves():
+    game = GameEngine()
+    game.apply_move({'type': 'PLACE', 'to': 1})
+    ai = MinimaxAI(depth=3)
+    first = ai.get_best_move(game.state, 'T')
+    assert len(ai.tt) > 0
+    # Same position again is answered consistently from the warm table
+    assert ai.get_best_move(game.state, 'T') == first
+    ai.new_game()
+    assert len(ai.tt) == 0
+
+def test_time_budgeted_search():
+    import time
+    game = GameEngine()
+    ai = MinimaxAI()
+    start = time.perf_counter()
+    result = ai.search(game.state, 'G', time_ms=150)
+    elapsed = time.perf_counter() - start
+    assert result.move is not None and result.move['type'] == 'PLACE'
+    assert result.depth >= 1
+    assert result.nodes > 0
+    assert result.pv[0] == result.move
+    # Budget is respected with some slack for the last clock check
+    assert elapsed < 1.0
+
+def test_fixed_depth_search_reports_depth():
+    game = GameEngine()
+    game.apply_move({'type': 'PLACE', 'to': 1})
+    result = MinimaxAI().search(game.state, 'T', depth=3)
+    assert result.depth == 3
+    assert 1 <= len(result.pv) <= 3
+
+def test_captures_ordered_first():
+    game = GameEngine()
+    # Goat at 2 can be jumped by the Tigers at 0 and 3
+    game.apply_move({'type': 'PLACE', 'to': 2})
+    bits = BitState.from_game_state(game.state)
+    moves = MoveOrderer().order(bits, bits.generate_moves(), 0)
+    assert [m[0] for m in moves[:2]] == [CAPTURE, CAPTURE]
+    assert all(m[0] != CAPTURE for m in moves[2:])
+
+def test_ordering_reduces_nodes():
+    game = GameEngine()
+    for node in (1, 7, 12):
+        game.apply_move({'type': 'PLACE', 'to': node})
+        moves = game.get_valid_moves()
+        game.apply_move(moves[0])
+    counts = compare_ordering(game.state, game.state.turn, depth=4)
+    assert counts['on'] < counts['off']
+
+def test_parallel_matches_serial():
+    from ai.parallel import shutdown_pool
+    game = GameEngine()
+    positions = []
+    for node in (1, 7, 12, 20):
+        game.apply_move({'type': 'PLACE', 'to': node})
+        positions.append(game.state.clone())
+        game.apply_move(game.get_valid_moves()[-1])
+        positions.append(game.state.clone())
+    try:
+        for state in positions:
+            serial = MinimaxAI(depth=4, tt_size_bits=0).search(state, state.turn)
+            parallel = MinimaxAI(depth=4, tt_size_bits=0, parallel=2).search(state, state.turn)
+            assert parallel.move == serial.move
+            assert parallel.score == serial.score
+    finally:
+        shutdown_pool()
+
+def test_concurrent_searches_match_serial():
+    from concurrent.futures import ThreadPoolExecutor
+    import random
+    rng = random.Random(7)
+    states = []
+    for _ in range(12):
+        game = GameEngine()
+        for _ in range(rng.randint(0, 30)):
+            moves = game.get_valid_moves()
+            if game.check_winner() or not moves:
+                break
+            game.apply_move(rng.choice(moves))
+        if not game.check_winner():
+            states.append(game.state)
+
+    # Without a shared table every search is fully determined by its position
+    shared = MinimaxAI(depth=3, tt_size_bits=0)
+    expected = [MinimaxAI(depth=3, tt_size_bits=0).search(s, s.turn) for s in states]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda s: shared.search(s, s.turn), states * 4))
+    for i, result in enumerate(results):
+        want = expected[i % len(states)]
+        assert (result.move, result.score, result.nodes) == (want.move, want.score, want.nodes)
+
+    # With the shared table, concurrent searches still return legal moves
+    shared = MinimaxAI(depth=3)
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda s: shared.search(s, s.turn), states * 4))
+    for i, result in enumerate(results):
+        state = states[i % len(states)]
+        game = GameEngine()
+        game.state = state.clone()
+        assert result.move in game.get_valid_moves()
+
+def test_quiescence_sees_past_the_horizon():
+    # The goat on 2 hangs (3 jumps it to 1). At depth 1 the capture is past
+    # the horizon, so only quiescence search sees that placing on 1 saves it.
+    game = GameEngine()
+    for move in ({'type': 'PLACE', 'to': 2}, {'type': 'MOVE', 'from': 0, 'to': 5}):
+        game.apply_move(move)
+
+    def leaves_capture(move):
+        board = BitState.from_game_state(game.state)
+        board.make_move((0, -1, move['to'], -1))
+        return board.tiger_captures() != []
+
+    blind = MinimaxAI(depth=1, quiescence=False).search(game.state, 'G')
+    assert blind.move == {'type': 'PLACE', 'to': 0} and leaves_capture(blind.move)
+    result = MinimaxAI(depth=1).search(game.state, 'G')
+    assert result.move == {'type': 'PLACE', 'to': 1} and not leaves_capture(result.move)
+
+
+def test_quiescence_restores_state():
+    game = GameEngine()
+    for move in ({'type': 'PLACE', 'to': 2}, {'type': 'MOVE', 'from': 0, 'to': 5},
+                 {'type': 'PLACE', 'to': 9}):
+        game.apply_move(move)
+    board = BitState.from_game_state(game.state)
+    before = board.copy()
+    ai = MinimaxAI(depth=2)
+    for is_max in (True, False):
+        ai.quiesce(board, -10 ** 6, 10 ** 6, is_max, 0, SearchContext())
+        assert board == before
+
+def test_search_scores_repetition_as_draw():
+    game = movement_game()
+    for move in SHUFFLE[:3]:
+        game.apply_move(move)
+    board = BitState.from_game_state(game.state)
+    ctx = SearchContext()
+    ctx.track_draws(game.state, board)
+    seen = set(ctx.seen)
+    # Tiger 2 -> 3 brings back the position the game started from
+    board.make_move((MOVE, 2, 3, -1))
+    assert ctx.is_draw(board, 1)
+    assert not SearchContext().is_draw(board, 1)
+    board.unmake_move((MOVE, 2, 3, -1))
+    assert MinimaxAI(quiescence=False).minimax(board, 3, -10 ** 6, 10 ** 6, True, 0, ctx) >= 0
+    # Positions on the search path are dropped again on the way back up
+    assert ctx.seen == seen
+
+def test_draws_stay_out_of_the_shared_table():
+    # Two plies from the no-progress limit: every quiet line is a draw
+    game = movement_game(DrawRules(repetitions=0, no_progress_plies=10))
+    game.state.quiet_plies = 8
+    ai = MinimaxAI(depth=3)
+    assert ai.search(game.state, 'G').score == 0
+    # The same position without that history is searched on its merits
+    fresh = movement_game().state
+    assert ai.search(fresh, 'G').score == MinimaxAI(depth=3).search(fresh, 'G').score != 0
+
+
 if __name__ == "__main__":
     test_ai()
+    test_transposition_table_bounded()
+    test_ai_keeps_table_between_moves()
+    test_time_budgeted_search()
+    test_fixed_depth_search_reports_depth()
+    test_captures_ordered_first()
+    test_ordering_reduces_nodes()
+    test_parallel_matches_serial()
+    test_concurrent_searches_match_serial()
+    test_quiescence_sees_past_the_horizon()
+    test_quiescence_restores_state()
+    test_search_scores_repetition_as_draw()
+    test_draws_stay_out_of_the_shared_table()
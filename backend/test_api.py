@@ -1,5 +1,15 @@
+import json
+import threading
+import time
+import pytest
 from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+import main
 from main import app
+from pondering import likely_replies
+from game.movelog import encode_moves
+from game.notation import format_position, parse_position
+from test_engine import movement_game, SHUFFLE
 
 client = TestClient(app)
 
@@ -42,10 +52,362 @@ def test_ai_move():
     assert response.status_code == 200
     move = response.json()
     assert move["type"] in ["MOVE", "CAPTURE"]
+
+def test_ai_move_time_budget():
+    client.post("/new-game")
+    response = client.get("/ai-move?player=G&time_ms=200")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["type"] == "PLACE"
+    assert data["depth"] >= 1
+    assert data["nodes"] > 0
+    assert "score" in data
+
+    response = client.get("/ai-move?player=G&time_ms=0")
+    assert response.status_code == 400
+    # Budgets are capped so one request cannot hold a worker for long
+    response = client.get(f"/ai-move?player=G&time_ms={main.MAX_TIME_MS + 1}")
+    assert response.status_code == 400
+    response = client.get(f"/ai-move?player=G&depth={main.MAX_DEPTH + 1}")
+    assert response.status_code == 400
+    assert "at most" in response.json()["detail"]
     
+def test_games_are_independent():
+    first = client.post("/games").json()
+    second = client.post("/games").json()
+    assert first["game_id"] != second["game_id"]
+    assert first["state"]["turn"] == "G"
+
+    response = client.post(f"/games/{first['game_id']}/move", json={"type": "PLACE", "to_node": 1})
+    assert response.status_code == 200
+    assert response.json()["board"]["1"] == "G"
+
+    # The other game is untouched
+    data = client.get(f"/games/{second['game_id']}/state").json()
+    assert data["board"]["1"] is None
+    assert data["turn"] == "G"
+
+    response = client.get(f"/games/{first['game_id']}/ai-move?player=T")
+    assert response.status_code == 200
+    assert response.json()["type"] in ["MOVE", "CAPTURE"]
+
+    client.post(f"/games/{first['game_id']}/new-game")
+    data = client.get(f"/games/{first['game_id']}/state").json()
+    assert data["goats_placed"] == 0
+
+def test_unknown_game():
+    assert client.get("/games/nope/state").status_code == 404
+    assert client.post("/games/nope/move", json={"type": "PLACE", "to_node": 1}).status_code == 404
+    game_id = client.post("/games").json()["game_id"]
+    assert client.delete(f"/games/{game_id}").status_code == 200
+    assert client.get(f"/games/{game_id}/state").status_code == 404
+
+def test_ai_job_submit_and_poll():
+    game_id = client.post("/games").json()["game_id"]
+    client.post(f"/games/{game_id}/move", json={"type": "PLACE", "to_node": 1})
+    response = client.post(f"/games/{game_id}/ai-jobs?player=T")
+    assert response.status_code == 202
+    job = response.json()
+    assert job["status"] in ["queued", "running", "done"]
+
+    data = client.get(f"/ai-jobs/{job['job_id']}?wait_ms=5000").json()
+    assert data["status"] == "done"
+    assert data["result"]["type"] in ["MOVE", "CAPTURE"]
+
+    assert client.get("/ai-jobs/unknown").status_code == 404
+
+def test_ai_move_waits_for_the_game_off_the_event_loop():
+    with TestClient(app) as shared:
+        game_id = shared.post("/games").json()["game_id"]
+        shared.post(f"/games/{game_id}/move", json={"type": "PLACE", "to_node": 1})
+        session = main.store.get(game_id)
+        replies = {}
+
+        def ask(name, url):
+            replies[name] = shared.get(url).status_code
+
+        # While another thread holds the game, its AI request waits in the
+        # threadpool and the server keeps answering everyone else
+        with session.lock:
+            suggest = threading.Thread(target=ask, args=("ai", f"/games/{game_id}/ai-move?player=T"))
+            suggest.start()
+            time.sleep(0.2)
+            other = threading.Thread(target=ask, args=("root", "/"))
+            other.start()
+            other.join(timeout=5)
+            assert replies.get("root") == 200
+            assert "ai" not in replies
+        suggest.join(timeout=30)
+        assert replies["ai"] == 200
+
+def test_ai_move_engine_choice():
+    game_id = client.post("/games").json()["game_id"]
+    response = client.get(f"/games/{game_id}/ai-move?player=G&engine=mcts&time_ms=100")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["engine"] == "mcts"
+    assert data["type"] == "PLACE"
+    assert client.post(f"/games/{game_id}/move", json={"type": "PLACE", "to_node": data["to"]}).status_code == 200
+
+    assert client.get(f"/games/{game_id}/ai-move?player=T&engine=nope").status_code == 400
+    assert client.get(f"/games/{game_id}/ai-move?player=T&engine=mcts&depth=2").status_code == 400
+
+def test_pondered_search_is_reused():
+    game_id = client.post("/games").json()["game_id"]
+    client.post(f"/games/{game_id}/move", json={"type": "PLACE", "to_node": 1})
+    main.ponderer.replies = 3
+    try:
+        job = client.post(f"/games/{game_id}/ai-jobs?player=T&depth=1").json()
+        move = client.get(f"/ai-jobs/{job['job_id']}?wait_ms=5000").json()["result"]
+        # Playing the AI's move starts pondering the goats' likely replies
+        payload = {"type": move["type"], "from_node": move["from"], "to_node": move["to"]}
+        assert client.post(f"/games/{game_id}/move", json=payload).status_code == 200
+        session = main.get_session(game_id)
+        assert len(session.ponder) == 3
+        pondered = {key: job.job_id for key, job in session.ponder.items()}
+
+        # The most likely reply is always pondered; its search answers the next request
+        reply = likely_replies(session.engine.state, 1)[0]
+        client.post(f"/games/{game_id}/move", json={"type": "PLACE", "to_node": reply[2]})
+        assert len(session.ponder) == 1
+        job = client.post(f"/games/{game_id}/ai-jobs?player=T&depth=1").json()
+        assert job["job_id"] in pondered.values()
+        assert client.get(f"/ai-jobs/{job['job_id']}?wait_ms=5000").json()["status"] == "done"
+
+        # Starting over drops whatever was being pondered
+        assert client.post(f"/games/{game_id}/new-game").status_code == 200
+        assert session.ponder == {}
+    finally:
+        main.ponderer.replies = 0
+
+def test_capped_ponder_search_is_not_reused():
+    game_id = client.post("/games").json()["game_id"]
+    client.post(f"/games/{game_id}/move", json={"type": "PLACE", "to_node": 1})
+    ponder_time_ms = main.ponderer.time_ms
+    main.ponderer.replies, main.ponderer.time_ms = 1, 50
+    try:
+        job = client.post(f"/games/{game_id}/ai-jobs?player=T&time_ms=200").json()
+        move = client.get(f"/ai-jobs/{job['job_id']}?wait_ms=5000").json()["result"]
+        payload = {"type": move["type"], "from_node": move["from"], "to_node": move["to"]}
+        assert client.post(f"/games/{game_id}/move", json=payload).status_code == 200
+        session = main.get_session(game_id)
+        assert session.ponder_params.time_ms == 50
+        pondered = [job.job_id for job in session.ponder.values()]
+
+        reply = likely_replies(session.engine.state, 1)[0]
+        client.post(f"/games/{game_id}/move", json={"type": "PLACE", "to_node": reply[2]})
+        # The reply was pondered for 50 ms only; the request wants 200
+        job = client.post(f"/games/{game_id}/ai-jobs?player=T&time_ms=200").json()
+        assert job["job_id"] not in pondered
+        assert client.get(f"/ai-jobs/{job['job_id']}?wait_ms=5000").json()["status"] == "done"
+    finally:
+        main.ponderer.replies, main.ponderer.time_ms = 0, ponder_time_ms
+
+def test_draw_reported():
+    game_id = client.post("/games").json()["game_id"]
+    data = client.get(f"/games/{game_id}/state").json()
+    assert data["winner"] is None and data["draw_reason"] is None
+    session = main.get_session(game_id)
+    with session.lock:
+        session.engine = movement_game()
+        session.changed()
+    for _ in range(2):
+        for move in SHUFFLE:
+            payload = {"type": move["type"], "from_node": move["from"], "to_node": move["to"]}
+            assert client.post(f"/games/{game_id}/move", json=payload).status_code == 200
+    data = client.get(f"/games/{game_id}/state").json()
+    assert data["winner"] == "D"
+    assert data["draw_reason"] == "repetition"
+    assert data["quiet_plies"] == 8
+    assert client.post(f"/games/{game_id}/move", json={"type": "MOVE", "from_node": 13, "to_node": 7}).status_code == 400
+
+def test_state_etag():
+    game_id = client.post("/games").json()["game_id"]
+    first = client.get(f"/games/{game_id}/state")
+    etag = first.headers["etag"]
+    assert first.headers["cache-control"] == "no-cache"
+
+    # Unchanged: 304 with no body, and the snapshot is reused
+    snapshot = main.get_session(game_id).snapshot
+    again = client.get(f"/games/{game_id}/state", headers={"If-None-Match": etag})
+    assert again.status_code == 304 and again.content == b""
+    assert again.headers["etag"] == etag
+    assert main.get_session(game_id).snapshot is snapshot
+    assert client.get(f"/games/{game_id}/state", headers={"If-None-Match": f'"x", W/{etag}'}).status_code == 304
+
+    # A move makes a new version; its response carries the new ETag
+    moved = client.post(f"/games/{game_id}/move", json={"type": "PLACE", "to_node": 5})
+    assert moved.headers["etag"] != etag
+    fresh = client.get(f"/games/{game_id}/state", headers={"If-None-Match": etag})
+    assert fresh.status_code == 200
+    assert fresh.json() == moved.json() and fresh.json()["board"]["5"] == "G"
+    assert fresh.headers["etag"] == moved.headers["etag"]
+
+    # So does a reset, and a new game under the same ID never reuses an ETag
+    client.post(f"/games/{game_id}/new-game")
+    assert client.get(f"/games/{game_id}/state", headers={"If-None-Match": fresh.headers["etag"]}).status_code == 200
+    client.post("/new-game")
+    default_etag = client.get("/state").headers["etag"]
+    main.store.delete(main.DEFAULT_GAME_ID)
+    assert client.get("/state", headers={"If-None-Match": default_etag}).status_code == 200
+
+def test_analyze_streams_positions():
+    start = "T..TT.................. G 0 0"
+    moves = encode_moves([{"type": "PLACE", "to": 10}, {"type": "MOVE", "from": 0, "to": 2}]).hex()
+    won = "T..TT...........G...... G 15 14"
+    response = client.post("/analyze", json={
+        "depth": 2,
+        "positions": [{"position": start}, {"moves": moves, "depth": 1}, {"position": won}],
+    })
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = {line["index"]: line for line in map(json.loads, response.text.splitlines())}
+    assert sorted(lines) == [0, 1, 2]
+
+    expected = main.ai_player.search(parse_position(start), 'G', depth=2)
+    assert lines[0]["move"] == expected.move and lines[0]["score"] == expected.score
+    assert lines[0]["pv"][0] == expected.move and lines[0]["depth"] == 2
+    assert lines[1]["position"] == "..TTT.....G............ G 1 0"
+    assert lines[1]["depth"] == 1 and lines[1]["move"]["type"] == "PLACE"
+    assert lines[2] == {"index": 2, "position": won, "winner": "T", "move": None}
+
+    bad = client.post("/analyze", json={"positions": [{"position": start}, {"position": "T G 0 0"}]})
+    assert bad.status_code == 400 and bad.json()["detail"].startswith("Position 1:")
+    assert client.post("/analyze", json={"positions": [{"position": start, "moves": ""}]}).status_code == 400
+    assert client.post("/analyze", json={"engine": "mcts", "depth": 2,
+                                         "positions": [{"position": start}]}).status_code == 400
+
+def test_analyze_reports_failed_searches():
+    positions = ["T..TT.................. G 0 0", "T..TT...G.............. T 1 0",
+                 "T..TT.......G.......... T 1 0"]
+    make_search_run = main.make_search_run
+
+    def failing_for_second(state, params):
+        if format_position(state) == positions[1]:
+            def run(cancelled):
+                raise ValueError("engine bug")
+            return run
+        return make_search_run(state, params)
+
+    main.make_search_run = failing_for_second
+    try:
+        response = client.post("/analyze", json={"depth": 1, "positions": [{"position": p} for p in positions]})
+    finally:
+        main.make_search_run = make_search_run
+    lines = {line["index"]: line for line in map(json.loads, response.text.splitlines())}
+    assert sorted(lines) == [0, 1, 2]
+    assert lines[1] == {"index": 1, "position": positions[1], "error": "Search failed"}
+    assert lines[0]["move"] and lines[2]["move"]
+
+def test_metrics_endpoint():
+    game_id = client.post("/games").json()["game_id"]
+    client.post(f"/games/{game_id}/move", json={"type": "PLACE", "to_node": 5})
+    client.get(f"/games/{game_id}/ai-move?player=T&depth=2")
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    text = response.text
+    assert 'apa_http_requests_total{method="POST",route="/games/{game_id}/move",status="200"}' in text
+    assert 'apa_http_request_seconds_bucket{method="GET",route="/games/{game_id}/ai-move",le="+Inf"}' in text
+    assert 'apa_searches_total{engine="minimax"}' in text
+    assert "apa_tt_probes_total" in text and "apa_beta_cutoffs_total" in text
+
+def apply_diff(state, changes):
+    board = {**state["board"], **changes.get("board", {})}
+    return {**state, **changes, "board": board}
+
+def test_websocket_pushes_moves():
+    game_id = client.post("/games").json()["game_id"]
+    with client.websocket_connect(f"/games/{game_id}/ws") as player, \
+            client.websocket_connect(f"/games/{game_id}/ws") as watcher:
+        first = player.receive_json()
+        assert first["type"] == "state" and first["version"] == 0
+        assert watcher.receive_json() == first
+        state = first["state"]
+
+        # A move on the socket reaches both sockets as a diff
+        player.send_json({"type": "move", "move": {"type": "PLACE", "to_node": 5}})
+        diff = player.receive_json()
+        assert watcher.receive_json() == diff
+        assert diff["type"] == "diff" and diff["version"] == 1
+        assert diff["move"] == {"type": "PLACE", "to": 5}
+        assert diff["changes"]["board"] == {"5": "G"}
+        assert diff["changes"]["turn"] == "T" and diff["changes"]["goats_placed"] == 1
+        state = apply_diff(state, diff["changes"])
+
+        # So does a move made over HTTP
+        move = client.get(f"/games/{game_id}/state").json()["valid_moves"][0]
+        payload = {"type": move["type"], "from_node": move["from"], "to_node": move["to"]}
+        assert client.post(f"/games/{game_id}/move", json=payload).status_code == 200
+        diff = watcher.receive_json()
+        assert player.receive_json() == diff and diff["version"] == 2
+        state = apply_diff(state, diff["changes"])
+
+        # The server plays AI moves itself
+        player.send_json({"type": "ai", "player": "G", "depth": 1})
+        diff = player.receive_json()
+        assert watcher.receive_json() == diff
+        assert diff["move"]["type"] == "PLACE" and diff["ai"]["engine"] == "minimax"
+        state = apply_diff(state, diff["changes"])
+        assert state == client.get(f"/games/{game_id}/state").json()
+
+        # Errors only go back to the sender
+        player.send_json({"type": "move", "id": 7, "move": {"type": "MOVE", "from_node": 5, "to_node": 6}})
+        assert player.receive_json() == {"type": "error", "status": 400, "detail": "Invalid Move", "id": 7}
+        player.send_json({"type": "state"})
+        assert player.receive_json() == {"type": "state", "version": 3, "state": state}
+
+        watcher.send_json({"type": "new-game"})
+        reset = watcher.receive_json()
+        assert player.receive_json() == reset
+        assert reset["type"] == "state" and reset["version"] == 4
+        assert reset["state"]["goats_placed"] == 0
+
+def test_websocket_rejects_bad_ai_requests():
+    game_id = client.post("/games").json()["game_id"]
+    with client.websocket_connect(f"/games/{game_id}/ws") as socket:
+        socket.receive_json()
+        for bad in ({"engine": ["x"]}, {"time_ms": "fifty"}, {"player": 1}):
+            socket.send_json({"type": "ai", "id": 3, **bad})
+            error = socket.receive_json()
+            assert error["type"] == "error" and error["status"] == 422 and error["id"] == 3
+
+        # A failing search is reported rather than lost with its task
+        def broken(*args):
+            raise RuntimeError("boom")
+        submit_ai_job, main.submit_ai_job = main.submit_ai_job, broken
+        try:
+            socket.send_json({"type": "ai", "id": 4, "player": "G"})
+            assert socket.receive_json() == {"type": "error", "status": 500,
+                                             "detail": "Internal server error", "id": 4}
+        finally:
+            main.submit_ai_job = submit_ai_job
+
+def test_websocket_unknown_game():
+    with pytest.raises(WebSocketDisconnect) as error:
+        with client.websocket_connect("/games/no-such-game/ws") as socket:
+            socket.receive_json()
+    assert error.value.code == 4404
+
 if __name__ == "__main__":
     test_read_root()
     test_new_game_and_state()
     test_place_goat()
     test_ai_move()
+    test_ai_move_time_budget()
+    test_games_are_independent()
+    test_unknown_game()
+    test_ai_job_submit_and_poll()
+    test_ai_move_waits_for_the_game_off_the_event_loop()
+    test_ai_move_engine_choice()
+    test_pondered_search_is_reused()
+    test_capped_ponder_search_is_not_reused()
+    test_draw_reported()
+    test_state_etag()
+    test_analyze_streams_positions()
+    test_analyze_reports_failed_searches()
+    test_metrics_endpoint()
+    test_websocket_pushes_moves()
+    test_websocket_rejects_bad_ai_requests()
+    test_websocket_unknown_game()
     print("API Tests Passed!")
@@ -0,0 +1,70 @@
+import pytest
+np = pytest.importorskip("numpy")
+from game.engine import GameEngine
+from game.bitboard import move_to_dict
+from game.batch import (
+    BatchGames, ACTIONS, WINNER_NAMES, NO_WINNER, GOAT_WIN, DRAW, random_policy, capture_policy,
+)
+from ai.selfplay import make_greedy_policy
+
+def engine_moves(game: GameEngine):
+    return sorted(tuple(sorted(m.items())) for m in game.get_valid_moves())
+
+def batch_moves(games: BatchGames, i: int):
+    return sorted(tuple(sorted(move_to_dict(tuple(int(x) for x in ACTIONS[a])).items()))
+                  for a in np.flatnonzero(games.legal[i]))
+
+def test_matches_engine_rule_for_rule():
+    # Replay every batched game through GameEngine, checking each position.
+    # Greedy goats against random tigers reach trapped tigers and long games.
+    count = 150
+    for tiger_policy, goat_policy, seed in ((capture_policy, random_policy, 1),
+                                            (random_policy, random_policy, 2),
+                                            (random_policy, make_greedy_policy(), 3)):
+        games = BatchGames(count, max_plies=120)
+        engines = [GameEngine() for _ in range(count)]
+        rng = np.random.default_rng(seed)
+        while not games.done.all():
+            for i, game in enumerate(engines):
+                if games.done[i]:
+                    continue
+                assert game.check_winner() is None
+                assert batch_moves(games, i) == engine_moves(game)
+            actions = games.choose(tiger_policy, goat_policy, rng)
+            for i in np.flatnonzero(~games.done):
+                assert engines[i].apply_move(move_to_dict(tuple(int(x) for x in ACTIONS[actions[i]])))
+            games.step(actions)
+            for i in range(count):
+                state = engines[i].state
+                assert [state.board_map[n] == 'T' for n in range(23)] == games.tigers[i].tolist()
+                assert [state.board_map[n] == 'G' for n in range(23)] == games.goats[i].tolist()
+                assert state.goats_captured == games.captured[i]
+                assert state.goats_on_board == games.placed[i]
+        for i, game in enumerate(engines):
+            winner = WINNER_NAMES[games.winner[i]]
+            assert winner == game.check_winner()
+            if winner is None:
+                assert games.plies[i] == 120 or not game.get_valid_moves()
+    assert (games.winner == GOAT_WIN).any() and (games.winner == DRAW).any()
+
+def test_illegal_action_rejected():
+    games = BatchGames(2)
+    with pytest.raises(ValueError):
+        games.step(np.array([0, 0]))  # Node 0 holds a tiger
+
+def test_result_summary():
+    result = BatchGames(500).play(capture_policy, random_policy, seed=3)
+    summary = result.summary()
+    assert summary["games"] == 500
+    assert summary["tiger_win_rate"] + summary["goat_win_rate"] + summary["no_result_rate"] == pytest.approx(1)
+    assert sum(summary["captures"]) == 500
+    assert result.captured[result.winners == NO_WINNER].max(initial=0) < 5
+    # Same seed, same games
+    again = BatchGames(500).play(capture_policy, random_policy, seed=3)
+    assert (again.plies == result.plies).all()
+
+if __name__ == "__main__":
+    test_matches_engine_rule_for_rule()
+    test_illegal_action_rejected()
+    test_result_summary()
+    print("Batch Simulator Tests Passed!")
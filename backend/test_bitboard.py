@@ -0,0 +1,55 @@
+import random
+from game.engine import GameEngine
+from game.bitboard import BitState, move_from_dict, move_to_dict
+
+def random_positions(count, seed=0):
+    """Yield engines at random points of random games."""
+    rng = random.Random(seed)
+    for _ in range(count):
+        game = GameEngine()
+        for _ in range(rng.randint(0, 80)):
+            moves = game.get_valid_moves()
+            if game.check_winner() or not moves:
+                break
+            game.apply_move(rng.choice(moves))
+        yield game
+
+def test_board_map_round_trip():
+    for game in random_positions(30):
+        bits = BitState.from_game_state(game.state)
+        assert bits.to_board_map() == game.state.board_map
+        back = bits.to_game_state()
+        assert back.board_map == game.state.board_map
+        assert back.turn == game.state.turn
+        assert back.goats_on_board == game.state.goats_on_board
+        assert back.goats_captured == game.state.goats_captured
+
+def test_moves_match_engine():
+    for game in random_positions(50, seed=1):
+        bits = BitState.from_game_state(game.state)
+        expected = game.get_valid_moves()
+        assert bits.generate_moves() == [move_from_dict(m) for m in expected]
+        assert [move_to_dict(m) for m in bits.generate_moves()] == expected
+        # BitState has no game history, so it cannot see draws
+        winner = game.check_winner()
+        assert bits.winner() == (None if winner == 'D' else winner)
+
+def test_make_unmake_restores_state():
+    for game in random_positions(30, seed=2):
+        bits = BitState.from_game_state(game.state)
+        before = bits.copy()
+        for move in bits.generate_moves():
+            bits.make_move(move)
+            # make_move must agree with the engine's apply_move
+            sim = GameEngine()
+            sim.state = game.state.clone()
+            assert sim.apply_move(move_to_dict(move))
+            assert bits == BitState.from_game_state(sim.state)
+            bits.unmake_move(move)
+            assert bits == before
+
+if __name__ == "__main__":
+    test_board_map_round_trip()
+    test_moves_match_engine()
+    test_make_unmake_restores_state()
+    print("Bitboard Tests Passed!")
@@ -0,0 +1,31 @@
+from game.board import Board, NEIGHBORS, JUMPS
+
+def test_tables_shared():
+    a = Board()
+    b = Board()
+    # Every board shares the same precomputed tables
+    assert a.neighbors is b.neighbors is NEIGHBORS
+    assert a.jumps is b.jumps is JUMPS
+    assert isinstance(NEIGHBORS, tuple) and isinstance(NEIGHBORS[0], tuple)
+
+def test_tables_match_graph():
+    board = Board()
+    for node in board.get_all_nodes():
+        assert list(board.neighbors[node]) == sorted(board.adjacency[node])
+        assert list(board.jumps[node]) == Board._compute_jumps(node)
+        # Every jump lands two steps away along edges
+        for mid, land in board.jumps[node]:
+            assert board.is_connected(node, mid)
+            assert board.is_connected(mid, land)
+
+def test_out_of_range_nodes():
+    board = Board()
+    assert board.get_neighbors(99) == []
+    assert board.get_valid_jumps(-1) == []
+    assert not board.is_connected(99, 0)
+
+if __name__ == "__main__":
+    test_tables_shared()
+    test_tables_match_graph()
+    test_out_of_range_nodes()
+    print("Board Tests Passed!")
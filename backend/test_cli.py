@@ -1,18 +1,23 @@
 import sys
-import random
 from game.engine import GameEngine
+from game.playout import choose_playout_move
 
 def main():
     game = GameEngine()
     print("Starting Aadu Puli Aattam CLI Simulation...")
     print("Tigers (T) start positions: 0, 3, 4")
     
-    max_turns = 100
-    for i in range(max_turns):
-        print(f"\n--- Turn {i+1}: Player {game.state.turn} ---")
+    # The draw rules end every game, so no turn limit is needed
+    turn = 0
+    while True:
+        turn += 1
+        print(f"\n--- Turn {turn}: Player {game.state.turn} ---")
         game.print_board()
         
         winner = game.check_winner()
+        if winner == 'D':
+            print(f"GAME OVER! Draw by {game.draw_reason()}")
+            break
         if winner:
             print(f"GAME OVER! Winner: {winner}")
             break
@@ -28,17 +33,8 @@ def main():
                 break
                 
         # Simple Logic:
-        # If Tiger, prioritize Capture
-        chosen_move = None
-        if game.state.turn == 'T':
-            captures = [m for m in moves if m['type'] == 'CAPTURE']
-            if captures:
-                chosen_move = random.choice(captures)
-            else:
-                chosen_move = random.choice(moves)
-        else:
-            # Random goat move
-            chosen_move = random.choice(moves)
+        # If Tiger, prioritize Capture, otherwise a random move
+        chosen_move = choose_playout_move(moves, game.state.turn)
             
         print(f"Executing: {chosen_move}")
         success = game.apply_move(chosen_move)
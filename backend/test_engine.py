@@ -0,0 +1,85 @@
+from game.engine import GameEngine, DrawRules, position_key
+from game.notation import format_position, parse_position
+from game.bitboard import BitState
+
+# Goat 13 <-> 7 and tiger 3 <-> 2, far from any capture
+SHUFFLE = [
+    {'type': 'MOVE', 'from': 13, 'to': 7},
+    {'type': 'MOVE', 'from': 3, 'to': 2},
+    {'type': 'MOVE', 'from': 7, 'to': 13},
+    {'type': 'MOVE', 'from': 2, 'to': 3},
+]
+
+def movement_game(rules: DrawRules = DrawRules()) -> GameEngine:
+    """Tigers at the start, eleven goats on rows 2-4, four captured."""
+    game = GameEngine(rules)
+    for node in [12] + list(range(13, 23)):
+        game.state.board_map[node] = 'G'
+    game.state.goats_on_board = 15
+    game.state.goats_captured = 4
+    return game
+
+def test_position_key_matches_bitboard():
+    game = movement_game()
+    assert position_key(game.state) == BitState.from_game_state(game.state).key
+
+def test_draw_by_repetition():
+    game = movement_game()
+    for _ in range(2):
+        for move in SHUFFLE:
+            assert game.check_winner() is None
+            assert game.apply_move(move)
+    # The starting position, for the third time
+    assert game.check_winner() == 'D'
+    assert game.draw_reason() == 'repetition'
+    assert game.state.quiet_plies == 8
+
+def test_draw_by_no_progress():
+    game = movement_game(DrawRules(repetitions=0, no_progress_plies=6))
+    for ply in range(6):
+        assert game.check_winner() is None
+        assert game.apply_move(SHUFFLE[ply % 4])
+    assert game.check_winner() == 'D'
+    assert game.draw_reason() == 'no progress'
+
+def test_draw_rules_off():
+    game = movement_game(DrawRules(repetitions=0, no_progress_plies=0))
+    for ply in range(40):
+        assert game.apply_move(SHUFFLE[ply % 4])
+    assert game.check_winner() is None
+
+def test_progress_resets_the_count():
+    game = GameEngine(DrawRules(no_progress_plies=2))
+    game.apply_move({'type': 'PLACE', 'to': 20})
+    assert game.state.quiet_plies == 0
+    game.apply_move({'type': 'MOVE', 'from': 3, 'to': 9})
+    assert game.state.quiet_plies == 1
+    game.apply_move({'type': 'PLACE', 'to': 21})
+    assert game.state.quiet_plies == 0
+    assert len(game.state.positions) == 1
+    # Clones carry the history along
+    assert game.state.clone().positions == game.state.positions
+
+def test_position_notation():
+    game = movement_game()
+    text = format_position(game.state)
+    state = parse_position(text)
+    assert state.board_map == game.state.board_map
+    assert (state.turn, state.goats_on_board, state.goats_captured) == ('G', 15, 4)
+    assert format_position(state) == text
+    for bad in ("T..TT G 0 0", "T..TT.................. X 0 0",
+                "T..TT.................. G 1 0", "T..TT.................. G 0"):
+        try:
+            parse_position(bad)
+            assert False, f"{bad!r} should not parse"
+        except ValueError:
+            pass
+
+if __name__ == "__main__":
+    test_position_key_matches_bitboard()
+    test_draw_by_repetition()
+    test_draw_by_no_progress()
+    test_draw_rules_off()
+    test_progress_resets_the_count()
+    test_position_notation()
+    print("Engine Tests Passed!")
@@ -0,0 +1,50 @@
+from game.bitboard import BitState, BIT, MAX_GOATS
+from game.symmetry import mirror_mask
+from ai.evaluation import evaluate, features, PHASE_WEIGHTS, PLACEMENT
+from test_bitboard import random_positions
+
+
+def fresh(bits: BitState) -> BitState:
+    return BitState(bits.tigers, bits.goats, bits.turn, bits.goats_on_board, bits.goats_captured)
+
+
+def test_goat_links_track_moves():
+    for game in random_positions(40, seed=7):
+        bits = BitState.from_game_state(game.state)
+        for move in bits.generate_moves():
+            bits.make_move(move)
+            assert bits.goat_links == fresh(bits).goat_links
+            bits.unmake_move(move)
+        assert bits.goat_links == fresh(bits).goat_links
+
+
+def test_features():
+    # Tiger on the apex boxed in by goats on 2-5, each backed up on row 2
+    tigers = BIT[0] | BIT[20] | BIT[21]
+    goats = BIT[2] | BIT[3] | BIT[4] | BIT[5] | BIT[8] | BIT[9] | BIT[10] | BIT[11]
+    bits = BitState(tigers, goats, 'G', 8, 0)
+    f = features(bits)
+    assert f['trapped'] == 1
+    assert f['threats'] == 0
+    assert f['links'] == 3 + 3 + 4  # Row 1, row 2, and the four columns
+
+    # Opening goat on 2 next to the tiger on 3, with 1 empty behind it
+    bits = BitState(BIT[0] | BIT[3] | BIT[4], BIT[2], 'T', 1, 0)
+    assert features(bits)['threats'] == 1
+    w = PHASE_WEIGHTS[PLACEMENT]
+    assert evaluate(bits) == w.mobility * features(bits)['mobility'] + w.threats
+
+
+def test_evaluation_is_mirror_symmetric():
+    for game in random_positions(30, seed=8):
+        bits = BitState.from_game_state(game.state)
+        image = BitState(mirror_mask(bits.tigers), mirror_mask(bits.goats), bits.turn,
+                         bits.goats_on_board, bits.goats_captured)
+        assert evaluate(image) == evaluate(bits)
+
+
+if __name__ == "__main__":
+    test_goat_links_track_moves()
+    test_features()
+    test_evaluation_is_mirror_symmetric()
+    print("Evaluation Tests Passed!")
@@ -0,0 +1,119 @@
+import threading
+from jobs import AIJobQueue, QueueFullError, JobCancelledError, QUEUED, DONE, CANCELLED
+
+def blocker():
+    """A job that runs until released (or cancelled)."""
+    release = threading.Event()
+    started = threading.Event()
+    def run(cancelled):
+        started.set()
+        while not release.is_set() and not cancelled.is_set():
+            release.wait(0.01)
+        return "finished"
+    return run, started, release
+
+def test_result_delivered():
+    queue = AIJobQueue(workers=1)
+    job = queue.submit("g1", lambda cancelled: 42)
+    assert job.future.result(timeout=5) == 42
+    assert job.status == DONE
+    assert queue.get(job.job_id).to_dict()["result"] == 42
+    queue.shutdown()
+
+def test_backpressure():
+    queue = AIJobQueue(workers=1, max_queued=2)
+    run, started, release = blocker()
+    queue.submit("busy", run)
+    assert started.wait(5)
+    queue.submit("a", lambda c: 1)
+    queue.submit("b", lambda c: 2)
+    try:
+        queue.submit("c", lambda c: 3)
+        assert False, "queue should be full"
+    except QueueFullError:
+        pass
+    release.set()
+    queue.shutdown()
+
+def test_newer_request_cancels_older():
+    queue = AIJobQueue(workers=1)
+    run, started, _ = blocker()
+    running = queue.submit("g1", run)
+    assert started.wait(5)
+    newer = queue.submit("g1", lambda c: "newer")
+    # The running search was told to stop and its result is discarded
+    assert running.cancel_event.is_set()
+    try:
+        running.future.result(timeout=5)
+        assert False, "cancelled job should not deliver a result"
+    except JobCancelledError:
+        pass
+    assert running.status == CANCELLED
+    assert newer.future.result(timeout=5) == "newer"
+    queue.shutdown()
+
+def test_round_robin_across_games():
+    queue = AIJobQueue(workers=1, max_queued=10)
+    run, started, release = blocker()
+    queue.submit("hold", run)
+    assert started.wait(5)
+    order = []
+    jobs = []
+    for game, label in (("busy", "b1"), ("busy", "b2"), ("busy", "b3"), ("other", "o1")):
+        jobs.append(queue.submit(game, lambda c, label=label: order.append(label), replace=False))
+    release.set()
+    for job in jobs:
+        job.future.result(timeout=5)
+    # 'other' does not wait behind all of 'busy'
+    assert order.index("o1") < order.index("b3")
+    queue.shutdown()
+
+def test_background_jobs_yield_to_requests():
+    queue = AIJobQueue(workers=2, max_background=2)
+    first, second = blocker(), blocker()
+    queue.submit("hold1", first[0])
+    queue.submit("hold2", second[0])
+    assert first[1].wait(5) and second[1].wait(5)
+    order = []
+    background = queue.submit("g1", lambda c: order.append("ponder"), replace=False, background=True)
+    regular = queue.submit("g2", lambda c: order.append("request"))
+    queue.submit("g1", lambda c: None, replace=False, background=True)
+    # Background queue full: the caller just ponders less
+    assert queue.submit("g1", lambda c: None, replace=False, background=True) is None
+    first[2].set()
+    regular.future.result(timeout=5)
+    background.future.result(timeout=5)
+    assert order == ["request", "ponder"]
+    second[2].set()
+    queue.shutdown()
+
+def test_single_worker_only_runs_promoted_background_jobs():
+    queue = AIJobQueue(workers=1)
+    background = queue.submit("g1", lambda c: "pondered", replace=False, background=True)
+    assert queue.submit("g2", lambda c: "request").future.result(timeout=5) == "request"
+    assert background.status == QUEUED
+    assert queue.promote(background.job_id)
+    assert background.future.result(timeout=5) == "pondered"
+    assert not queue.promote(background.job_id)
+    queue.shutdown()
+
+def test_cancel_game_cancels_background_jobs():
+    queue = AIJobQueue(workers=1)
+    run, started, release = blocker()
+    queue.submit("hold", run)
+    assert started.wait(5)
+    job = queue.submit("g1", lambda c: 1, replace=False, background=True)
+    queue.cancel_game("g1")
+    assert job.status == CANCELLED
+    release.set()
+    queue.shutdown()
+
+if __name__ == "__main__":
+    test_result_delivered()
+    test_backpressure()
+    test_newer_request_cancels_older()
+    test_round_robin_across_games()
+    test_background_jobs_yield_to_requests()
+    test_single_worker_only_runs_promoted_background_jobs()
+    test_cancel_game_cancels_background_jobs()
+    print("Job Queue Tests Passed!")
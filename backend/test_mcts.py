@@ -0,0 +1,103 @@
+import random
+import threading
+from game.engine import DrawRules, GameEngine
+from game.bitboard import BitState, move_from_dict
+from game.playout import choose_playout_move, playout
+from ai.mcts import MCTSAI, Node, TIME_CHECK_ITERATIONS
+from test_engine import movement_game, SHUFFLE
+
+
+def test_playout_policy_prefers_captures():
+    rng = random.Random(0)
+    moves = [{'type': 'MOVE', 'from': 0, 'to': 1}, {'type': 'CAPTURE', 'from': 3, 'to': 1, 'capture': 2}]
+    for _ in range(20):
+        assert choose_playout_move(moves, 'T', rng)['type'] == 'CAPTURE'
+    assert {choose_playout_move(moves, 'G', rng)['type'] for _ in range(50)} == {'MOVE', 'CAPTURE'}
+    # Random playouts from the start end with a result
+    assert playout(BitState.from_game_state(GameEngine().state), rng) in ('T', 'G', None)
+
+
+def test_mcts_returns_legal_moves():
+    ai = MCTSAI(iterations=300, seed=1)
+    game = GameEngine()
+    for _ in range(6):
+        result = ai.search(game.state, game.state.turn)
+        assert result.nodes == 300
+        assert result.move in game.get_valid_moves()
+        assert result.pv[0] == result.move
+        assert -1 <= result.score <= 1
+        game.apply_move(result.move)
+        game.apply_move(game.get_valid_moves()[0])
+
+
+def test_mcts_takes_a_winning_capture():
+    # Four goats captured: any capture wins for the tigers
+    board = BitState(tigers=(1 << 0) | (1 << 3) | (1 << 4), goats=1 << 9, turn='T',
+                     goats_on_board=15, goats_captured=4)
+    result = MCTSAI(iterations=200, seed=2).search(board.to_game_state(), 'T')
+    assert result.move['type'] == 'CAPTURE'
+    assert result.score == 1
+
+
+def test_mcts_reuses_its_tree():
+    ai = MCTSAI(iterations=400, seed=3)
+    game = GameEngine()
+    first = ai.search(game.state, 'G')
+    game.apply_move(first.move)
+    reply = game.get_valid_moves()[0]
+    game.apply_move(reply)
+    # The subtree built during the first search is picked up again
+    reused = ai._trees[BitState.from_game_state(game.state).key]
+    before = reused.visits
+    assert before > 0
+    # Kept subtrees do not hold on to the rest of the old tree
+    assert reused.parent is None and reused.move is None
+    result = ai.search(game.state, 'G')
+    assert result.move in game.get_valid_moves()
+    # The old node became the root and kept its statistics
+    assert reused.visits == before + 400
+
+
+def test_mcts_scores_no_progress_draws():
+    # Any goat move reaches the no-progress limit
+    game = movement_game(DrawRules(repetitions=0, no_progress_plies=1))
+    result = MCTSAI(iterations=200, seed=4).search(game.state, 'G')
+    assert result.score == 0
+
+
+def test_mcts_scores_repetitions():
+    game = movement_game(DrawRules(repetitions=3, no_progress_plies=0))
+    for move in SHUFFLE + SHUFFLE[:3]:
+        game.apply_move(move)
+    # Watch the root through the tree the search picks up
+    board = BitState.from_game_state(game.state)
+    root = Node(None, None, board)
+    ai = MCTSAI(iterations=300, seed=5)
+    ai._trees[board.key] = root
+    ai.search(game.state, 'T')
+    back = move_from_dict(SHUFFLE[3])
+    # Moving back repeats the starting position: a draw, never played out
+    child = next(child for child in root.children if child.move == back)
+    assert child.visits > 1
+    assert child.wins == child.visits * 0.5
+    assert child.untried is None
+
+
+def test_mcts_time_budget_and_stop():
+    game = GameEngine()
+    result = MCTSAI().search(game.state, 'G', time_ms=50)
+    assert result.nodes > 0
+    stop = threading.Event()
+    stop.set()
+    assert MCTSAI().search(game.state, 'G', stop=stop).nodes == TIME_CHECK_ITERATIONS
+
+
+if __name__ == "__main__":
+    test_playout_policy_prefers_captures()
+    test_mcts_returns_legal_moves()
+    test_mcts_takes_a_winning_capture()
+    test_mcts_reuses_its_tree()
+    test_mcts_scores_no_progress_draws()
+    test_mcts_scores_repetitions()
+    test_mcts_time_budget_and_stop()
+    print("MCTS Tests Passed!")
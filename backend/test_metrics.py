@@ -0,0 +1,52 @@
+from ai.ai_player import MinimaxAI
+from game.engine import GameEngine
+from metrics import Registry, SearchMetrics, NULL_INSTRUMENT
+
+def test_render_prometheus_text():
+    registry = Registry()
+    counter = registry.counter("moves_total", "Moves played.", ["side"])
+    counter.inc(1, "T")
+    counter.inc(2, "T")
+    counter.inc(1, 'say "hi"')
+    histogram = registry.histogram("latency_seconds", "Latency.", [0.1, 1])
+    histogram.observe(0.05)
+    histogram.observe(0.5)
+    histogram.observe(3)
+    assert registry.render().splitlines() == [
+        "# HELP moves_total Moves played.",
+        "# TYPE moves_total counter",
+        'moves_total{side="T"} 3',
+        'moves_total{side="say \\"hi\\""} 1',
+        "# HELP latency_seconds Latency.",
+        "# TYPE latency_seconds histogram",
+        'latency_seconds_bucket{le="0.1"} 1',
+        'latency_seconds_bucket{le="1"} 2',
+        'latency_seconds_bucket{le="+Inf"} 3',
+        "latency_seconds_sum 3.55",
+        "latency_seconds_count 3",
+    ]
+
+def test_disabled_registry_records_nothing():
+    registry = Registry(enabled=False)
+    assert registry.counter("a_total", "A.") is NULL_INSTRUMENT
+    registry.histogram("b", "B.", [1]).observe(2)
+    assert registry.render() == "\n"
+
+def test_search_metrics():
+    search = SearchMetrics(Registry())
+    ai = MinimaxAI(depth=4, metrics=search)
+    game = GameEngine()
+    game.apply_move({'type': 'PLACE', 'to': 10})
+    result = ai.search(game.state, 'T')
+    result = ai.search(game.state, 'T')  # Second search hits the table more
+    assert search.searches.value("minimax") == 2
+    assert search.nodes.value("minimax") > result.nodes
+    assert search.depth.count("minimax") == 2
+    assert 0 < search.tt_hits.value("minimax") <= search.tt_probes.value("minimax")
+    assert 0 < search.cutoffs.value("minimax") <= search.expanded.value("minimax")
+
+if __name__ == "__main__":
+    test_render_prometheus_text()
+    test_disabled_registry_records_nothing()
+    test_search_metrics()
+    print("Metrics Tests Passed!")
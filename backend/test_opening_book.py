@@ -0,0 +1,81 @@
+import atexit
+import os
+import shutil
+import tempfile
+from game.engine import GameEngine
+from game.bitboard import BitState, move_to_dict
+from game.symmetry import mirror_mask, mirror_move
+from ai.ai_player import MinimaxAI
+from ai.opening_book import OpeningBook, build, write_book, pack_move, unpack_move
+
+_book_path = None
+
+
+def book_path() -> str:
+    global _book_path
+    if _book_path is None:
+        directory = tempfile.mkdtemp(prefix="book-")
+        atexit.register(shutil.rmtree, directory, True)
+        _book_path = os.path.join(directory, "book.bin")
+        write_book(_book_path, build(plies=1, depth=2))
+    return _book_path
+
+
+def test_move_packing_round_trip():
+    for move in [(0, -1, 22, -1), (1, 5, 6, -1), (2, 0, 8, 2), (2, 22, 20, 21)]:
+        assert unpack_move(pack_move(move)) == move
+
+
+def test_book_covers_the_opening():
+    book = OpeningBook(book_path())
+    # Start position, and its 20 placements folded into 10 mirror pairs
+    assert len(book) == 1 + 10
+    start = BitState.from_game_state(GameEngine().state)
+    entry = book.probe(start)
+    assert entry is not None and entry.depth == 2
+    expected = MinimaxAI(depth=2).search(GameEngine().state, 'G')
+    assert move_to_dict(entry.move) == expected.move
+    assert entry.score == expected.score
+
+
+def test_book_answers_mirrored_positions():
+    book = OpeningBook(book_path())
+    start = BitState.from_game_state(GameEngine().state)
+    for move in start.generate_moves():
+        child = start.copy()
+        child.make_move(move)
+        image = BitState(mirror_mask(child.tigers), mirror_mask(child.goats), child.turn,
+                         child.goats_on_board, child.goats_captured)
+        entry, mirrored = book.probe(child), book.probe(image)
+        assert entry is not None and mirrored is not None
+        assert mirror_move(entry.move) == mirrored.move
+        assert entry.move in child.generate_moves()
+
+
+def test_ai_plays_from_book():
+    ai = MinimaxAI(depth=2, opening_book=book_path())
+    result = ai.search(GameEngine().state, 'G')
+    assert result.nodes == 0
+    assert result.move == MinimaxAI(depth=2).search(GameEngine().state, 'G').move
+    # A deeper fixed-depth request than the book holds is searched
+    assert ai.search(GameEngine().state, 'G', depth=3).nodes > 0
+    # Out of book
+    game = GameEngine()
+    for _ in range(3):
+        game.apply_move(game.get_valid_moves()[0])
+    assert ai.search(game.state, game.state.turn).nodes > 0
+
+
+def test_missing_book_is_empty():
+    book = OpeningBook(os.path.join(tempfile.gettempdir(), "no-such-book.bin"))
+    assert len(book) == 0
+    assert book.probe(BitState.from_game_state(GameEngine().state)) is None
+
+
+if __name__ == "__main__":
+    test_move_packing_round_trip()
+    test_book_covers_the_opening()
+    test_book_answers_mirrored_positions()
+    test_ai_plays_from_book()
+    test_missing_book_is_empty()
+    print("Opening Book Tests Passed!")
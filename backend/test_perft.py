@@ -0,0 +1,51 @@
+from game.engine import GameEngine
+from game.bitboard import BitState
+from bench import POSITIONS, compare, make_state, perft, perft_bits, run_perft
+
+# Known leaf counts at depth 3 for the benchmark positions
+PERFT_3 = {
+    "start": 2286,
+    "placement-early": 2165,
+    "placement-late": 749,
+    "movement-open": 1560,
+    "movement-crowded": 1093,
+}
+
+
+def test_perft_counts():
+    for name, expected in PERFT_3.items():
+        engine = GameEngine()
+        engine.state = make_state(name)
+        assert perft(engine, 3) == expected, name
+
+
+def test_perft_engine_matches_bitboard():
+    for name in POSITIONS:
+        for depth in (1, 2, 3):
+            engine = GameEngine()
+            engine.state = make_state(name)
+            board = BitState.from_game_state(make_state(name))
+            assert perft(engine, depth) == perft_bits(board, depth), (name, depth)
+            # make/unmake must leave the position untouched
+            assert board == BitState.from_game_state(make_state(name))
+
+
+def test_run_perft_report():
+    rows = run_perft([("start", 2), ("movement-open", 2)])
+    assert [r["nodes"] for r in rows] == [120, 99]
+    assert all(r["match"] for r in rows)
+
+
+def test_compare_handles_missing_rates():
+    row = {"position": "start", "depth": 1, "nodes": 10, "seconds": 0.0, "moves_per_second": None}
+    baseline = {"perft": [dict(row, seconds=0.5, moves_per_second=20)]}
+    assert compare({"perft": [row]}, baseline)
+    assert compare(baseline, {"perft": [row]})
+
+
+if __name__ == "__main__":
+    test_perft_counts()
+    test_perft_engine_matches_bitboard()
+    test_run_perft_report()
+    test_compare_handles_missing_rates()
+    print("Perft Tests Passed!")
@@ -0,0 +1,186 @@
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from game.engine import GameEngine
+from game.movelog import MOVES, encode_move, encode_moves, decode_moves
+from game.bitboard import move_to_dict
+from persistence import GameLog
+from sessions import GameStore
+from test_sessions import FakeClock
+
+def test_move_codes_round_trip():
+    assert len(MOVES) < 256
+    moves = [move_to_dict(move) for move in MOVES]
+    assert decode_moves(encode_moves(moves)) == moves
+    # Fields a move type does not use are ignored
+    assert encode_move({'type': 'PLACE', 'from': 4, 'to': 7}) == encode_move({'type': 'PLACE', 'to': 7})
+
+def test_replay_rebuilds_the_game():
+    rng = random.Random(3)
+    game = GameEngine()
+    for _ in range(80):
+        if game.check_winner():
+            break
+        assert game.apply_move(rng.choice(game.get_valid_moves()))
+    assert len(game.state.move_log) > 30
+    replayed = GameEngine.replay(game.state.move_log)
+    assert replayed.state.board_map == game.state.board_map
+    assert replayed.state.goats_captured == game.state.goats_captured
+    assert replayed.state.quiet_plies == game.state.quiet_plies
+    assert replayed.state.positions == game.state.positions
+    assert replayed.check_winner() == game.check_winner()
+
+    for bad in (bytes([len(MOVES)]), bytes([encode_move({'type': 'MOVE', 'from': 0, 'to': 2})])):
+        try:
+            GameEngine.replay(bad)
+            assert False, "bad log should not replay"
+        except ValueError:
+            pass
+
+def test_log_batches_writes():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "games.db")
+        clock = FakeClock()
+        log = GameLog(path, interval=10, clock=clock)
+        log.start("a")
+        for code in range(5):
+            log.append("a", bytes([code]))
+        log.start("b")
+        log.append("b", b"\x01")
+        log.start("b")  # Starting over drops the moves before
+        log.append("b", b"\x02")
+        log.append("gone", b"\x03")  # Never started
+        assert log.load("a") == bytes(range(5))
+        assert log.load("b") == b"\x02"
+        assert log.load("gone") is None
+        # One chunk per game per batch
+        with sqlite3.connect(path) as db:
+            assert db.execute("SELECT COUNT(*) FROM moves").fetchone()[0] == 2
+
+        clock.now = 100
+        log.append("b", b"\x03")
+        log.delete("a")
+        assert log.load("a") is None
+        assert log.load("b", max_age=50) == b"\x02\x03"
+        clock.now = 200
+        assert log.load("b", max_age=50) is None
+        assert log.prune(50) == 1
+        assert log.load("b") is None
+        log.close()
+
+def test_games_survive_restart():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "games.db")
+        log = GameLog(path)
+        store = GameStore(game_log=log)
+        session = store.create()
+        moves = [{'type': 'PLACE', 'to': 10}, {'type': 'MOVE', 'from': 0, 'to': 2},
+                 {'type': 'PLACE', 'to': 5}]
+        for move in moves:
+            assert session.play(move)
+        assert not session.play({'type': 'MOVE', 'from': 2, 'to': 5})
+        reset = store.create()
+        reset.play(moves[0])
+        reset.reset()
+        log.close()
+
+        # A new store on the same file replays games on demand
+        log = GameLog(path)
+        store = GameStore(game_log=log)
+        restored = store.get(session.game_id)
+        assert restored.engine.state.board_map == session.engine.state.board_map
+        assert restored.engine.state.turn == 'T'
+        assert store.get(session.game_id) is restored
+        assert store.get(reset.game_id).engine.state.goats_on_board == 0
+        assert store.delete(session.game_id)
+        try:
+            GameStore(game_log=log).get(session.game_id)
+            assert False, "deleted game should not come back"
+        except KeyError:
+            pass
+        log.close()
+
+def test_log_prunes_stale_games():
+    with tempfile.TemporaryDirectory() as tmp:
+        clock = FakeClock()
+        log = GameLog(os.path.join(tmp, "games.db"), clock=clock, max_age=50, prune_interval=0.01)
+        log.start("kept")
+        log.start("stale")
+        log.flush()
+        clock.now = 40
+        log.touch("kept")
+        log.flush()
+        clock.now = 80
+        # The writer prunes on its own, with nothing queued
+        for _ in range(500):
+            if log.load("stale") is None:
+                break
+            time.sleep(0.01)
+        assert log.load("stale") is None
+        assert log.load("kept") == b""
+        log.close()
+
+def test_store_keeps_games_in_use():
+    with tempfile.TemporaryDirectory() as tmp:
+        log_clock, store_clock = FakeClock(), FakeClock()
+        log = GameLog(os.path.join(tmp, "games.db"), clock=log_clock)
+        store = GameStore(ttl_seconds=100, clock=store_clock, game_log=log)
+        session = store.create()
+        log.flush()
+        # Only read, never moved: using it still refreshes its log past half the TTL
+        log_clock.now = store_clock.now = 60
+        assert store.get(session.game_id) is session
+        log_clock.now = 120
+        assert log.load(session.game_id, max_age=100) == b""
+        log.close()
+
+def test_store_remembers_unknown_games():
+    with tempfile.TemporaryDirectory() as tmp:
+        log = GameLog(os.path.join(tmp, "games.db"))
+        store = GameStore(game_log=log)
+        replays = []
+        replay = store._replay
+        store._replay = lambda game_id: replays.append(game_id) or replay(game_id)
+        for _ in range(2):
+            try:
+                store.get("nope")
+                assert False, "unknown game"
+            except KeyError:
+                pass
+        assert replays == ["nope"]
+        # Creating the game forgets that it was missing
+        session = store.create("nope")
+        store._games.clear()
+        assert store.get("nope").engine.state.board_map == session.engine.state.board_map
+        log.close()
+
+def test_get_or_create_keeps_a_game_created_meanwhile():
+    with tempfile.TemporaryDirectory() as tmp:
+        log = GameLog(os.path.join(tmp, "games.db"))
+        store = GameStore(game_log=log)
+        created = []
+
+        def replay_while_another_request_creates(game_id):
+            # Another request misses the log too and creates the game first
+            session = store.create(game_id)
+            session.play({'type': 'PLACE', 'to': 10})
+            created.append(session)
+            raise KeyError(game_id)
+
+        store._replay = replay_while_another_request_creates
+        assert store.get_or_create("default") is created[0]
+        assert log.load("default") == encode_moves([{'type': 'PLACE', 'to': 10}])
+        log.close()
+
+if __name__ == "__main__":
+    test_move_codes_round_trip()
+    test_replay_rebuilds_the_game()
+    test_log_batches_writes()
+    test_games_survive_restart()
+    test_log_prunes_stale_games()
+    test_store_keeps_games_in_use()
+    test_store_remembers_unknown_games()
+    test_get_or_create_keeps_a_game_created_meanwhile()
+    print("Persistence Tests Passed!")
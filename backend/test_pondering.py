@@ -0,0 +1,33 @@
+from ai.ai_player import MinimaxAI
+from game.engine import DrawRules
+from jobs import AIJobQueue
+from pondering import AIParams, Ponderer
+from sessions import GameSession
+from test_engine import movement_game, SHUFFLE
+
+def search_run(state, params):
+    return lambda cancelled: MinimaxAI(tt_size_bits=0).search(state, params.player, depth=params.depth)
+
+def test_pondered_search_keeps_the_draw_state():
+    # The shuffle played once and a half, close to both a third repetition
+    # and the (shortened) no-progress draw
+    session = GameSession("g", 0)
+    session.engine = movement_game(DrawRules(repetitions=3, no_progress_plies=10))
+    for move in SHUFFLE + SHUFFLE[:2]:
+        assert session.engine.apply_move(move)
+    queue = AIJobQueue(workers=2)
+    ponderer = Ponderer(queue, search_run, replies=50)
+    params = AIParams('T', 'minimax', 3, None)
+    ponderer.start(session, params)
+
+    session.engine.apply_move(SHUFFLE[2])
+    ponderer.keep(session)
+    pondered = ponderer.take(session, params).future.result(timeout=30)
+    fresh = MinimaxAI(tt_size_bits=0).search(session.engine.state, 'T', depth=3)
+    assert pondered == fresh
+    assert fresh.score == 0  # Nothing better than the draw in reach
+    queue.shutdown()
+
+if __name__ == "__main__":
+    test_pondered_search_keeps_the_draw_state()
+    print("Pondering Tests Passed!")
@@ -0,0 +1,50 @@
+import pytest
+np = pytest.importorskip("numpy")
+from game.bitboard import BitState, BIT
+from game.batch import BatchGames, ACTIONS, CAPTURE, TIGER_WIN
+from ai.evaluation import evaluate, features
+from ai.selfplay import features_batch, evaluate_batch, make_greedy_policy, run
+from test_bitboard import random_positions
+
+def as_arrays(boards):
+    tigers = np.array([[bool(b.tigers & BIT[n]) for n in range(23)] for b in boards])
+    goats = np.array([[bool(b.goats & BIT[n]) for n in range(23)] for b in boards])
+    placed = np.array([b.goats_on_board for b in boards], dtype=np.int8)
+    captured = np.array([b.goats_captured for b in boards], dtype=np.int8)
+    return tigers, goats, placed, captured
+
+def test_evaluate_batch_matches_evaluate():
+    boards = [BitState.from_game_state(g.state) for g in random_positions(200, seed=11)]
+    tigers, goats, placed, captured = as_arrays(boards)
+    values = evaluate_batch(tigers, goats, placed, captured)
+    assert values.tolist() == [evaluate(b) for b in boards]
+    f = features_batch(tigers, goats, captured)
+    for i, board in enumerate(boards):
+        assert {name: int(v[i]) for name, v in f.items()} == features(board)
+
+def test_greedy_takes_the_win():
+    # Four goats captured; the tiger on 15 can win by jumping 14
+    games = BatchGames(1)
+    games.tigers[0] = False
+    games.tigers[0, [1, 9, 15]] = True
+    games.goats[0, [3, 14]] = True
+    games.tiger_turn[0] = True
+    games.placed[0] = 6
+    games.captured[0] = 4
+    games._refresh()
+    action = make_greedy_policy(epsilon=0)(games, np.array([0]), games.legal, np.random.default_rng(0))[0]
+    assert ACTIONS[action][0] == CAPTURE
+    games.step(np.array([action]))
+    assert games.winner[0] == TIGER_WIN
+
+def test_run_summary():
+    summary = run(200, "greedy", "random", seed=1)
+    assert summary["games"] == 200
+    assert summary["tiger_win_rate"] > 0.9
+    assert summary["games_per_second"] > 0
+
+if __name__ == "__main__":
+    test_evaluate_batch_matches_evaluate()
+    test_greedy_takes_the_win()
+    test_run_summary()
+    print("Self-play Tests Passed!")
@@ -0,0 +1,52 @@
+from sessions import GameStore
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_lru_eviction():
+    store = GameStore(max_games=3, ttl_seconds=100, clock=FakeClock())
+    a = store.create()
+    b = store.create()
+    c = store.create()
+    # Touch 'a' so 'b' becomes the least recently used
+    store.get(a.game_id)
+    store.create()
+    assert len(store) == 3
+    assert a.game_id in store
+    assert b.game_id not in store
+    assert c.game_id in store
+
+def test_idle_ttl():
+    clock = FakeClock()
+    store = GameStore(max_games=10, ttl_seconds=60, clock=clock)
+    old = store.create()
+    clock.now = 30
+    fresh = store.create()
+    clock.now = 70
+    # 'old' has been idle 70s, 'fresh' only 40s
+    assert store.evict_expired() == 1
+    assert old.game_id not in store
+    assert store.get(fresh.game_id) is fresh
+    clock.now = 200
+    try:
+        store.get(fresh.game_id)
+        assert False, "expired game should not be returned"
+    except KeyError:
+        pass
+    assert len(store) == 0
+
+def test_get_or_create_keeps_id():
+    store = GameStore()
+    session = store.get_or_create("default")
+    assert session.game_id == "default"
+    assert store.get_or_create("default") is session
+
+if __name__ == "__main__":
+    test_lru_eviction()
+    test_idle_ttl()
+    test_get_or_create_keeps_id()
+    print("Session Tests Passed!")
@@ -0,0 +1,73 @@
+from game.bitboard import BitState
+from game.symmetry import (
+    MIRROR, mirror_mask, mirror_move, mirror_move_dict, canonical_key, canonical_masks,
+)
+from ai.ai_player import MinimaxAI
+from test_bitboard import random_positions
+
+
+def mirrored(bits: BitState) -> BitState:
+    return BitState(mirror_mask(bits.tigers), mirror_mask(bits.goats), bits.turn,
+                    bits.goats_on_board, bits.goats_captured)
+
+
+def test_mirror_is_an_involution():
+    assert MIRROR[0] == 0
+    assert (MIRROR[1], MIRROR[7], MIRROR[13], MIRROR[19]) == (6, 12, 18, 22)
+    for node in range(23):
+        assert MIRROR[MIRROR[node]] == node
+    for mask in (0, 1, 0b1010110, (1 << 23) - 1, 0x5A5A5A):
+        assert mirror_mask(mirror_mask(mask)) == mask
+        assert bin(mirror_mask(mask)).count('1') == bin(mask).count('1')
+
+
+def test_mirrored_moves_match_mirrored_position():
+    for game in random_positions(30, seed=4):
+        bits = BitState.from_game_state(game.state)
+        image = mirrored(bits)
+        assert sorted(mirror_move(m) for m in bits.generate_moves()) == sorted(image.generate_moves())
+        assert image.winner() == bits.winner()
+        for move in game.get_valid_moves():
+            assert mirror_move_dict(mirror_move_dict(move)) == move
+
+
+def test_mirror_key_tracks_moves():
+    for game in random_positions(30, seed=5):
+        bits = BitState.from_game_state(game.state)
+        assert bits.mirror_key == mirrored(bits).key
+        for move in bits.generate_moves():
+            bits.make_move(move)
+            assert bits.mirror_key == mirrored(bits).key
+            bits.unmake_move(move)
+        # A position and its mirror image share one canonical key
+        assert canonical_key(bits)[0] == canonical_key(mirrored(bits))[0]
+        tigers, goats, _ = canonical_masks(bits.tigers, bits.goats)
+        assert (tigers, goats) == canonical_masks(mirror_mask(bits.tigers), mirror_mask(bits.goats))[:2]
+
+
+def test_search_shares_mirrored_positions():
+    for game in random_positions(8, seed=6):
+        if game.check_winner() or not game.get_valid_moves():
+            continue
+        bits = BitState.from_game_state(game.state)
+        image = mirrored(bits).to_game_state()
+        # Same value from either side, and the best move mirrors over
+        plain = MinimaxAI(depth=3, tt_size_bits=0).search(game.state, game.state.turn)
+        flipped = MinimaxAI(depth=3, tt_size_bits=0).search(image, image.turn)
+        assert plain.score == flipped.score
+
+        # With a shared table, the mirror image is answered from the first search
+        ai = MinimaxAI(depth=3)
+        first = ai.search(game.state, game.state.turn)
+        second = ai.search(image, image.turn)
+        assert second.score == first.score
+        assert second.nodes < first.nodes
+        assert mirror_move_dict(second.move) in game.get_valid_moves()
+
+
+if __name__ == "__main__":
+    test_mirror_is_an_involution()
+    test_mirrored_moves_match_mirrored_position()
+    test_mirror_key_tracks_moves()
+    test_search_shares_mirrored_positions()
+    print("Symmetry Tests Passed!")
@@ -0,0 +1,190 @@
+import atexit
+import random
+import shutil
+import tempfile
+import tracemalloc
+from itertools import combinations
+from ai.ai_player import MinimaxAI, WIN_SCORE
+from ai import tablebase
+from ai.tablebase import (
+    HEADER_SIZE, Tablebase, default_max_goats, generate, position_index, solve, solve_memory,
+    table_name, table_size, decode,
+)
+from game.bitboard import BitState, BIT, MAX_GOATS
+from game.engine import DrawRules
+from game.symmetry import canonical_masks
+
+# One goat left, four captured: the next capture wins for the tigers.
+# Small enough to solve in a couple of seconds.
+GOATS, CAPTURED = 1, 4
+
+_tables = {}
+
+
+def tables(workers: int = 0) -> str:
+    if workers not in _tables:
+        directory = tempfile.mkdtemp(prefix="tb-")
+        atexit.register(shutil.rmtree, directory, True)
+        generate(directory, GOATS, CAPTURED, workers)
+        _tables[workers] = directory
+    return _tables[workers]
+
+
+def random_board(rng: random.Random) -> BitState:
+    nodes = rng.sample(range(23), 3 + GOATS)
+    tigers = BIT[nodes[0]] | BIT[nodes[1]] | BIT[nodes[2]]
+    goats = 0
+    for node in nodes[3:]:
+        goats |= BIT[node]
+    return BitState(tigers, goats, rng.choice('GT'), MAX_GOATS, CAPTURED)
+
+
+def test_position_index_is_a_bijection():
+    # Every canonical position gets its own slot; mirror images share it
+    seen = {}
+    for tiger_nodes in combinations(range(23), 3):
+        tigers = sum(BIT[n] for n in tiger_nodes)
+        for g in range(23):
+            if tigers & BIT[g]:
+                continue
+            canonical = canonical_masks(tigers, BIT[g])[:2]
+            for turn in 'GT':
+                index = position_index(tigers, BIT[g], turn, 1)
+                assert 0 <= index < table_size(1)
+                assert seen.setdefault(index, (canonical, turn)) == (canonical, turn)
+    # Symmetric tiger placements (apex plus a mirrored pair, 11 of them) keep
+    # slots for both goat orientations, but only the canonical one is used
+    assert len(seen) == table_size(1) - 11 * 10 * 2
+
+
+def test_decode():
+    assert decode(0, 'T') == (None, 0)
+    assert decode(1, 'T') == ('G', 0)   # Tigers to move and lost
+    assert decode(2, 'T') == ('T', 1)   # Tigers win with the next move
+    assert decode(3, 'G') == ('T', 2)
+
+
+def test_tablebase_matches_search():
+    tb = Tablebase(tables())
+    rng = random.Random(11)
+    checked = 0
+    while checked < 25:
+        board = random_board(rng)
+        if board.winner() is not None:
+            continue
+        winner, plies = tb.probe(board)
+        if winner is None or plies > 7:
+            continue
+        is_max = board.turn == 'T'
+        ai = MinimaxAI(tt_size_bits=0, quiescence=False)
+        expected = WIN_SCORE if winner == 'T' else -WIN_SCORE
+        # The result is found at exactly 'plies' and not before
+        assert ai.minimax(board.copy(), plies, -WIN_SCORE - 1, WIN_SCORE + 1, is_max) == expected
+        if plies > 1:
+            assert abs(ai.minimax(board.copy(), plies - 1, -WIN_SCORE - 1, WIN_SCORE + 1, is_max)) < WIN_SCORE
+        checked += 1
+
+
+def test_best_move_keeps_the_result():
+    tb = Tablebase(tables())
+    rng = random.Random(3)
+    for _ in range(50):
+        board = random_board(rng)
+        if board.winner() is not None:
+            continue
+        winner, plies = tb.probe(board)
+        move, move_winner, move_plies = tb.best_move(board)
+        assert (move_winner, move_plies) == (winner, plies)
+
+
+def test_parallel_generation_matches_serial():
+    name = table_name(GOATS, CAPTURED)
+    with open(f"{tables()}/{name}", "rb") as f:
+        serial = f.read()
+    with open(f"{tables(workers=2)}/{name}", "rb") as f:
+        parallel = f.read()
+    assert serial == parallel
+
+
+def test_search_plays_from_tablebase():
+    tb = Tablebase(tables())
+    # Tigers at 0, 3, 4 with the last goat next to a tiger and room to jump
+    board = BitState(BIT[0] | BIT[3] | BIT[4], BIT[9], 'T', MAX_GOATS, CAPTURED)
+    assert tb.probe(board) == ('T', 1)
+    ai = MinimaxAI(depth=1, tablebase=tb)
+    result = ai.search(board.to_game_state(), 'T')
+    assert result.move['type'] == 'CAPTURE'
+    assert result.score == WIN_SCORE
+    assert result.depth == 1
+    assert len(result.pv) == 1
+
+
+def test_missing_tables_are_not_covered():
+    directory = tempfile.mkdtemp(prefix="tb-")
+    atexit.register(shutil.rmtree, directory, True)
+    tb = Tablebase(directory)
+    board = BitState(BIT[0] | BIT[3] | BIT[4], BIT[9], 'T', MAX_GOATS, CAPTURED)
+    assert tb.probe(board) is None
+    # Placement phase is never covered
+    assert Tablebase(tables()).probe(BitState(BIT[0] | BIT[3] | BIT[4], BIT[9], 'T', 14, CAPTURED)) is None
+
+
+def test_solve_fits_in_its_memory_budget():
+    # solve() needs solve_memory() bytes, plus a fixed overhead however large
+    # the table; --max-goats defaults to what fits in such a budget. No goats
+    # left keeps the table small enough to trace quickly.
+    directory = tempfile.mkdtemp(prefix="tb-")
+    atexit.register(shutil.rmtree, directory, True)
+    tracemalloc.start()
+    try:
+        values = solve(0, CAPTURED, directory)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    assert len(values) == table_size(0)
+    assert peak < solve_memory(0) + 256 * 1024
+    # Every real-game table leads by captures into the 11-goat one, the largest
+    assert default_max_goats(solve_memory(11)) == MAX_GOATS
+    assert default_max_goats(solve_memory(11) - 1) == 10
+
+
+def test_search_ignores_wins_past_the_no_progress_draw():
+    tb = Tablebase(tables())
+    board = BitState(BIT[8] | BIT[14] | BIT[16], BIT[3], 'T', MAX_GOATS, CAPTURED)
+    assert tb.probe(board) == ('T', 5)
+    ai = MinimaxAI(depth=2, tablebase=tb, tt_size_bits=0)
+    state = board.to_game_state()
+    state.draw_rules = DrawRules(repetitions=0, no_progress_plies=10)
+    state.quiet_plies = 5  # The win comes just in time
+    assert ai.search(state, 'T').score == WIN_SCORE
+    state.quiet_plies = 6  # The game is drawn first: search instead
+    result = ai.search(state, 'T')
+    assert result.score < WIN_SCORE and result.depth == 2
+
+
+def test_distances_past_the_limit_are_left_undecided():
+    with open(f"{tables()}/{table_name(GOATS, CAPTURED)}", "rb") as f:
+        full = f.read()[HEADER_SIZE:]
+    directory = tempfile.mkdtemp(prefix="tb-")
+    atexit.register(shutil.rmtree, directory, True)
+    limit, tablebase.MAX_DISTANCE = tablebase.MAX_DISTANCE, 4
+    try:
+        capped = solve(GOATS, CAPTURED, directory)
+    finally:
+        tablebase.MAX_DISTANCE = limit
+    assert any(value > 5 for value in full)
+    assert capped == bytes(value if value <= 5 else 0 for value in full)
+
+
+if __name__ == "__main__":
+    test_position_index_is_a_bijection()
+    test_decode()
+    test_tablebase_matches_search()
+    test_best_move_keeps_the_result()
+    test_parallel_generation_matches_serial()
+    test_search_plays_from_tablebase()
+    test_missing_tables_are_not_covered()
+    test_solve_fits_in_its_memory_budget()
+    test_search_ignores_wins_past_the_no_progress_draw()
+    test_distances_past_the_limit_are_left_undecided()
+    print("Tablebase Tests Passed!")
@@ -0,0 +1,109 @@
+import os
+import tempfile
+from game.bitboard import BitState
+from game.engine import GameEngine
+from ai.ai_player import MinimaxAI
+import tournament
+from tournament import (
+    schedule, run_tournament, report, format_report, elo_difference, elo_ratings,
+    make_weights, load_results,
+)
+
+CONFIG = {
+    "engines": {"d1": {"depth": 1}, "d2": {"depth": 2, "quiescence": False}},
+    "games": 2,
+    "seed": 7,
+    "max_plies": 30,
+}
+
+def test_schedule_pairs_both_colours():
+    specs = schedule(CONFIG)
+    assert len(specs) == 4
+    assert len({s.game_id for s in specs}) == 4
+    # Each opening is played once with each engine as the tigers
+    for first, second in zip(specs[::2], specs[1::2]):
+        assert first.opening_seed == second.opening_seed
+        assert (first.tiger, first.goat) == (second.goat, second.tiger)
+    assert schedule(CONFIG) == specs
+
+def test_run_resume_and_report():
+    path = os.path.join(tempfile.mkdtemp(), "results.jsonl")
+    results = run_tournament(CONFIG, path)
+    assert len(results) == 4
+    assert all(r["plies"] <= 30 for r in results)
+
+    # Rerunning plays nothing new, even after a line was cut short
+    with open(path, "a") as f:
+        f.write('{"game": "d1~d2#9')
+    again = run_tournament(CONFIG, path)
+    assert [r["game"] for r in again] == [r["game"] for r in results]
+    assert len(load_results(path)) == 4
+
+    # More openings: only the new games are played
+    more = run_tournament({**CONFIG, "games": 3}, path)
+    assert len(more) == 6
+    assert len(load_results(path)) == 6
+
+    try:
+        run_tournament({**CONFIG, "max_plies": 40}, path)
+        assert False, "a changed configuration must not reuse old games"
+    except ValueError:
+        pass
+
+    summary = report(results, CONFIG)
+    row = summary["pairs"][0]
+    assert (row["engine"], row["opponent"], row["games"]) == ("d1", "d2", 4)
+    assert row["wins"] + row["draws"] + row["losses"] == 4
+    assert row["as_tigers"]["wins"] + row["as_goats"]["wins"] == row["wins"]
+    for engine in summary["engines"]:
+        assert engine["games"] == 4
+        assert engine["nodes_per_move"] > 0
+    assert "d1" in format_report(summary)
+
+def test_pool_matches_serial():
+    serial = run_tournament(CONFIG)
+    pooled = run_tournament(CONFIG, workers=2)
+    key = lambda r: r["game"]
+    assert ([(r["game"], r["winner"], r["plies"]) for r in sorted(serial, key=key)]
+            == [(r["game"], r["winner"], r["plies"]) for r in sorted(pooled, key=key)])
+
+def test_mcts_games_replay_identically():
+    config = {"engines": {"m1": {"engine": "mcts", "iterations": 30, "rollout_plies": 10},
+                          "m2": {"engine": "mcts", "iterations": 60, "rollout_plies": 10}},
+              "games": 1, "seed": 3, "max_plies": 20}
+    first = run_tournament(config)
+    # Fresh engines, as in another run or a pool worker
+    tournament._engines.clear()
+    second = run_tournament(config)
+    key = lambda r: (r["game"], r["winner"], r["plies"], r["captured"])
+    assert [key(r) for r in first] == [key(r) for r in second]
+
+def test_elo():
+    assert elo_difference(0.5, 10) == (0.0, elo_difference(0.5, 10)[1])
+    assert elo_difference(0.75, 100)[0] == 190.8
+    assert elo_difference(1.0, 10)[0] > 400
+    # 'a' beats 'b' every time, 'b' and 'c' draw
+    results = ([{"tiger": "a", "goat": "b", "winner": "T"}] * 4
+               + [{"tiger": "b", "goat": "a", "winner": "G"}] * 4
+               + [{"tiger": "b", "goat": "c", "winner": None}] * 4)
+    ratings = elo_ratings(results, ["a", "b", "c"])
+    assert ratings["a"] > ratings["b"] == ratings["c"]
+    assert abs(sum(ratings.values())) < 1
+
+def test_weights_override():
+    weights = make_weights({"movement": {"threats": 99}})
+    assert weights[0].threats != 99 and weights[1].threats == 99
+    game = GameEngine()
+    game.apply_move({'type': 'PLACE', 'to': 2})
+    board = BitState.from_game_state(game.state)
+    heavy = MinimaxAI(weights=make_weights({"placement": {"mobility": 100}}))
+    assert heavy.evaluate(board) != MinimaxAI().evaluate(board)
+
+if __name__ == "__main__":
+    test_schedule_pairs_both_colours()
+    test_run_resume_and_report()
+    test_pool_matches_serial()
+    test_mcts_games_replay_identically()
+    test_elo()
+    test_weights_override()
+    print("Tournament Tests Passed!")
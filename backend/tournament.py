@@ -0,0 +1,422 @@
+"""
+Engine-vs-engine tournaments.
+
+    python tournament.py tournament.json -o results.jsonl --workers 4
+    python tournament.py -e d2='{"depth": 2}' -e d3='{"depth": 3}' --games 10
+    python tournament.py tournament.json -o results.jsonl --report
+
+Config (JSON):
+
+    {
+      "engines": {
+        "d3": {"depth": 3},
+        "t200": {"time_ms": 200},
+        "threats": {"depth": 3, "weights": {"movement": {"threats": 60}}},
+        "mcts": {"engine": "mcts", "iterations": 2000}
+      },
+      "pairs": [["d3", "t200"]],      # Default: every pair
+      "games": 10,                    # Openings per pair, each played with both colour assignments
+      "seed": 1,
+      "opening_plies": 2,             # Seeded random moves before the engines take over
+      "max_plies": 200                # Then the game is a draw, as are GameEngine draws
+    }
+
+Engine specs are MinimaxAI constructor arguments ('weights' overrides
+ai/evaluation.py's PHASE_WEIGHTS per phase) or, with "engine": "mcts",
+MCTSAI arguments; 'time_ms' is the per-move budget. Every game starts from
+fresh engines and a seeded opening, and an MCTS spec without a 'seed' gets
+one derived from the opening, so fixed-depth and fixed-iteration games
+replay identically; time-budgeted ones depend on the machine.
+
+Games run on a process pool. Each finished game is appended to the output
+file as one JSON line, and a rerun with the same output file only plays the
+games that are missing. The report has win/draw/loss tables per pair, Elo
+estimates, and thinking time and nodes per move for every engine.
+"""
+import argparse
+import hashlib
+import json
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+from game.engine import GameEngine
+from ai.ai_player import MinimaxAI
+from ai.evaluation import PHASE_WEIGHTS, Weights
+from ai.mcts import MCTSAI
+
+PHASES = ("placement", "movement")
+DEFAULTS = {"games": 10, "seed": 1, "opening_plies": 2, "max_plies": 200}
+# Virtual draws added between every pair that met, so an engine that lost
+# (or won) every game still gets a finite rating
+ELO_PRIOR_DRAWS = 1
+
+
+class GameSpec(NamedTuple):
+    game_id: str
+    pair: Tuple[str, str]   # As scheduled; reports are from pair[0]'s side
+    tiger: str
+    goat: str
+    tiger_spec: dict
+    goat_spec: dict
+    opening_seed: int
+    opening_plies: int
+    max_plies: int
+
+    def fingerprint(self) -> str:
+        """Changes whenever anything that decides the game changes."""
+        data = json.dumps(self[2:], sort_keys=True)
+        return hashlib.sha1(data.encode()).hexdigest()[:12]
+
+
+# === Engines ===
+
+def make_weights(overrides: dict) -> Tuple[Weights, ...]:
+    """PHASE_WEIGHTS with per-phase overrides, e.g. {"movement": {"threats": 60}}."""
+    unknown = set(overrides) - set(PHASES)
+    if unknown:
+        raise ValueError(f"Unknown phase(s) {sorted(unknown)}, expected {PHASES}")
+    return tuple(w._replace(**overrides.get(phase, {})) for phase, w in zip(PHASES, PHASE_WEIGHTS))
+
+
+def build_engine(spec: dict):
+    options = dict(spec)
+    kind = options.pop("engine", "minimax")
+    options.pop("time_ms", None)  # Per-move budget, passed to search()
+    if kind == "mcts":
+        return MCTSAI(**options)
+    if kind != "minimax":
+        raise ValueError(f"Unknown engine '{kind}'")
+    if "weights" in options:
+        options["weights"] = make_weights(options["weights"])
+    return MinimaxAI(**options)
+
+
+# Engines of this process by spec, reused (after new_game) between games
+_engines: Dict[str, object] = {}
+
+
+def _engine(spec: dict):
+    key = json.dumps(spec, sort_keys=True)
+    engine = _engines.get(key)
+    if engine is None:
+        engine = _engines[key] = build_engine(spec)
+    return engine
+
+
+# === Playing ===
+
+def schedule(config: dict) -> List[GameSpec]:
+    """Every game of the tournament, in a fixed order."""
+    config = {**DEFAULTS, **config}
+    engines = config["engines"]
+    names = list(engines)
+    pairs = config.get("pairs") or [(a, b) for i, a in enumerate(names) for b in names[i + 1:]]
+    specs = []
+    for a, b in pairs:
+        for name in (a, b):
+            if name not in engines:
+                raise ValueError(f"Unknown engine '{name}' in pairs")
+        for round_ in range(config["games"]):
+            # Both colour assignments play the same opening
+            seed = random.Random(f"{config['seed']}:{a}:{b}:{round_}").getrandbits(32)
+            for tiger, goat in ((a, b), (b, a)):
+                specs.append(GameSpec(f"{a}~{b}#{round_}:{tiger}-T", (a, b), tiger, goat,
+                                      engines[tiger], engines[goat], seed,
+                                      config["opening_plies"], config["max_plies"]))
+    return specs
+
+
+def play_game(spec: GameSpec) -> dict:
+    """Play one game. Runs in a pool worker."""
+    game = GameEngine()
+    rng = random.Random(spec.opening_seed)
+    plies = 0
+    for _ in range(spec.opening_plies):
+        moves = game.get_valid_moves()
+        if game.check_winner() or not moves:
+            break
+        game.apply_move(rng.choice(moves))
+        plies += 1
+
+    players = {'T': (_engine(spec.tiger_spec), spec.tiger_spec.get("time_ms")),
+               'G': (_engine(spec.goat_spec), spec.goat_spec.get("time_ms"))}
+    for engine, _ in players.values():
+        engine.new_game()
+    # Unseeded MCTS would roll out differently on every run
+    seeds = {side: random.Random(f"{spec.opening_seed}:{side}").getrandbits(32)
+             for side, side_spec in (('T', spec.tiger_spec), ('G', spec.goat_spec))
+             if isinstance(players[side][0], MCTSAI) and "seed" not in side_spec}
+    stats = {side: {"moves": 0, "seconds": 0.0, "nodes": 0} for side in players}
+
+    winner = None
+    while plies < spec.max_plies:
+        winner = game.check_winner()
+        if winner or not game.get_valid_moves():
+            break  # Goats without a move: a draw
+        side = game.state.turn
+        engine, time_ms = players[side]
+        if side in seeds:
+            # Set per move: in self-play both sides share the engine
+            engine.seed = seeds[side]
+        start = time.perf_counter()
+        result = engine.search(game.state, side, time_ms=time_ms)
+        stats[side]["seconds"] += time.perf_counter() - start
+        stats[side]["moves"] += 1
+        stats[side]["nodes"] += result.nodes
+        if not game.apply_move(result.move):
+            raise RuntimeError(f"{spec.game_id}: engine played an illegal move {result.move}")
+        plies += 1
+    else:
+        winner = game.check_winner()
+
+    for side_stats in stats.values():
+        side_stats["seconds"] = round(side_stats["seconds"], 4)
+    return {
+        "game": spec.game_id,
+        "fingerprint": spec.fingerprint(),
+        "pair": list(spec.pair),
+        "tiger": spec.tiger,
+        "goat": spec.goat,
+        "winner": winner,
+        "plies": plies,
+        "captured": game.state.goats_captured,
+        "stats": stats,
+    }
+
+
+def load_results(path: str) -> List[dict]:
+    """Finished games in 'path'. A line cut short by an interrupted run is skipped."""
+    results = []
+    if not os.path.exists(path):
+        return results
+    with open(path) as f:
+        for line in f:
+            try:
+                results.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return results
+
+
+def run_tournament(config: dict, output: Optional[str] = None, workers: int = 0,
+                   log=None) -> List[dict]:
+    """
+    Play every game of 'config' not already in 'output' and return all
+    results. workers=0 plays in this process.
+    """
+    specs = schedule(config)
+    results = load_results(output) if output else []
+    done = {r["game"]: r for r in results}
+    pending = []
+    for spec in specs:
+        previous = done.get(spec.game_id)
+        if previous is None:
+            pending.append(spec)
+        elif previous["fingerprint"] != spec.fingerprint():
+            raise ValueError(f"{output} holds game {spec.game_id} from a different configuration")
+    if log is not None:
+        log(f"{len(specs) - len(pending)} of {len(specs)} games already played")
+
+    out = None
+    if output:
+        out = open(output, "a")
+        if out.tell() and not _ends_with_newline(output):
+            out.write("\n")  # Finish off a line cut short by an interrupted run
+    try:
+        def record(result: dict):
+            results.append(result)
+            if out is not None:
+                out.write(json.dumps(result) + "\n")
+                out.flush()
+            if log is not None:
+                winner = result['winner'] if result['winner'] in ('T', 'G') else 'draw'
+                log(f"{result['game']}: {winner} in {result['plies']} plies")
+
+        if workers <= 0:
+            for spec in pending:
+                record(play_game(spec))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = [pool.submit(play_game, spec) for spec in pending]
+                for future in as_completed(futures):
+                    record(future.result())
+    finally:
+        if out is not None:
+            out.close()
+    wanted = {spec.game_id for spec in specs}
+    return [r for r in results if r["game"] in wanted]
+
+
+def _ends_with_newline(path: str) -> bool:
+    with open(path, "rb") as f:
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b"\n"
+
+
+# === Report ===
+
+def score_of(result: dict, name: str) -> float:
+    """1 for a win, 0.5 for a draw, 0 for a loss, from 'name's side."""
+    if result["winner"] in (None, 'D'):
+        return 0.5
+    side = 'T' if result["tiger"] == name else 'G'
+    return 1.0 if result["winner"] == side else 0.0
+
+
+def elo_difference(score: float, games: int) -> Tuple[float, float]:
+    """
+    Elo difference implied by a score fraction over 'games' games, with the
+    half-width of its 95% interval. 0 and 1 are pulled half a game inwards.
+    """
+    if games == 0:
+        return 0.0, math.inf
+    clamped = min(max(score, 0.5 / games), 1 - 0.5 / games)
+
+    def elo(s: float) -> float:
+        return -400 * math.log10(1 / s - 1)
+
+    margin = 1.96 * math.sqrt(clamped * (1 - clamped) / games)
+    low = elo(max(clamped - margin, 1e-6))
+    high = elo(min(clamped + margin, 1 - 1e-6))
+    return round(elo(clamped), 1) + 0.0, round((high - low) / 2, 1)
+
+
+def elo_ratings(results: List[dict], names: Iterable[str], iterations: int = 1000) -> Dict[str, float]:
+    """
+    Bradley-Terry ratings on the Elo scale (mean 0), draws counting half,
+    fitted with minorization-maximization.
+    """
+    names = list(names)
+    games: Dict[Tuple[str, str], int] = {}
+    scores = {name: 0.0 for name in names}
+    for r in results:
+        a, b = sorted((r["tiger"], r["goat"]))
+        games[a, b] = games.get((a, b), 0) + 1
+        scores[r["tiger"]] += score_of(r, r["tiger"])
+        scores[r["goat"]] += score_of(r, r["goat"])
+    for a, b in games:
+        games[a, b] += ELO_PRIOR_DRAWS
+        scores[a] += ELO_PRIOR_DRAWS / 2
+        scores[b] += ELO_PRIOR_DRAWS / 2
+
+    strength = {name: 1.0 for name in names}
+    for _ in range(iterations):
+        updated = {}
+        for name in names:
+            denominator = sum(n / (strength[a] + strength[b])
+                              for (a, b), n in games.items() if name in (a, b))
+            updated[name] = scores[name] / denominator if denominator else strength[name]
+        strength = updated
+    played = [name for name in names if any(name in pair for pair in games)]
+    if not played:
+        return {name: 0.0 for name in names}
+    ratings = {name: 400 * math.log10(strength[name]) for name in played}
+    mean = sum(ratings.values()) / len(ratings)
+    return {name: round(ratings.get(name, mean) - mean, 1) for name in names}
+
+
+def report(results: List[dict], config: dict) -> dict:
+    names = list(config["engines"])
+    pairs = []
+    for pair in dict.fromkeys(tuple(r["pair"]) for r in results):
+        a, b = pair
+        games = [r for r in results if tuple(r["pair"]) == pair]
+        row = {"engine": a, "opponent": b, "games": len(games)}
+        for role, side in (("as_tigers", "tiger"), ("as_goats", "goat")):
+            subset = [r for r in games if r[side] == a]
+            row[role] = _wdl(subset, a)
+        row.update(_wdl(games, a))
+        row["elo_diff"], row["elo_margin"] = elo_difference(row["score"], len(games))
+        pairs.append(row)
+
+    ratings = elo_ratings(results, names)
+    engines = []
+    for name in names:
+        moves = seconds = nodes = played = 0
+        for r in results:
+            for side, key in (('T', "tiger"), ('G', "goat")):
+                if r[key] == name:
+                    played += 1
+                    moves += r["stats"][side]["moves"]
+                    seconds += r["stats"][side]["seconds"]
+                    nodes += r["stats"][side]["nodes"]
+        engines.append({
+            "engine": name,
+            "games": played,
+            "elo": ratings[name],
+            "ms_per_move": round(1000 * seconds / moves, 2) if moves else None,
+            "nodes_per_move": round(nodes / moves, 1) if moves else None,
+        })
+    engines.sort(key=lambda e: -e["elo"])
+    return {"pairs": pairs, "engines": engines}
+
+
+def _wdl(results: List[dict], name: str) -> dict:
+    wins = sum(1 for r in results if score_of(r, name) == 1.0)
+    draws = sum(1 for r in results if r["winner"] in (None, 'D'))
+    losses = len(results) - wins - draws
+    score = (wins + draws / 2) / len(results) if results else 0.0
+    return {"wins": wins, "draws": draws, "losses": losses, "score": round(score, 3)}
+
+
+def format_report(summary: dict) -> str:
+    lines = ["Pairs (W-D-L from the first engine's side)"]
+    lines.append(f"{'engine':<14}{'opponent':<14}{'games':>6}{'total':>12}{'as tigers':>12}"
+                 f"{'as goats':>12}{'score':>7}{'elo':>16}")
+    for row in summary["pairs"]:
+        wdl = lambda d: f"{d['wins']}-{d['draws']}-{d['losses']}"
+        elo = f"{row['elo_diff']:+.0f} +/- {row['elo_margin']:.0f}"
+        lines.append(f"{row['engine']:<14}{row['opponent']:<14}{row['games']:>6}{wdl(row):>12}"
+                     f"{wdl(row['as_tigers']):>12}{wdl(row['as_goats']):>12}{row['score']:>7.3f}{elo:>16}")
+    lines.append("")
+    lines.append(f"{'engine':<14}{'games':>6}{'elo':>8}{'ms/move':>10}{'nodes/move':>12}")
+    for e in summary["engines"]:
+        ms = "-" if e["ms_per_move"] is None else f"{e['ms_per_move']:.1f}"
+        nodes = "-" if e["nodes_per_move"] is None else f"{e['nodes_per_move']:.0f}"
+        lines.append(f"{e['engine']:<14}{e['games']:>6}{e['elo']:>+8.0f}{ms:>10}{nodes:>12}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play engine-vs-engine tournaments.")
+    parser.add_argument("config", nargs="?", help="tournament JSON file")
+    parser.add_argument("-e", "--engine", action="append", default=[], metavar="NAME=JSON",
+                        help="add an engine, e.g. d3='{\"depth\": 3}'")
+    parser.add_argument("-o", "--output", help="results JSONL; rerunning resumes it")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--games", type=int, help="openings per pair")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--max-plies", type=int)
+    parser.add_argument("--report", action="store_true", help="only report the games in --output")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    config: dict = {"engines": {}}
+    if args.config:
+        with open(args.config) as f:
+            config = json.load(f)
+    for item in args.engine:
+        name, _, spec = item.partition("=")
+        config.setdefault("engines", {})[name] = json.loads(spec or "{}")
+    for key in ("games", "seed", "max_plies"):
+        if getattr(args, key) is not None:
+            config[key] = getattr(args, key)
+    if len(config["engines"]) < 2:
+        parser.error("need at least two engines")
+
+    if args.report:
+        if not args.output:
+            parser.error("--report needs --output")
+        wanted = {spec.game_id for spec in schedule(config)}
+        results = [r for r in load_results(args.output) if r["game"] in wanted]
+    else:
+        results = run_tournament(config, args.output, args.workers, log=print)
+    summary = report(results, config)
+    print(json.dumps(summary, indent=2) if args.json else format_report(summary))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,4 @@
-import React, { useState, useEffect, useCallback } from 'react';
+import React, { useState, useEffect, useCallback, useRef } from 'react';
 import axios from 'axios';
 import { AnimatePresence } from 'framer-motion';
 import Board from './Board';
@@ -7,8 +7,23 @@ import useSoundEffects from './useSoundEffects';
 import './App.css';
 
 const API_BASE = 'http://localhost:8000';
+const WS_BASE = API_BASE.replace(/^http/, 'ws');
+
+// Apply a state diff pushed by the server: 'board' only lists changed nodes
+const applyDiff = (state, changes) => ({
+  ...state,
+  ...changes,
+  board: { ...state.board, ...changes.board },
+});
+
+const describeAIMove = (move) => move.type === 'CAPTURE'
+  ? `AI captured a goat!`
+  : move.type === 'PLACE'
+    ? `AI placed at position ${move.to + 1}`
+    : `AI moved from ${move.from + 1} to ${move.to + 1}`;
 
 function App() {
+  const [gameId, setGameId] = useState(null);
   const [gameState, setGameState] = useState(null);
   const [selectedNode, setSelectedNode] = useState(null);
   const [message, setMessage] = useState('');
@@ -17,22 +32,106 @@ function App() {
   const [connectionError, setConnectionError] = useState(false);
   const [soundEnabled, setSoundEnabled] = useState(true);
 
+  // Live connection to the game: the server pushes every move as a diff
+  const socketRef = useRef(null);
+  const versionRef = useRef(null);
+
   // Sound effects hook
   const sounds = useSoundEffects(soundEnabled);
 
-  // Fetch initial state
+  // Create a game session on load
   useEffect(() => {
-    fetchState();
+    createGame();
   }, []);
 
-  const fetchState = async () => {
+  const send = (message) => {
+    const socket = socketRef.current;
+    if (!socket || socket.readyState !== WebSocket.OPEN) {
+      setMessage("Not connected to the game server. Start a new game to reconnect.");
+      return false;
+    }
+    socket.send(JSON.stringify(message));
+    return true;
+  };
+
+  const playMoveSound = (move, mover) => {
+    if (move.type === 'PLACE') {
+      sounds.placeGoat();
+    } else if (move.type === 'CAPTURE') {
+      sounds.capture();
+    } else if (mover === 'T') {
+      sounds.moveTiger();
+    } else {
+      sounds.moveGoat();
+    }
+  };
+
+  const handleServerMessage = (msg) => {
+    if (msg.type === 'state') {
+      versionRef.current = msg.version;
+      setGameState(msg.state);
+      setSelectedNode(null);
+      setLoading(false);
+    } else if (msg.type === 'diff') {
+      if (versionRef.current === null || msg.version !== versionRef.current + 1) {
+        // Missed an update: ask for the whole state again
+        send({ type: 'state' });
+        return;
+      }
+      versionRef.current = msg.version;
+      setGameState(prev => applyDiff(prev, msg.changes));
+      setSelectedNode(null);
+      setLoading(false);
+      if (msg.move) {
+        // Every move passes the turn, so the mover is whoever is not to move now
+        playMoveSound(msg.move, msg.changes.turn === 'T' ? 'G' : 'T');
+        setMessage(msg.ai ? describeAIMove(msg.move) : '');
+      }
+    } else if (msg.type === 'error') {
+      setLoading(false);
+      sounds.invalid();
+      if (msg.id === 'ai') {
+        console.error("AI Error:", msg.detail);
+        setMessage("AI couldn't find a move.");
+      } else {
+        setMessage(typeof msg.detail === 'string' ? `Invalid Move: ${msg.detail}` : "Invalid Move");
+      }
+    }
+  };
+
+  // The socket outlives renders, so it always calls the latest handler
+  const handlerRef = useRef(handleServerMessage);
+  handlerRef.current = handleServerMessage;
+
+  useEffect(() => {
+    if (!gameId) return;
+    versionRef.current = null;
+    const socket = new WebSocket(`${WS_BASE}/games/${gameId}/ws`);
+    socketRef.current = socket;
+    socket.onmessage = (event) => handlerRef.current(JSON.parse(event.data));
+    socket.onclose = () => {
+      if (socketRef.current !== socket) return;  // Replaced by a newer game
+      socketRef.current = null;
+      setLoading(false);
+      setMessage("Lost connection to the game server. Start a new game to reconnect.");
+    };
+    return () => {
+      socketRef.current = null;
+      socket.close();
+    };
+  }, [gameId]);
+
+  const gameUrl = (path) => `${API_BASE}/games/${gameId}${path}`;
+
+  const createGame = async () => {
     try {
       setConnectionError(false);
-      const res = await axios.get(`${API_BASE}/state`);
-      setGameState(res.data);
-      console.log("Game State:", res.data);
+      const res = await axios.post(`${API_BASE}/games`);
+      setGameId(res.data.game_id);
+      setGameState(res.data.state);
+      console.log("Game State:", res.data.state);
     } catch (err) {
-      console.error("Error fetching state:", err);
+      console.error("Error creating game:", err);
       setConnectionError(true);
       setMessage("Error connecting to game server. Please ensure the backend is running.");
     }
@@ -41,12 +140,15 @@ function App() {
   const handleNewGame = async () => {
     try {
       setLoading(true);
-      await axios.post(`${API_BASE}/new-game`);
       setGameState(null);
       setSelectedNode(null);
       setMessage('');
       sounds.newGame();
-      await fetchState();
+      // Start a fresh session (this also recovers from one the server expired)
+      if (gameId) {
+        axios.delete(gameUrl('')).catch(() => {});
+      }
+      await createGame();
     } catch (err) {
       console.error("Error starting new game:", err);
       setMessage("Failed to start new game.");
@@ -57,35 +159,11 @@ function App() {
   };
 
   const executeMove = useCallback(async (payload) => {
-    try {
+    // The resulting state comes back over the socket
+    if (send({ type: 'move', id: 'move', move: payload })) {
       setLoading(true);
-      const res = await axios.post(`${API_BASE}/move`, payload);
-      setGameState(res.data);
-      setSelectedNode(null);
-      setMessage('');
-
-      // Play sound based on move type
-      if (payload.type === 'PLACE') {
-        sounds.placeGoat();
-      } else if (payload.capture_node) {
-        sounds.capture();
-      } else if (gameState.turn === 'T') {
-        sounds.moveTiger();
-      } else {
-        sounds.moveGoat();
-      }
-    } catch (err) {
-      if (err.response?.data?.detail) {
-        setMessage(`Invalid Move: ${err.response.data.detail}`);
-        sounds.invalid();
-      } else {
-        setMessage("Invalid Move");
-        sounds.invalid();
-      }
-    } finally {
-      setLoading(false);
     }
-  }, [gameState, sounds]);
+  }, [gameId]);
 
   const handleNodeClick = useCallback(async (nodeId) => {
     if (!gameState || gameState.winner) return;
@@ -142,49 +220,13 @@ function App() {
     }
   }, [gameState, selectedNode, executeMove]);
 
-  const handleAIMove = async () => {
+  const handleAIMove = () => {
     if (!gameState || gameState.winner) return;
 
-    try {
+    // The server searches and plays the move, then pushes it like any other
+    if (send({ type: 'ai', id: 'ai', player: gameState.turn })) {
       setLoading(true);
       setMessage('AI is thinking...');
-
-      const res = await axios.get(`${API_BASE}/ai-move?player=${gameState.turn}`);
-      const move = res.data;
-
-      const payload = {
-        type: move.type,
-        from_node: move.from,
-        to_node: move.to,
-        capture_node: move.capture
-      };
-
-      const moveRes = await axios.post(`${API_BASE}/move`, payload);
-      setGameState(moveRes.data);
-      setSelectedNode(null);
-
-      // Play sound based on move type
-      if (payload.type === 'PLACE') {
-        sounds.placeGoat();
-      } else if (payload.capture_node) {
-        sounds.capture();
-      } else if (gameState.turn === 'T') {
-        sounds.moveTiger();
-      } else {
-        sounds.moveGoat();
-      }
-
-      const moveDesc = move.type === 'CAPTURE'
-        ? `AI captured a goat!`
-        : move.type === 'PLACE'
-          ? `AI placed at position ${move.to + 1}`
-          : `AI moved from ${move.from + 1} to ${move.to + 1}`;
-      setMessage(moveDesc);
-    } catch (err) {
-      console.error("AI Error:", err);
-      setMessage("AI couldn't find a move.");
-    } finally {
-      setLoading(false);
     }
   };
 
@@ -210,7 +252,7 @@ function App() {
             <p>Unable to connect to game server.</p>
             <p>Please ensure the backend is running on port 8000.</p>
           </div>
-          <button onClick={fetchState} className="btn btn-primary">
+          <button onClick={createGame} className="btn btn-primary">
             Retry Connection
           </button>
         </div>
@@ -361,15 +403,19 @@ function App() {
               exit={{ scale: 0.8, y: 50 }}
             >
               <div className="winner-emoji">
-                {winner === 'T' ? '🐯' : '🐐'}
+                {winner === 'T' ? '🐯' : winner === 'G' ? '🐐' : '🤝'}
               </div>
               <h2 className="winner-title">
-                {winner === 'T' ? 'TIGER WINS!' : 'GOAT WINS!'}
+                {winner === 'T' ? 'TIGER WINS!' : winner === 'G' ? 'GOAT WINS!' : 'DRAW!'}
               </h2>
               <p className="winner-message">
                 {winner === 'T'
                   ? 'The tiger captured 5 goats! Ferocious victory!'
-                  : 'The goats trapped all tigers! Strategic triumph!'}
+                  : winner === 'G'
+                    ? 'The goats trapped all tigers! Strategic triumph!'
+                    : gameState.draw_reason === 'repetition'
+                      ? 'The same position kept coming back. Nobody could break through!'
+                      : 'Too many moves without a capture. A hard-fought standoff!'}
               </p>
               <button onClick={handleNewGame} className="btn btn-primary btn-large">
                 🔄 Play Again
@@ -96,6 +96,7 @@ const GameRules = ({ onClose }) => {
                         <ul>
                             <li><strong>🐯 Tiger Wins:</strong> Capture 5 goats</li>
                             <li><strong>🐐 Goat Wins:</strong> Block all tigers (no legal moves available)</li>
+                            <li><strong>🤝 Draw:</strong> The same position occurs three times, or 100 moves pass without a placement or capture</li>
                         </ul>
                     </section>
 
@@ -11,8 +11,9 @@ trap cleanup SIGINT
 
 echo "Starting Backend..."
 cd backend
-# Using python3 -m uvicorn to ensure the correct python environment is used
-python3 -m uvicorn main:app --reload --host 0.0.0.0 --port 8000 &
+# Using python3 -m uvicorn to ensure the correct python environment is used.
+# Games are kept in games.db, so they survive --reload and restarts.
+GAME_DB=games.db python3 -m uvicorn main:app --reload --host 0.0.0.0 --port 8000 &
 BACKEND_PID=$!
 cd ..
 